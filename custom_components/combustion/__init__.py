@@ -5,20 +5,28 @@ https://github.com/legrego/homeassistant-combustion
 """
 from __future__ import annotations
 
+import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.helpers import config_validation as cv
 
 from custom_components.combustion.bluetooth_listener import BluetoothListener
 from custom_components.combustion.probe_manager import ProbeManager
 
-from .const import DOMAIN
+from .const import ATTR_ENABLED, ATTR_SAMPLE_RATE, DOMAIN, SERVICE_SET_PACKET_TRACING
 
 PLATFORMS: list[Platform] = [
     Platform.BINARY_SENSOR,
+    Platform.NUMBER,
     Platform.SENSOR
 ]
 
+SET_PACKET_TRACING_SCHEMA = vol.Schema({
+    vol.Required(ATTR_ENABLED): cv.boolean,
+    vol.Optional(ATTR_SAMPLE_RATE, default=1): vol.All(vol.Coerce(int), vol.Range(min=1)),
+})
+
 
 # https://developers.home-assistant.io/docs/config_entries_index/#setting-up-an-entry
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -26,16 +34,27 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.data.setdefault(DOMAIN, {})
 
     listener = BluetoothListener(hass, entry)
-    probe_manager = ProbeManager(listener)
+    await listener.async_load()
+    probe_manager = ProbeManager(hass, listener, entry.options)
+    await probe_manager.async_load()
 
     hass.data[DOMAIN] = probe_manager
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    entry.async_on_unload(entry.add_update_listener(async_update_listener))
 
     probe_manager.async_init()
+    entry.async_on_unload(probe_manager.async_unload)
     listener.async_init()
 
+    async def async_set_packet_tracing(call: ServiceCall) -> None:
+        """Enable or disable sampled tracing of advertisements."""
+        probe_manager: ProbeManager = hass.data[DOMAIN]
+        probe_manager.bluetooth_listener.tracer.configure(call.data[ATTR_ENABLED], call.data[ATTR_SAMPLE_RATE])
+
+    hass.services.async_register(DOMAIN, SERVICE_SET_PACKET_TRACING, async_set_packet_tracing, SET_PACKET_TRACING_SCHEMA)
+    entry.async_on_unload(lambda: hass.services.async_remove(DOMAIN, SERVICE_SET_PACKET_TRACING))
+
     return True
 
 
@@ -46,6 +65,19 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unloaded
 
 
+async def async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Handle config entry updates.
+
+    Discovery adds Meatnet devices to the entry data as they show up. Entities are created from
+    advertisements rather than from that list, so only changed options require a reload.
+    """
+    probe_manager: ProbeManager = hass.data[DOMAIN]
+    if dict(entry.options) == dict(probe_manager.options):
+        return
+
+    await async_reload_entry(hass, entry)
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
     await async_unload_entry(hass, entry)
@@ -0,0 +1,104 @@
+"""Pick the Bluetooth scanner each probe is received through."""
+from __future__ import annotations
+
+from typing import Any
+
+from custom_components.combustion.combustion_ble.decoder import DecodedProbeData
+
+# Weight of the latest advertisement in the smoothed RSSI of a scanner.
+RSSI_SMOOTHING = 0.2
+
+# Another scanner only becomes preferred when its smoothed signal is this much stronger, so
+# scanners with a similar signal do not take turns.
+SOURCE_HYSTERESIS = 6
+
+# Seconds without an advertisement through the preferred scanner before failing over to another one.
+DEFAULT_SOURCE_TIMEOUT = 5.0
+
+
+class _Source:
+    """Smoothed signal of a probe received through a scanner."""
+
+    __slots__ = ('rssi', 'last_seen')
+
+    def __init__(self, rssi: float, last_seen: float) -> None:
+        self.rssi = rssi
+        self.last_seen = last_seen
+
+
+class _Arbitration:
+    """Scanners a probe is received through, and the preferred one."""
+
+    __slots__ = ('preferred', 'sources', 'switches')
+
+    def __init__(self) -> None:
+        self.preferred: str | None = None
+        self.sources: dict[str, _Source] = {}
+        self.switches = 0
+
+
+class SourceArbiter:
+    """Pick the Bluetooth scanner each probe is received through.
+
+    Home Assistant follows a single scanner per address, but a probe is received through its own
+    address and the address of every repeater relaying it, each through whichever local adapter or
+    Bluetooth proxy is closest. Only advertisements received through the preferred scanner of a
+    probe are forwarded, so the RSSI of the probe follows a single scanner and readings are not
+    forwarded again through every other scanner. The scanner with the strongest smoothed RSSI is
+    preferred, and keeps its place until another one is `SOURCE_HYSTERESIS` dB stronger, or until
+    it has not delivered anything for `timeout` seconds.
+    """
+
+    def __init__(self, timeout: float = DEFAULT_SOURCE_TIMEOUT) -> None:
+        """Initialize."""
+        self.timeout = timeout
+        self.dropped = 0
+        self._probes: dict[int, _Arbitration] = {}
+
+    def accept(self, probe_data: DecodedProbeData, source: str, now: float) -> bool:
+        """Determine if probe data received through `source` at `now` (monotonic seconds) should be forwarded."""
+        serial_number = probe_data.advertising_data.serial_number
+        arbitration = self._probes.get(serial_number)
+        if arbitration is None:
+            arbitration = self._probes[serial_number] = _Arbitration()
+
+        rssi = probe_data.rssi
+        state = arbitration.sources.get(source)
+        if state is None or now - state.last_seen > self.timeout:
+            state = arbitration.sources[source] = _Source(rssi, now)
+        else:
+            state.rssi += RSSI_SMOOTHING * (rssi - state.rssi)
+            state.last_seen = now
+
+        preferred = arbitration.preferred
+        if source == preferred:
+            return True
+
+        current = arbitration.sources.get(preferred) if preferred is not None else None
+        if current is None or now - current.last_seen > self.timeout or state.rssi >= current.rssi + SOURCE_HYSTERESIS:
+            if preferred is not None:
+                arbitration.switches += 1
+            arbitration.preferred = source
+            return True
+
+        self.dropped += 1
+        return False
+
+    def forget(self, serial_number: int) -> None:
+        """Drop the scanners of a probe which is no longer received."""
+        self._probes.pop(serial_number, None)
+
+    def as_dict(self, now: float) -> dict[str, Any]:
+        """Convert to a dictionary, with the scanners of each probe heard within the timeout."""
+        return {
+            f'{serial_number:x}': {
+                'preferred': arbitration.preferred,
+                'switches': arbitration.switches,
+                'sources': {
+                    source: round(state.rssi, 1)
+                    for (source, state) in arbitration.sources.items()
+                    if now - state.last_seen <= self.timeout
+                },
+            }
+            for (serial_number, arbitration) in self._probes.items()
+        }
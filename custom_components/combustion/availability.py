@@ -0,0 +1,53 @@
+"""Track which probes are still being received."""
+from __future__ import annotations
+
+import heapq
+
+
+class AvailabilityTracker:
+    """Track when each probe was last seen, and which probes have not been seen for `timeout` seconds.
+
+    All probes share a single heap of deadlines, so one timer serves every probe and its entities.
+    Receiving a packet only updates the last-seen time. A deadline is pushed back lazily when it
+    comes due, so the heap holds at most one deadline per probe however many packets arrive.
+    """
+
+    def __init__(self, timeout: float) -> None:
+        """Initialize."""
+        self.timeout = timeout
+        self._last_seen: dict[str, float] = {}
+        self._deadlines: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        """Return the number of probes tracked."""
+        return len(self._last_seen)
+
+    def seen(self, serial_number: str, now: float) -> bool:
+        """Record that a packet of the probe was received. Returns True if the probe was not tracked yet."""
+        tracked = serial_number in self._last_seen
+        self._last_seen[serial_number] = now
+        if not tracked:
+            heapq.heappush(self._deadlines, (now + self.timeout, serial_number))
+        return not tracked
+
+    def next_deadline(self) -> float | None:
+        """Time at which the next probe may expire."""
+        return self._deadlines[0][0] if self._deadlines else None
+
+    def pop_expired(self, now: float) -> list[str]:
+        """Stop tracking, and return, the probes which have not been seen for the timeout."""
+        expired = []
+        while self._deadlines and self._deadlines[0][0] <= now:
+            (_deadline, serial_number) = heapq.heappop(self._deadlines)
+            deadline = self._last_seen[serial_number] + self.timeout
+            if deadline <= now:
+                del self._last_seen[serial_number]
+                expired.append(serial_number)
+            else:
+                heapq.heappush(self._deadlines, (deadline, serial_number))
+        return expired
+
+    def clear(self) -> None:
+        """Stop tracking all probes."""
+        self._last_seen.clear()
+        self._deadlines.clear()
@@ -0,0 +1,217 @@
+"""Fill gaps in the readings of connected probes from the temperature log kept on board."""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any
+
+from bleak import BleakClient
+from bleak.exc import BleakError
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from custom_components.combustion.combustion_ble.log_record import LogRecord
+from custom_components.combustion.combustion_ble.uart import (
+    MESSAGE_READ_LOGS,
+    MESSAGE_SESSION_INFO,
+    PROBE_HEADER_LENGTHS,
+    RESPONSE_FLAG,
+    UART_RX_CHARACTERISTIC_UUID,
+    UartMessageReader,
+    encode_probe_request,
+)
+from custom_components.combustion.const import DOMAIN, LOGGER
+from custom_components.combustion.statistics import (
+    ProbeStatistics,
+    TemperatureStatistics,
+)
+
+_LOGGER = LOGGER.getChild('backfill')
+
+STORAGE_KEY = f'{DOMAIN}.backfill'
+STORAGE_VERSION = 1
+# Seconds to wait before storing the latest sequence numbers, which change with every record logged.
+SAVE_DELAY = 60
+
+# Seconds to wait for each response of the probe before giving up on a download.
+RESPONSE_TIMEOUT = 10
+
+# The Probe Status starts with the range of records held in the log.
+_MIN_SEQUENCE_SLICE = slice(0, 4)
+_MAX_SEQUENCE_SLICE = slice(4, 8)
+
+# Seconds between records, used when the session information does not include it.
+DEFAULT_SAMPLE_PERIOD = 5.0
+_SAMPLE_PERIOD_SLICE = slice(4, 6)
+
+
+def missing_range(last_sequence: int | None, min_sequence: int, max_sequence: int) -> tuple[int, int] | None:
+    """Range of records logged after `last_sequence` and before `max_sequence`, which are still in the log.
+
+    The latest record, `max_sequence`, was just received live. A sequence number going backwards means
+    the probe started a new log, and every earlier record of that log is missing.
+    """
+    if last_sequence is None:
+        return None
+    first = min_sequence if max_sequence < last_sequence else max(last_sequence + 1, min_sequence)
+    last = max_sequence - 1
+    return (first, last) if first <= last else None
+
+
+class _Download:
+    """Log records of a probe being downloaded, aggregated as they arrive."""
+
+    __slots__ = (
+        'first',
+        'last',
+        'reference_sequence',
+        'reference_time',
+        'sample_period',
+        'statistics',
+        'reader',
+        'received',
+        'highest',
+        'session',
+        'progress',
+    )
+
+    def __init__(self, first: int, last: int, reference_time: float, statistics: TemperatureStatistics) -> None:
+        self.first = first
+        self.last = last
+        # Records are timed backwards from the latest record, which was logged at `reference_time`.
+        self.reference_sequence = last + 1
+        self.reference_time = reference_time
+        self.sample_period = DEFAULT_SAMPLE_PERIOD
+        self.statistics = statistics
+        self.reader = UartMessageReader(PROBE_HEADER_LENGTHS)
+        self.received = 0
+        self.highest: int | None = None
+        self.session = asyncio.Event()
+        self.progress = asyncio.Event()
+
+    @property
+    def complete(self) -> bool:
+        return self.highest == self.last
+
+    def add_session_info(self, payload: bytes) -> None:
+        if len(payload) >= _SAMPLE_PERIOD_SLICE.stop and (sample_period := int.from_bytes(payload[_SAMPLE_PERIOD_SLICE], 'little')):
+            self.sample_period = sample_period / 1000
+        self.session.set()
+
+    def add_record(self, record: LogRecord | None) -> None:
+        if record is None or not self.first <= record.sequence_number <= self.last:
+            return
+        timestamp = self.reference_time - (self.reference_sequence - record.sequence_number) * self.sample_period
+        self.statistics.add(timestamp, record.core, record.surface, record.ambient)
+        self.received += 1
+        if self.highest is None or record.sequence_number > self.highest:
+            self.highest = record.sequence_number
+        self.progress.set()
+
+
+class LogBackfill:
+    """Fill gaps in the readings of connected probes from the temperature log kept on board.
+
+    The Probe Status of a connected probe includes the range of sequence numbers held in its log.
+    When records were logged since the last status received, because the probe was out of range or
+    Home Assistant was not running, they are requested in a single Read Logs request. Records are
+    decoded and aggregated into hourly statistics as they are notified, and imported into long-term
+    statistics in a single batch once the download ends. The latest sequence number of each probe
+    is stored, so gaps spanning a restart are detected.
+    """
+
+    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry, statistics: ProbeStatistics) -> None:
+        """Initialize."""
+        self.hass = hass
+        self.config_entry = config_entry
+        self.statistics = statistics
+        self.records = 0
+        self.downloads = 0
+        # Sequence number of the latest record of each probe.
+        self._sequences: dict[str, int] = {}
+        self._downloads: dict[str, _Download] = {}
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+
+    async def async_load(self) -> None:
+        """Load the sequence numbers stored before the last restart."""
+        if (data := await self._store.async_load()) is not None:
+            self._sequences = dict(data['sequences'])
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {'sequences': self._sequences}
+
+    @callback
+    def observe(self, client: BleakClient, serial_number: str, status: bytes) -> None:
+        """Check the log range of a Probe Status for missing records, and download them."""
+        if len(status) < _MAX_SEQUENCE_SLICE.stop:
+            return
+        max_sequence = int.from_bytes(status[_MAX_SEQUENCE_SLICE], 'little')
+        last_sequence = self._sequences.get(serial_number)
+        if last_sequence == max_sequence:
+            return
+        self._sequences[serial_number] = max_sequence
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+        if serial_number in self._downloads or 'recorder' not in self.hass.config.components:
+            return
+        gap = missing_range(last_sequence, int.from_bytes(status[_MIN_SEQUENCE_SLICE], 'little'), max_sequence)
+        if gap is None:
+            return
+
+        download = self._downloads[serial_number] = _Download(*gap, time.time(), self.statistics.get(serial_number))
+        self.config_entry.async_create_background_task(
+            self.hass, self._async_download(client, serial_number, download), f'combustion backfill {serial_number}'
+        )
+
+    @callback
+    def handle_uart(self, serial_number: str, data: bytes) -> None:
+        """Handle a UART notification of a probe."""
+        download = self._downloads.get(serial_number)
+        if download is None:
+            return
+        for (message_type, payload) in download.reader.feed(data):
+            if message_type == MESSAGE_READ_LOGS | RESPONSE_FLAG:
+                download.add_record(LogRecord.from_payload(payload))
+            elif message_type == MESSAGE_SESSION_INFO | RESPONSE_FLAG:
+                download.add_session_info(payload)
+
+    async def _async_download(self, client: BleakClient, serial_number: str, download: _Download) -> None:
+        """Request the missing records, wait for them, and import their statistics."""
+        _LOGGER.debug("Downloading records %s to %s from [%s]", download.first, download.last, serial_number)
+        try:
+            await client.write_gatt_char(UART_RX_CHARACTERISTIC_UUID, encode_probe_request(MESSAGE_SESSION_INFO), response=False)
+            await asyncio.wait_for(download.session.wait(), RESPONSE_TIMEOUT)
+            await client.write_gatt_char(
+                UART_RX_CHARACTERISTIC_UUID,
+                encode_probe_request(MESSAGE_READ_LOGS, download.first.to_bytes(4, 'little') + download.last.to_bytes(4, 'little')),
+                response=False,
+            )
+            while not download.complete:
+                download.progress.clear()
+                await asyncio.wait_for(download.progress.wait(), RESPONSE_TIMEOUT)
+        except (BleakError, asyncio.TimeoutError) as err:
+            _LOGGER.debug("Download from [%s] stopped after %s records: %s", serial_number, download.received, err)
+            # Request the rest, or the whole gap when the probe did not send anything, with the next status.
+            resume = download.first - 1 if download.highest is None else download.highest
+            if resume < self._sequences[serial_number]:
+                self._sequences[serial_number] = resume
+        finally:
+            del self._downloads[serial_number]
+
+        self.downloads += 1
+        self.records += download.received
+        if download.received:
+            self.statistics.async_import(serial_number)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Convert to a dictionary."""
+        return {
+            'downloads': self.downloads,
+            'records': self.records,
+            'sequences': dict(self._sequences),
+            'active': {
+                serial_number: {'first': download.first, 'last': download.last, 'received': download.received}
+                for (serial_number, download) in self._downloads.items()
+            },
+        }
@@ -1,17 +1,57 @@
 """Listen for all Bluetooth advertisements from the Combustion, Inc. manufacturer."""
+import time
+from datetime import datetime, timedelta
+
 from home_assistant_bluetooth import BluetoothServiceInfoBleak
 from homeassistant.components import bluetooth
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util.dt import monotonic_time_coarse
 
-from custom_components.combustion.combustion_ble.combustion_probe_data import (
-    CombustionProbeData,
+from custom_components.combustion.arbitration import SourceArbiter
+from custom_components.combustion.backfill import LogBackfill
+from custom_components.combustion.combustion_ble.decoder import (
+    DecodeCache,
+    DecodedProbeData,
 )
 from custom_components.combustion.combustion_ble.mode_id import ProbeMode
-from custom_components.combustion.const import BT_MANUFACTURER_ID, LOGGER
+from custom_components.combustion.connection import (
+    ConnectionManager,
+    parse_serial_numbers,
+)
+from custom_components.combustion.const import (
+    BT_MANUFACTURER_ID,
+    CONF_BACKFILL,
+    CONF_CONNECTED_PROBES,
+    CONF_CONNECTION_MODE,
+    CONF_LATENCY_HISTOGRAMS,
+    CONF_SCANNING_MODE,
+    CONNECTION_MODE_OFF,
+    CONNECTION_MODE_PROBES,
+    DEFAULT_CONNECTION_MODE,
+    DEFAULT_SCANNING_MODE,
+    LOGGER,
+)
+from custom_components.combustion.duplicate_filter import DuplicateFilter
+from custom_components.combustion.instrumentation import (
+    STAGE_BT_CALLBACK,
+    STAGE_DECODE,
+    PipelineInstrumentation,
+)
+from custom_components.combustion.probe_stats import ProbeStats
+from custom_components.combustion.scanning import (
+    EVALUATION_INTERVAL,
+    ScanningModeController,
+)
+from custom_components.combustion.statistics import ProbeStatistics
+from custom_components.combustion.tracing import PacketTracer
 
 _LOGGER = LOGGER.getChild('bluetooth-listener')
 
+# Source of the probe status notified over GATT connections, which is not arbitrated between scanners.
+GATT_SOURCE = 'gatt'
+
 class BluetoothListener:
     """Listen for all Bluetooth advertisements from the Combustion, Inc. manufacturer."""
 
@@ -20,42 +60,200 @@ class BluetoothListener:
         self.hass = hass
         self.config_entry = config_entry
         self._listeners = []
+        self._instant_read_listeners = []
+        self.decode_cache = DecodeCache()
+        self.duplicate_filter = DuplicateFilter()
+        self.source_arbiter = SourceArbiter()
+        self.tracer = PacketTracer()
+        self.instrumentation = PipelineInstrumentation(config_entry.options.get(CONF_LATENCY_HISTOGRAMS, False))
+        # Packet statistics of each probe, counting every copy relayed through the Meatnet.
+        # Kept while a probe is unavailable, to diagnose why it stopped updating.
+        self.probe_stats: dict[str, ProbeStats] = {}
+        # Hourly temperature statistics of each probe, imported into long-term statistics.
+        self.statistics = ProbeStatistics(hass)
+        self.scanning = ScanningModeController(
+            config_entry.options.get(CONF_SCANNING_MODE, DEFAULT_SCANNING_MODE),
+            time.monotonic(),
+        )
+        self._unregister_callback: CALLBACK_TYPE | None = None
+        # Home Assistant replays the latest advertisement of every matching address to a callback as it
+        # is registered. When registering again to switch scanning modes, advertisements received before
+        # this time (monotonic seconds) are stale copies of readings which were already handled.
+        self._replayed_before = 0.0
+        connection_mode = config_entry.options.get(CONF_CONNECTION_MODE, DEFAULT_CONNECTION_MODE)
+        self.connections: ConnectionManager | None = None
+        if connection_mode != CONNECTION_MODE_OFF:
+            self.connections = ConnectionManager(
+                hass,
+                config_entry,
+                connection_mode,
+                parse_serial_numbers(config_entry.options.get(CONF_CONNECTED_PROBES, '')),
+                self.async_handle_status,
+                LogBackfill(hass, config_entry, self.statistics)
+                if connection_mode == CONNECTION_MODE_PROBES and config_entry.options.get(CONF_BACKFILL, True)
+                else None,
+            )
 
     def add_update_listener(self, listener):
         """Add a listener to be notified of new BT data."""
         self._listeners.append(listener)
 
+    def add_instant_read_listener(self, listener):
+        """Add a listener to be notified of instant read data."""
+        self._instant_read_listeners.append(listener)
+
+    async def async_load(self) -> None:
+        """Load the state stored before the last restart."""
+        if self.connections is not None:
+            await self.connections.async_load()
+
     def async_init(self):
         """Async initialization."""
+        self._async_register_callback()
         self.config_entry.async_on_unload(
-            bluetooth.async_register_callback(
+            async_track_time_interval(
                 self.hass,
-                self._bt_callback,
-                bluetooth.BluetoothCallbackMatcher(manufacturer_id=BT_MANUFACTURER_ID),
-                bluetooth.BluetoothScanningMode.ACTIVE
+                self._async_evaluate_scanning_mode,
+                timedelta(seconds=EVALUATION_INTERVAL),
             )
         )
         self.config_entry.async_on_unload(self.async_unload)
+        if self.connections is not None:
+            self.config_entry.async_on_unload(self.connections.async_unload)
 
     def async_unload(self):
         """Async unload."""
+        self._async_unregister_callback()
         self._listeners.clear()
+        self._instant_read_listeners.clear()
+        self.decode_cache.clear()
+
+    def forget_probe(self, serial_number: str) -> None:
+        """Drop the state kept for a probe which is no longer received."""
+        self.duplicate_filter.forget(int(serial_number, 16))
+        self.source_arbiter.forget(int(serial_number, 16))
+        self.scanning.forget(serial_number)
+
+    @callback
+    def _async_register_callback(self) -> None:
+        """Register for advertisements using the current scanning mode."""
+        self._unregister_callback = bluetooth.async_register_callback(
+            self.hass,
+            self._bt_callback,
+            bluetooth.BluetoothCallbackMatcher(manufacturer_id=BT_MANUFACTURER_ID),
+            self.scanning.mode,
+        )
+
+    @callback
+    def _async_unregister_callback(self) -> None:
+        """Stop receiving advertisements."""
+        if self._unregister_callback is not None:
+            self._unregister_callback()
+            self._unregister_callback = None
+
+    @callback
+    def _async_evaluate_scanning_mode(self, _now: datetime) -> None:
+        """Switch the requested scanning mode when conditions changed."""
+        if self.scanning.evaluate(time.monotonic()):
+            self._async_unregister_callback()
+            self._replayed_before = monotonic_time_coarse()
+            self._async_register_callback()
+
+    def _trace_invalid(self, service_info: BluetoothServiceInfoBleak):
+        """Trace an advertisement which could not be decoded, or carries no probe."""
+        if self.tracer.sample(service_info.address):
+            self.tracer.trace("advertisement", address=service_info.address, rssi=service_info.rssi, outcome="invalid")
+
+    def _trace(self, probe_data: DecodedProbeData, source: str, outcome: str):
+        """Trace the outcome of handling probe data."""
+        if self.tracer.sample(probe_data.advertising_data.serial_number):
+            self.tracer.trace(
+                "advertisement",
+                serial_number=probe_data.serial_number,
+                address=probe_data.address,
+                source=source,
+                rssi=probe_data.rssi,
+                hop_count=probe_data.hop_count.name,
+                mode=probe_data.mode.name,
+                outcome=outcome,
+            )
 
     def _bt_callback(self, service_info: BluetoothServiceInfoBleak, change):
         """Handle incoming BT advertisements."""
-        _LOGGER.debug("Handling advertisement from [%s]", service_info.address)
+        if self.hass.is_stopping or service_info.time < self._replayed_before:
+            return
+
+        instrumentation = self.instrumentation
+        instrumentation.packets += 1
+        start = time.perf_counter_ns()
+        probe_data = DecodedProbeData.from_advertisement(service_info, self.decode_cache)
+        if instrumentation.enabled:
+            instrumentation.record(STAGE_DECODE, time.perf_counter_ns() - start)
+        if probe_data is None or not probe_data.valid:
+            instrumentation.invalid += 1
+            if self.tracer.enabled:
+                self._trace_invalid(service_info)
+            self._record_packet(None, start)
+            return
+
+        if self.connections is not None:
+            self.connections.discovered(service_info, probe_data)
+        self._handle_probe_data(probe_data, service_info.time, service_info.source)
+        self._record_packet(probe_data.serial_number, start)
+
+    @callback
+    def async_handle_status(self, payload: bytes, address: str, rssi: int) -> None:
+        """Handle the status of a probe notified over a GATT connection, like an advertisement of the same reading."""
         if self.hass.is_stopping:
-            _LOGGER.debug("Discarding advertisement; HASS is stopping")
             return
 
-        probe_data = CombustionProbeData.from_advertisement(service_info)
-        if not probe_data.valid:
-            _LOGGER.debug("Discarding invalid advertisement from [%s]", service_info.address)
+        advertising_data = self.decode_cache.decode(payload)
+        if advertising_data is None:
             return
+        probe_data = DecodedProbeData(advertising_data, rssi, address)
+        if probe_data.valid:
+            self._handle_probe_data(probe_data, monotonic_time_coarse(), GATT_SOURCE)
 
+    def _record_packet(self, serial_number: str | None, start: int) -> None:
+        """Record the time spent handling an advertisement since `start` (`time.perf_counter_ns()`)."""
+        elapsed = time.perf_counter_ns() - start
+        if self.instrumentation.enabled:
+            self.instrumentation.record(STAGE_BT_CALLBACK, elapsed)
+        self.scanning.record_packet(serial_number, elapsed / 1e9)
+
+    def _handle_probe_data(self, probe_data: DecodedProbeData, now: float, source: str):
+        """Forward valid probe data, received at `now` (monotonic seconds) through `source`, to the listeners."""
+        serial_number = probe_data.serial_number
+        stats = self.probe_stats.get(serial_number)
+        if stats is None:
+            stats = self.probe_stats[serial_number] = ProbeStats()
+        stats.record(probe_data, now)
+
+        tracer = self.tracer
+        # Every scanner delivers its own copy of an advertisement, only the preferred scanner of the probe is followed.
+        if source != GATT_SOURCE and not self.source_arbiter.accept(probe_data, source, now):
+            self.instrumentation.secondary_sources += 1
+            if tracer.enabled:
+                self._trace(probe_data, source, "secondary_source")
+            return
+
+        if not self.duplicate_filter.accept(probe_data, now):
+            self.instrumentation.duplicates += 1
+            if tracer.enabled:
+                self._trace(probe_data, source, "duplicate")
+            return
+
+        # Instant reads only carry the tip temperature, so they are kept apart from normal readings.
         if probe_data.mode == ProbeMode.instantRead:
-            _LOGGER.debug("Discarding instant_read data from [%s]", service_info.address)
+            self.instrumentation.instant_reads += 1
+            if tracer.enabled:
+                self._trace(probe_data, source, "instant_read")
+            for listener in self._instant_read_listeners:
+                listener(probe_data)
             return
 
+        if tracer.enabled:
+            self._trace(probe_data, source, "forwarded")
+
         for listener in self._listeners:
             listener(probe_data)
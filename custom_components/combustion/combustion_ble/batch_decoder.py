@@ -0,0 +1,240 @@
+"""Decode many Combustion advertisements at once.
+
+Replays, backfills and benchmarks handle thousands of payloads at a time. `decode_batch` decodes a
+contiguous buffer of fixed-length manufacturer data payloads with NumPy vector operations, and falls
+back to the table-driven decoder, one payload at a time, when NumPy is not installed. Both produce
+the same values as `DecodedAdvertisement.from_payload`, and therefore `AdvertisingData.from_data`.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+from .decoder import (
+    _BATTERY_STATUS_VIRTUAL_SENSORS_OFFSET,
+    _MODE_ID_OFFSET,
+    _NETWORK_INFO_OFFSET,
+    _SERIAL_NUMBER_SLICE,
+    _TEMPERATURE_BITS,
+    _TEMPERATURE_MASK,
+    _TEMPERATURES_SLICE,
+    _TYPE_OFFSET,
+    BATTERY_STATUS_VIRTUAL_SENSORS_TABLE,
+    HOP_COUNT_TABLE,
+    MIN_PAYLOAD_LENGTH,
+    MODE_ID_TABLE,
+    PRODUCT_TYPE_TABLE,
+    DecodedAdvertisement,
+    decode_temperatures,
+)
+from .hop_count import HopCount
+from .mode_id import ProbeMode
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy ships with Home Assistant, but is not a requirement of the integration.
+    np = None
+
+# Length of the manufacturer data of probes and MeatNet nodes, without the vendor id prefix.
+PAYLOAD_LENGTH = 22
+
+# Fields of each decoded payload, in the order of the rows of a batch.
+FIELDS = (
+    'type',
+    'serial_number',
+    'temperatures',
+    'probe_id',
+    'mode',
+    'battery_ok',
+    'core_index',
+    'surface_index',
+    'ambient_index',
+    'hop_count',
+)
+
+if np is not None:
+    BATCH_DTYPE = np.dtype(
+        [
+            ('type', np.uint8),
+            ('serial_number', '<u4'),
+            ('temperatures', np.float64, (8,)),
+            ('probe_id', np.uint8),
+            ('mode', np.uint8),
+            ('battery_ok', np.bool_),
+            ('core_index', np.uint8),
+            ('surface_index', np.uint8),
+            ('ambient_index', np.uint8),
+            ('hop_count', np.uint8),
+        ]
+    )
+
+    # The 256-entry tables of the scalar decoder, as arrays indexed by the raw byte.
+    _VALID_TYPES = np.array([product_type is not None for product_type in PRODUCT_TYPE_TABLE])
+    _PROBE_ID = np.array([probe_id for (probe_id, _) in MODE_ID_TABLE], dtype=np.uint8)
+    _MODE = np.array([mode.value for (_, mode) in MODE_ID_TABLE], dtype=np.uint8)
+    _BATTERY_STATUS_VIRTUAL_SENSORS = np.array(BATTERY_STATUS_VIRTUAL_SENSORS_TABLE, dtype=np.uint8)
+    _HOP_COUNT = np.array([hop_count.value for hop_count in HOP_COUNT_TABLE], dtype=np.uint8)
+
+    # Each 13-bit temperature spans at most 3 bytes of the little-endian temperature block. The block
+    # is padded with a zero byte, so the 3 bytes of the last temperature are within the row.
+    _TEMPERATURE_OFFSETS = np.array(
+        [bit // 8 for bit in range(0, 8 * _TEMPERATURE_BITS, _TEMPERATURE_BITS)], dtype=np.intp
+    )
+    _TEMPERATURE_SHIFTS = np.array(
+        [bit % 8 for bit in range(0, 8 * _TEMPERATURE_BITS, _TEMPERATURE_BITS)], dtype=np.uint32
+    )
+
+
+class DecodedBatch:
+    """Decoded payloads of a batch.
+
+    With NumPy, `rows` is a structured array of `BATCH_DTYPE`, and `column` returns views of it.
+    Without NumPy, `rows` is a list of tuples ordered like `FIELDS`, and `column` returns lists.
+    Enumerated values (type, mode, hop count) are stored as their raw value, and indexing the batch
+    returns the `DecodedAdvertisement` of a payload.
+    """
+
+    __slots__ = ('buffer', 'payload_length', 'rows')
+
+    def __init__(self, buffer: bytes, payload_length: int, rows: Any) -> None:
+        """Initialize."""
+        self.buffer = buffer
+        self.payload_length = payload_length
+        self.rows = rows
+
+    def __len__(self) -> int:
+        """Return the number of payloads."""
+        return len(self.rows)
+
+    def __getitem__(self, index: int) -> DecodedAdvertisement:
+        """Return the decoded advertisement of a payload."""
+        row = self.rows[index]
+        if np is not None and isinstance(row, np.void):
+            row = (
+                int(row['type']),
+                int(row['serial_number']),
+                row['temperatures'].tolist(),
+                int(row['probe_id']),
+                int(row['mode']),
+                bool(row['battery_ok']),
+                int(row['core_index']),
+                int(row['surface_index']),
+                int(row['ambient_index']),
+                int(row['hop_count']),
+            )
+        (type_value, serial_number, temperatures, probe_id, mode, battery_ok, core_index, surface_index, ambient_index, hop_count) = row
+        start = (index % len(self.rows)) * self.payload_length
+        return DecodedAdvertisement(
+            PRODUCT_TYPE_TABLE[type_value],
+            serial_number,
+            tuple(temperatures),
+            probe_id,
+            ProbeMode(mode),
+            battery_ok,
+            core_index,
+            surface_index,
+            ambient_index,
+            HopCount(hop_count),
+            bytes(self.buffer[start:start + self.payload_length]),
+        )
+
+    def column(self, field: str) -> Any:
+        """Values of a field for every payload."""
+        if np is not None and isinstance(self.rows, np.ndarray):
+            return self.rows[field]
+        index = FIELDS.index(field)
+        return [row[index] for row in self.rows]
+
+
+def _validate(buffer: bytes, payload_length: int) -> int:
+    if payload_length < MIN_PAYLOAD_LENGTH:
+        raise ValueError(f"Payloads of {payload_length} bytes do not contain the temperature block")
+    (count, remainder) = divmod(len(buffer), payload_length)
+    if remainder:
+        raise ValueError(f"Buffer of {len(buffer)} bytes is not a whole number of {payload_length} byte payloads")
+    return count
+
+
+def _decode_rows_numpy(buffer: bytes, payload_length: int, count: int) -> Any:
+    payloads = np.frombuffer(buffer, dtype=np.uint8, count=count * payload_length).reshape(count, payload_length)
+
+    types = payloads[:, _TYPE_OFFSET]
+    invalid = np.flatnonzero(~_VALID_TYPES[types])
+    if invalid.size:
+        raise ValueError(f"{types[invalid[0]]} is not a valid CombustionProductType (payload {invalid[0]})")
+
+    rows = np.empty(count, dtype=BATCH_DTYPE)
+    rows['type'] = types
+    rows['serial_number'] = (
+        np.ascontiguousarray(payloads[:, _SERIAL_NUMBER_SLICE]).view('<u4').reshape(count)
+    )
+
+    blocks = np.zeros((count, _TEMPERATURES_SLICE.stop - _TEMPERATURES_SLICE.start + 1), dtype=np.uint32)
+    blocks[:, :-1] = payloads[:, _TEMPERATURES_SLICE]
+    raw = (
+        blocks[:, _TEMPERATURE_OFFSETS]
+        | blocks[:, _TEMPERATURE_OFFSETS + 1] << 8
+        | blocks[:, _TEMPERATURE_OFFSETS + 2] << 16
+    ) >> _TEMPERATURE_SHIFTS & _TEMPERATURE_MASK
+    # Same operations, in the same order and precision, as `decode_temperatures`.
+    rows['temperatures'] = raw.astype(np.float64) * 0.05 - 20.0
+
+    mode_ids = payloads[:, _MODE_ID_OFFSET] if payload_length > _MODE_ID_OFFSET else 0
+    rows['probe_id'] = _PROBE_ID[mode_ids]
+    rows['mode'] = _MODE[mode_ids]
+
+    battery_status_virtual_sensors = _BATTERY_STATUS_VIRTUAL_SENSORS[
+        payloads[:, _BATTERY_STATUS_VIRTUAL_SENSORS_OFFSET] if payload_length > _BATTERY_STATUS_VIRTUAL_SENSORS_OFFSET else 0
+    ]
+    rows['battery_ok'] = battery_status_virtual_sensors[..., 0]
+    rows['core_index'] = battery_status_virtual_sensors[..., 1]
+    rows['surface_index'] = battery_status_virtual_sensors[..., 2]
+    rows['ambient_index'] = battery_status_virtual_sensors[..., 3]
+
+    rows['hop_count'] = _HOP_COUNT[payloads[:, _NETWORK_INFO_OFFSET] if payload_length > _NETWORK_INFO_OFFSET else 0]
+    return rows
+
+
+def _decode_rows_python(buffer: bytes, payload_length: int, count: int) -> list[tuple]:
+    rows = []
+    view = memoryview(buffer)
+    for start in range(0, count * payload_length, payload_length):
+        payload = view[start:start + payload_length]
+        type_byte = payload[_TYPE_OFFSET]
+        if PRODUCT_TYPE_TABLE[type_byte] is None:
+            raise ValueError(f"{type_byte} is not a valid CombustionProductType (payload {start // payload_length})")
+        (probe_id, mode) = MODE_ID_TABLE[payload[_MODE_ID_OFFSET] if payload_length > _MODE_ID_OFFSET else 0]
+        (battery_ok, core_index, surface_index, ambient_index) = BATTERY_STATUS_VIRTUAL_SENSORS_TABLE[
+            payload[_BATTERY_STATUS_VIRTUAL_SENSORS_OFFSET] if payload_length > _BATTERY_STATUS_VIRTUAL_SENSORS_OFFSET else 0
+        ]
+        hop_count = HOP_COUNT_TABLE[payload[_NETWORK_INFO_OFFSET] if payload_length > _NETWORK_INFO_OFFSET else 0]
+        rows.append(
+            (
+                type_byte,
+                int.from_bytes(payload[_SERIAL_NUMBER_SLICE], 'little'),
+                decode_temperatures(payload[_TEMPERATURES_SLICE]),
+                probe_id,
+                mode.value,
+                battery_ok,
+                core_index,
+                surface_index,
+                ambient_index,
+                hop_count.value,
+            )
+        )
+    return rows
+
+
+def decode_batch(buffer: bytes | bytearray | memoryview, payload_length: int = PAYLOAD_LENGTH) -> DecodedBatch:
+    """Decode a contiguous buffer of manufacturer data payloads, each `payload_length` bytes long.
+
+    Payloads are without the vendor id prefix, like `DecodedAdvertisement.from_payload`. Raises
+    `ValueError` when the buffer is not a whole number of payloads, or when a payload has an
+    unknown product type.
+    """
+    buffer = bytes(buffer)
+    count = _validate(buffer, payload_length)
+    if np is not None:
+        rows = _decode_rows_numpy(buffer, payload_length, count)
+    else:
+        rows = _decode_rows_python(buffer, payload_length, count)
+    return DecodedBatch(buffer, payload_length, rows)
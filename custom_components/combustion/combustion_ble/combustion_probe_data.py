@@ -1,6 +1,8 @@
 """Parser for Combustion BLE advertisements."""
 from __future__ import annotations
 
+import logging
+
 from home_assistant_bluetooth import BluetoothServiceInfoBleak
 from sensor_state_data import description
 
@@ -139,7 +141,8 @@ class CombustionProbeData:
     @staticmethod
     def from_advertisement(service_info: BluetoothServiceInfoBleak):
         """Create instance from BT advertisement data."""
-        LOGGER.debug("Parsing combustion BLE advertisement data: %s", service_info.as_dict())
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug("Parsing combustion BLE advertisement data: %s", service_info.as_dict())
 
         vendor_id = 0x09C7.to_bytes(2, 'big')
         data = vendor_id + service_info.manufacturer_data[BT_MANUFACTURER_ID]
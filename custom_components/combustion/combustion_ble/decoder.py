@@ -0,0 +1,338 @@
+"""Table-driven decoder for Combustion BLE advertisements.
+
+Produces the same values as `AdvertisingData.from_data` + `CombustionProbeData`, without
+constructing enums per packet: the mode, battery and network bytes are resolved through
+precomputed 256-entry tables, and the 13-byte temperature block is unpacked from a single integer.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from functools import lru_cache
+from typing import NamedTuple
+
+from home_assistant_bluetooth import BluetoothServiceInfoBleak
+
+from custom_components.combustion.const import BT_MANUFACTURER_ID, LOGGER
+
+from .advertising_data import CombustionProductType
+from .battery_status_virtual_sensors import BatteryStatus, BatteryStatusVirtualSensors
+from .combustion_probe_data import INVALID_PROBE_SERIAL_NUMBER
+from .hop_count import HopCount
+from .mode_id import ModeId, ProbeMode
+
+VENDOR_ID = 0x09C7
+VENDOR_ID_BYTES = VENDOR_ID.to_bytes(2, 'big')
+
+# Offsets within the manufacturer data (i.e. the advertisement without the vendor id prefix).
+_TYPE_OFFSET = 0
+_SERIAL_NUMBER_SLICE = slice(1, 5)
+_TEMPERATURES_SLICE = slice(5, 18)
+_MODE_ID_OFFSET = 18
+_BATTERY_STATUS_VIRTUAL_SENSORS_OFFSET = 19
+_NETWORK_INFO_OFFSET = 20
+
+# Shortest manufacturer data which still contains the temperature block.
+MIN_PAYLOAD_LENGTH = _TEMPERATURES_SLICE.stop
+
+_TEMPERATURE_BITS = 13
+_TEMPERATURE_MASK = (1 << _TEMPERATURE_BITS) - 1
+_TEMPERATURE_SHIFTS = tuple(range(0, 8 * _TEMPERATURE_BITS, _TEMPERATURE_BITS))
+
+# Decoded payloads kept by `DecodeCache`. Each entry holds well under 1 KB.
+DEFAULT_DECODE_CACHE_SIZE = 256
+
+# Index table used to translate virtual sensors into thermistor indexes with their own lookup logic.
+_THERMISTOR_INDEXES = tuple(range(8))
+
+
+def _product_type_entry(byte: int) -> CombustionProductType | None:
+    try:
+        return CombustionProductType(byte)
+    except ValueError:
+        return None
+
+
+def _mode_id_entry(byte: int) -> tuple[int, ProbeMode]:
+    mode_id = ModeId.from_byte(byte)
+    return (mode_id.id.value + 1, mode_id.mode)
+
+
+def _battery_status_virtual_sensors_entry(byte: int) -> tuple[bool, int, int, int]:
+    status = BatteryStatusVirtualSensors.from_byte(byte)
+    virtual_sensors = status.virtual_sensors
+    return (
+        status.battery_status == BatteryStatus.OK,
+        virtual_sensors.virtual_core.temperature_from(_THERMISTOR_INDEXES),
+        virtual_sensors.virtual_surface.temperature_from(_THERMISTOR_INDEXES),
+        virtual_sensors.virtual_ambient.temperature_from(_THERMISTOR_INDEXES),
+    )
+
+
+PRODUCT_TYPE_TABLE = tuple(_product_type_entry(byte) for byte in range(256))
+# (probe id, mode)
+MODE_ID_TABLE = tuple(_mode_id_entry(byte) for byte in range(256))
+# (battery ok, core index, surface index, ambient index)
+BATTERY_STATUS_VIRTUAL_SENSORS_TABLE = tuple(_battery_status_virtual_sensors_entry(byte) for byte in range(256))
+HOP_COUNT_TABLE = tuple(HopCount.from_network_info_byte(byte) for byte in range(256))
+
+
+@lru_cache(maxsize=DEFAULT_DECODE_CACHE_SIZE)
+def _bit_string(payload: bytes) -> str:
+    from bitstring import Bits
+
+    return Bits(VENDOR_ID_BYTES + payload).bin
+
+
+def decode_temperatures(block: bytes) -> tuple[float, ...]:
+    """Decode the 13-byte temperature block, ordered by thermistor (T1 first)."""
+    raw = int.from_bytes(block, 'little')
+    return tuple(float((raw >> shift) & _TEMPERATURE_MASK) * 0.05 - 20.0 for shift in _TEMPERATURE_SHIFTS)
+
+
+class DecodedAdvertisement(NamedTuple):
+    """Decoded Combustion manufacturer data."""
+
+    type: CombustionProductType
+    serial_number: int
+    temperatures: tuple[float, ...]
+    probe_id: int
+    mode: ProbeMode
+    battery_ok: bool
+    core_index: int
+    surface_index: int
+    ambient_index: int
+    hop_count: HopCount
+    payload: bytes
+
+    @property
+    def reading_key(self) -> bytes:
+        """Serial number, temperatures, mode and battery bytes.
+
+        Identical for every copy of a reading, whether it was sent by the probe or relayed by a repeater.
+        """
+        return self.payload[_SERIAL_NUMBER_SLICE.start:_NETWORK_INFO_OFFSET]
+
+    @property
+    def bit_string(self) -> str:
+        """Binary representation of the full advertisement, including the vendor id.
+
+        Only built on request (diagnostics), and cached per payload.
+        """
+        return _bit_string(self.payload)
+
+    @staticmethod
+    def from_payload(payload: bytes) -> DecodedAdvertisement | None:
+        """Decode manufacturer data (the advertisement without its vendor id prefix)."""
+        length = len(payload)
+        if length < MIN_PAYLOAD_LENGTH:
+            LOGGER.warning('Not decoding advertising data because [%s] < %s', length, MIN_PAYLOAD_LENGTH)
+            return None
+
+        type_byte = payload[_TYPE_OFFSET]
+        product_type = PRODUCT_TYPE_TABLE[type_byte]
+        if product_type is None:
+            raise ValueError(f"{type_byte} is not a valid {CombustionProductType.__name__}")
+
+        (probe_id, mode) = MODE_ID_TABLE[payload[_MODE_ID_OFFSET] if length > _MODE_ID_OFFSET else 0]
+        (battery_ok, core_index, surface_index, ambient_index) = BATTERY_STATUS_VIRTUAL_SENSORS_TABLE[
+            payload[_BATTERY_STATUS_VIRTUAL_SENSORS_OFFSET] if length > _BATTERY_STATUS_VIRTUAL_SENSORS_OFFSET else 0
+        ]
+        hop_count = HOP_COUNT_TABLE[payload[_NETWORK_INFO_OFFSET] if length > _NETWORK_INFO_OFFSET else 0]
+
+        return DecodedAdvertisement(
+            product_type,
+            int.from_bytes(payload[_SERIAL_NUMBER_SLICE], 'little'),
+            decode_temperatures(payload[_TEMPERATURES_SLICE]),
+            probe_id,
+            mode,
+            battery_ok,
+            core_index,
+            surface_index,
+            ambient_index,
+            hop_count,
+            payload,
+        )
+
+    @staticmethod
+    def from_data(data: bytes) -> DecodedAdvertisement | None:
+        """Decode a full advertisement, including the vendor id prefix."""
+        if data is None or len(data) < MIN_PAYLOAD_LENGTH + 2:
+            return None
+        if data[0:2] != VENDOR_ID_BYTES:
+            LOGGER.warning("Not decoding advertising data because [%s] != 0x09C7", int.from_bytes(data[0:2], 'big'))
+            return None
+        return DecodedAdvertisement.from_payload(bytes(data[2:]))
+
+
+class DecodeCache:
+    """Bounded LRU of decoded advertisements, keyed by the raw manufacturer data.
+
+    Probes repeat the same payload several times per second, and repeaters relay it again.
+    Payloads seen before are returned from the cache instead of being decoded again.
+    Cached values are immutable, as they are shared by every consumer of the payload.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_DECODE_CACHE_SIZE) -> None:
+        """Initialize."""
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[bytes, DecodedAdvertisement | None] = OrderedDict()
+
+    def decode(self, payload: bytes) -> DecodedAdvertisement | None:
+        """Decode manufacturer data, reusing the previous result for identical payloads."""
+        entries = self._entries
+        try:
+            advertising_data = entries[payload]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            entries.move_to_end(payload)
+            return advertising_data
+
+        self.misses += 1
+        advertising_data = DecodedAdvertisement.from_payload(payload)
+        entries[payload] = advertising_data
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+        return advertising_data
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        self._entries.clear()
+
+    def as_dict(self) -> dict[str, int]:
+        """Cache statistics."""
+        return {
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+class DecodedProbeData:
+    """Data for Combustion Probes, backed by a `DecodedAdvertisement`.
+
+    Exposes the same public fields as `CombustionProbeData`.
+    """
+
+    __slots__ = ('advertising_data', '_rssi', '_address')
+
+    def __init__(self, advertising_data: DecodedAdvertisement, rssi: int, address: str) -> None:
+        """Initialize."""
+        self.advertising_data = advertising_data
+        self._rssi = rssi
+        self._address = address
+
+    @property
+    def valid(self) -> bool:
+        """Determine if the probe data is valid.
+
+        Probe data from a Meatnet repeater will sometimes arrive with an invalid serial number.
+        This indicates the repeater is not connected to an actual probe.
+        """
+        return self.advertising_data.serial_number != INVALID_PROBE_SERIAL_NUMBER
+
+    @property
+    def address(self) -> str:
+        """The address of the device which sent the advertising payload.
+
+        IMPORTANT: This might not be the actual probe where the measurement happened. The address might be from a Meatnet repeater.
+        """
+        return self._address
+
+    @property
+    def device_type(self) -> str:
+        """Type of device which sent the advertising payload.
+
+        IMPORTANT: This might not be the actual probe where the measurement happened. The type might be from a Meatnet repeater.
+        """
+        return self.advertising_data.type.name
+
+    @property
+    def rssi(self) -> int:
+        """Signal strength."""
+        return self._rssi
+
+    @property
+    def serial_number(self) -> str | None:
+        """Serial number of the predictive probe."""
+        if self.advertising_data.serial_number == INVALID_PROBE_SERIAL_NUMBER:
+            return None
+        return hex(self.advertising_data.serial_number)[2:]
+
+    @property
+    def probe_id(self) -> int:
+        """Probe ID from the Meatnet."""
+        return self.advertising_data.probe_id
+
+    @property
+    def mode(self) -> ProbeMode:
+        """Probe Mode (instant, normal, etc.)."""
+        return self.advertising_data.mode
+
+    @property
+    def battery_ok(self) -> bool:
+        """Battery state."""
+        return self.advertising_data.battery_ok
+
+    @property
+    def hop_count(self) -> HopCount:
+        """Number of Meatnet hops this payload travelled."""
+        return self.advertising_data.hop_count
+
+    @property
+    def temperature_data(self) -> tuple[float, ...]:
+        """Temperature data, ordered by thermistor.
+
+        First entry is the tip, last entry is the handle.
+        """
+        return self.advertising_data.temperatures
+
+    @property
+    def core_sensor(self) -> tuple[int, float]:
+        """Core sensor tuple (probe id, temperature)."""
+        index = self.advertising_data.core_index
+        return (index + 1, self.advertising_data.temperatures[index])
+
+    @property
+    def ambient_sensor(self) -> tuple[int, float]:
+        """Ambient sensor tuple (probe id, temperature)."""
+        index = self.advertising_data.ambient_index
+        return (index + 1, self.advertising_data.temperatures[index])
+
+    @property
+    def surface_sensor(self) -> tuple[int, float]:
+        """Surface sensor tuple (probe id, temperature)."""
+        index = self.advertising_data.surface_index
+        return (index + 1, self.advertising_data.temperatures[index])
+
+    def to_dict(self) -> dict:
+        """Convert DecodedProbeData instance to a dictionary."""
+        return {
+            'valid': self.valid,
+            'address': self.address,
+            'rssi': self.rssi,
+            'serial_number': self.serial_number,
+            'probe_id': self.probe_id,
+            'mode': self.mode,
+            'battery_ok': self.battery_ok,
+            'temperature_data': list(self.temperature_data),
+            'core_sensor': self.core_sensor,
+            'ambient_sensor': self.ambient_sensor,
+            'surface_sensor': self.surface_sensor
+        }
+
+    @staticmethod
+    def from_advertisement(service_info: BluetoothServiceInfoBleak, cache: DecodeCache | None = None) -> DecodedProbeData | None:
+        """Create instance from BT advertisement data."""
+        payload = service_info.manufacturer_data[BT_MANUFACTURER_ID]
+        advertising_data = cache.decode(payload) if cache is not None else DecodedAdvertisement.from_payload(payload)
+        if advertising_data is None:
+            return None
+        return DecodedProbeData(advertising_data, service_info.rssi, service_info.address)
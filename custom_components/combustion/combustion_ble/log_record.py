@@ -0,0 +1,69 @@
+"""Records of the temperature log kept on board the probe."""
+from __future__ import annotations
+
+from typing import NamedTuple
+
+from .battery_status_virtual_sensors import VirtualSensors
+from .decoder import decode_temperatures
+
+_SEQUENCE_NUMBER_SLICE = slice(0, 4)
+# Same bit layout as the temperature block of the advertisement (`ProbeTemperatures`).
+_TEMPERATURES_SLICE = slice(4, 17)
+# First byte of the prediction log, whose lower 7 bits select the virtual sensors.
+_VIRTUAL_SENSORS_OFFSET = 17
+
+MIN_LOG_RECORD_LENGTH = _TEMPERATURES_SLICE.stop
+
+
+def _virtual_sensors_entry(byte: int) -> tuple[int, int, int]:
+    virtual_sensors = VirtualSensors.from_byte(byte)
+    return (
+        int(virtual_sensors.virtual_core.value),
+        int(virtual_sensors.virtual_surface.value) + 3,
+        int(virtual_sensors.virtual_ambient.value) + 4,
+    )
+
+
+# (core index, surface index, ambient index)
+VIRTUAL_SENSORS_TABLE = tuple(_virtual_sensors_entry(byte) for byte in range(128))
+
+
+class LogRecord(NamedTuple):
+    """Temperatures logged by the probe, identified by a sequence number."""
+
+    sequence_number: int
+    temperatures: tuple[float, ...]
+    core_index: int
+    surface_index: int
+    ambient_index: int
+
+    @property
+    def core(self) -> float:
+        """Core temperature."""
+        return self.temperatures[self.core_index]
+
+    @property
+    def surface(self) -> float:
+        """Surface temperature."""
+        return self.temperatures[self.surface_index]
+
+    @property
+    def ambient(self) -> float:
+        """Ambient temperature."""
+        return self.temperatures[self.ambient_index]
+
+    @staticmethod
+    def from_payload(payload: bytes) -> LogRecord | None:
+        """Decode the payload of a Read Logs response."""
+        if len(payload) < MIN_LOG_RECORD_LENGTH:
+            return None
+        (core_index, surface_index, ambient_index) = VIRTUAL_SENSORS_TABLE[
+            payload[_VIRTUAL_SENSORS_OFFSET] & 0x7F if len(payload) > _VIRTUAL_SENSORS_OFFSET else 0
+        ]
+        return LogRecord(
+            int.from_bytes(payload[_SEQUENCE_NUMBER_SLICE], 'little'),
+            decode_temperatures(payload[_TEMPERATURES_SLICE]),
+            core_index,
+            surface_index,
+            ambient_index,
+        )
@@ -0,0 +1,94 @@
+"""Messages exchanged over the UART service of probes and MeatNet nodes."""
+from __future__ import annotations
+
+from binascii import crc_hqx
+from typing import NamedTuple
+
+# RX (written by the client) and TX (notified by the device) characteristics of the UART service.
+UART_RX_CHARACTERISTIC_UUID = '6e400002-b5a3-f393-e0a9-e50e24dcca9e'
+UART_TX_CHARACTERISTIC_UUID = '6e400003-b5a3-f393-e0a9-e50e24dcca9e'
+
+# Messages start with sync bytes, a CRC-16 (CCITT) of the rest of the message, and the message type.
+UART_SYNC = b'\xca\xfe'
+_CRC_SLICE = slice(2, 4)
+_MESSAGE_TYPE_OFFSET = 4
+RESPONSE_FLAG = 0x80
+_CRC_INITIAL = 0xFFFF
+
+# Bytes kept while waiting for the rest of a message. Messages are well under this size.
+MAX_UART_BUFFER = 1024
+
+# Message types
+MESSAGE_SESSION_INFO = 0x03
+MESSAGE_READ_LOGS = 0x04
+MESSAGE_PROBE_STATUS = 0x45
+
+
+class HeaderLengths(NamedTuple):
+    """Length of the request and response headers, ending with the payload length byte."""
+
+    request: int
+    response: int
+
+
+# Probes: type and payload length, or type, success flag and payload length.
+PROBE_HEADER_LENGTHS = HeaderLengths(6, 7)
+# MeatNet nodes: type, request id and payload length, or type, request id, response id, success flag and payload length.
+NODE_HEADER_LENGTHS = HeaderLengths(10, 15)
+
+
+def encode_probe_request(message_type: int, payload: bytes = b'') -> bytes:
+    """Encode a request to a probe."""
+    body = bytes((message_type, len(payload))) + payload
+    return UART_SYNC + crc_hqx(body, _CRC_INITIAL).to_bytes(2, 'little') + body
+
+
+class UartMessageReader:
+    """Split the UART stream of a probe or MeatNet node into messages.
+
+    A notification may carry part of a message, or several messages. Bytes are buffered until a whole
+    message is received, and messages with a wrong CRC are dropped.
+    """
+
+    def __init__(self, header_lengths: HeaderLengths) -> None:
+        """Initialize."""
+        self.header_lengths = header_lengths
+        self.crc_errors = 0
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> list[tuple[int, bytes]]:
+        """Add received bytes, and return the (message type, payload) of every message completed."""
+        buffer = self._buffer
+        buffer += data
+        messages = []
+        while True:
+            start = buffer.find(UART_SYNC)
+            if start < 0:
+                # Keep a trailing first sync byte, in case the second one is in the next notification.
+                del buffer[:-1]
+                if buffer and buffer[0] != UART_SYNC[0]:
+                    buffer.clear()
+                break
+            del buffer[:start]
+
+            if len(buffer) <= _MESSAGE_TYPE_OFFSET:
+                break
+            message_type = buffer[_MESSAGE_TYPE_OFFSET]
+            header_length = self.header_lengths.response if message_type & RESPONSE_FLAG else self.header_lengths.request
+            if len(buffer) < header_length:
+                break
+            length = header_length + buffer[header_length - 1]
+            if len(buffer) < length:
+                break
+
+            if crc_hqx(bytes(buffer[_MESSAGE_TYPE_OFFSET:length]), _CRC_INITIAL) != int.from_bytes(buffer[_CRC_SLICE], 'little'):
+                self.crc_errors += 1
+                # Look for the next message after these sync bytes.
+                del buffer[:len(UART_SYNC)]
+                continue
+            messages.append((message_type, bytes(buffer[header_length:length])))
+            del buffer[:length]
+
+        if len(buffer) > MAX_UART_BUFFER:
+            buffer.clear()
+        return messages
@@ -1,17 +1,47 @@
 """Adds config flow for Combustion."""
 from __future__ import annotations
 
+import logging
 from typing import Any
 
+import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.components.bluetooth import BluetoothServiceInfoBleak
-
-from custom_components.combustion.combustion_ble.combustion_probe_data import (
-    CombustionProbeData,
+from homeassistant.core import callback
+
+from custom_components.combustion.combustion_ble.decoder import DecodedProbeData
+
+from .const import (
+    CONF_AVAILABILITY_TIMEOUT,
+    CONF_BACKFILL,
+    CONF_CONNECTED_PROBES,
+    CONF_CONNECTION_MODE,
+    CONF_DEVICES,
+    CONF_FLUSH_INTERVAL,
+    CONF_LATENCY_HISTOGRAMS,
+    CONF_RAW_ADVERTISEMENT_ATTRIBUTE,
+    CONF_RSSI_DEADBAND,
+    CONF_RSSI_INTERVAL,
+    CONF_SCANNING_MODE,
+    CONF_STATISTICS_MODE,
+    CONF_TEMPERATURE_DEADBAND,
+    CONF_THERMISTOR_INTERVAL,
+    CONF_VIRTUAL_SENSOR_INTERVAL,
+    CONNECTION_MODES,
+    DEFAULT_AVAILABILITY_TIMEOUT,
+    DEFAULT_CONNECTION_MODE,
+    DEFAULT_FLUSH_INTERVAL,
+    DEFAULT_RSSI_DEADBAND,
+    DEFAULT_RSSI_INTERVAL,
+    DEFAULT_SCANNING_MODE,
+    DEFAULT_TEMPERATURE_DEADBAND,
+    DEFAULT_THERMISTOR_INTERVAL,
+    DEFAULT_VIRTUAL_SENSOR_INTERVAL,
+    DOMAIN,
+    LOGGER,
+    SCANNING_MODES,
 )
 
-from .const import CONF_DEVICES, DOMAIN, LOGGER
-
 
 def format_unique_id(address: str) -> str:
     """Format the unique ID for a device."""
@@ -23,30 +53,40 @@ class CombustionFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
     def __init__(self) -> None:
         """Initialize the config flow."""
-        self._discovered_adv: CombustionProbeData | None = None
-        self._all_discovered_devices: dict[str, CombustionProbeData] = {}
+        self._discovered_adv: DecodedProbeData | None = None
+        self._all_discovered_devices: dict[str, DecodedProbeData] = {}
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> CombustionOptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return CombustionOptionsFlowHandler(config_entry)
 
     async def async_step_bluetooth(self, discovery_info: BluetoothServiceInfoBleak) -> config_entries.FlowResult:
         """Bluetooth discovery step."""
-        LOGGER.debug("async step bluetooth for device %s", str(discovery_info.as_dict()))
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug("async step bluetooth for device %s", discovery_info.as_dict())
 
         # For now, only a single "meatnet" is supported. This prevents each device from showing as an independent integration.
         # Instead we ask to configure once, and create devices for each of the entities on the meatnet.
         await self.async_set_unique_id("combustion_meatnet")
         self._abort_if_unique_id_configured()
 
-        data = CombustionProbeData.from_advertisement(discovery_info)
-        if not data.valid:
+        data = DecodedProbeData.from_advertisement(discovery_info)
+        if data is None or not data.valid:
             return self.async_abort(reason="not_supported")
 
         self._all_discovered_devices[discovery_info.address] = data
 
+        # Entries created by this flow carry the Meatnet unique id and abort above, so devices are only
+        # added to an entry created without it.
         entries = self._async_current_entries()
         if entries:
             LOGGER.debug("Discovered new device, but we already have an entry created.")
             assert len(entries) == 1
-            assert self._add_device_to_entry(entries[0], discovery_info.address, data)
-            return self.async_abort(reason="updated_entry")
+            if self._add_device_to_entry(entries[0], discovery_info.address, data):
+                return self.async_abort(reason="updated_entry")
+            return self.async_abort(reason="already_configured")
 
         # # For now, only a single "meatnet" is supported. This prevents each device from showing as an independent integration.
         # # Instead we ask to configure once, and create devices for each of the entities on the meatnet.
@@ -101,17 +141,97 @@ class CombustionFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             },
         )
 
-    def _add_device_to_entry(self, entry: config_entries.ConfigEntry, address: str, device: CombustionProbeData) -> bool:
-        """Add a Combustion device to an existing entry."""
-        LOGGER.debug("Adding device to existing entry")
-        devices = entry.data.get(CONF_DEVICES, []).copy()
-        devices.append({
-            "name": "Combustion meatnet",
-            "address": address,
-            "product_type": 2 # hardcode meatnet probe
-        })
+    def _add_device_to_entry(self, entry: config_entries.ConfigEntry, address: str, device: DecodedProbeData) -> bool:
+        """Add a Combustion device to an existing entry.
+
+        Devices are keyed by address, so rediscovering a known device leaves the entry untouched.
+        Returns True if the entry was updated.
+        """
+        devices = entry.data.get(CONF_DEVICES, [])
+        if any(existing.get("address") == address for existing in devices):
+            LOGGER.debug("Device [%s] is already part of the existing entry", address)
+            return False
 
+        LOGGER.debug("Adding device [%s] to existing entry", address)
         return self.hass.config_entries.async_update_entry(entry, data={
             **entry.data,
-            CONF_DEVICES: devices
+            CONF_DEVICES: [
+                *devices,
+                {
+                    "name": "Combustion meatnet",
+                    "address": address,
+                    "product_type": 2 # hardcode meatnet probe
+                },
+            ],
         })
+
+
+class CombustionOptionsFlowHandler(config_entries.OptionsFlowWithConfigEntry):
+    """Options flow for Combustion."""
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> config_entries.FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data={**self.options, **user_input})
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema({
+                vol.Optional(
+                    CONF_TEMPERATURE_DEADBAND,
+                    default=self.options.get(CONF_TEMPERATURE_DEADBAND, DEFAULT_TEMPERATURE_DEADBAND),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_RSSI_DEADBAND,
+                    default=self.options.get(CONF_RSSI_DEADBAND, DEFAULT_RSSI_DEADBAND),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_VIRTUAL_SENSOR_INTERVAL,
+                    default=self.options.get(CONF_VIRTUAL_SENSOR_INTERVAL, DEFAULT_VIRTUAL_SENSOR_INTERVAL),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_THERMISTOR_INTERVAL,
+                    default=self.options.get(CONF_THERMISTOR_INTERVAL, DEFAULT_THERMISTOR_INTERVAL),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_RSSI_INTERVAL,
+                    default=self.options.get(CONF_RSSI_INTERVAL, DEFAULT_RSSI_INTERVAL),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_FLUSH_INTERVAL,
+                    default=self.options.get(CONF_FLUSH_INTERVAL, DEFAULT_FLUSH_INTERVAL),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=5)),
+                vol.Optional(
+                    CONF_AVAILABILITY_TIMEOUT,
+                    default=self.options.get(CONF_AVAILABILITY_TIMEOUT, DEFAULT_AVAILABILITY_TIMEOUT),
+                ): vol.All(vol.Coerce(float), vol.Range(min=1)),
+                vol.Optional(
+                    CONF_SCANNING_MODE,
+                    default=self.options.get(CONF_SCANNING_MODE, DEFAULT_SCANNING_MODE),
+                ): vol.In(SCANNING_MODES),
+                vol.Optional(
+                    CONF_CONNECTION_MODE,
+                    default=self.options.get(CONF_CONNECTION_MODE, DEFAULT_CONNECTION_MODE),
+                ): vol.In(CONNECTION_MODES),
+                vol.Optional(
+                    CONF_CONNECTED_PROBES,
+                    default=self.options.get(CONF_CONNECTED_PROBES, ""),
+                ): str,
+                vol.Optional(
+                    CONF_BACKFILL,
+                    default=self.options.get(CONF_BACKFILL, True),
+                ): bool,
+                vol.Optional(
+                    CONF_STATISTICS_MODE,
+                    default=self.options.get(CONF_STATISTICS_MODE, False),
+                ): bool,
+                vol.Optional(
+                    CONF_RAW_ADVERTISEMENT_ATTRIBUTE,
+                    default=self.options.get(CONF_RAW_ADVERTISEMENT_ATTRIBUTE, False),
+                ): bool,
+                vol.Optional(
+                    CONF_LATENCY_HISTOGRAMS,
+                    default=self.options.get(CONF_LATENCY_HISTOGRAMS, False),
+                ): bool,
+            }),
+        )
@@ -0,0 +1,282 @@
+"""Hold GATT connections to probes or to a MeatNet node, and receive their status notifications."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+from bleak import BleakClient
+from bleak.exc import BleakError
+from bleak_retry_connector import BleakClientWithServiceCache, establish_connection
+from home_assistant_bluetooth import BluetoothServiceInfoBleak
+from homeassistant.components import bluetooth
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util.dt import monotonic_time_coarse
+
+from custom_components.combustion.backfill import LogBackfill
+from custom_components.combustion.combustion_ble.advertising_data import (
+    CombustionProductType,
+)
+from custom_components.combustion.combustion_ble.decoder import DecodedProbeData
+from custom_components.combustion.combustion_ble.uart import (
+    MESSAGE_PROBE_STATUS,
+    NODE_HEADER_LENGTHS,
+    UART_TX_CHARACTERISTIC_UUID,
+    UartMessageReader,
+)
+from custom_components.combustion.const import CONNECTION_MODE_NODE, LOGGER
+
+_LOGGER = LOGGER.getChild('connection')
+
+MONOTONIC_TIME = monotonic_time_coarse
+
+# Probe Status characteristic of the probe, notified about as often as the probe advertises.
+PROBE_STATUS_CHARACTERISTIC_UUID = '00000101-caab-3792-3d44-97ae51c1407a'
+
+# The Probe Status starts with the range of logged records (2 x uint32), followed by the temperature
+# block, mode/id and battery/virtual sensors bytes laid out as in the advertisement.
+_PROBE_STATUS_READING_SLICE = slice(8, 23)
+MIN_PROBE_STATUS_LENGTH = _PROBE_STATUS_READING_SLICE.stop
+
+# Connections held at once through the same adapter or proxy. Bluetooth proxies default to 3 connection slots.
+MAX_CONNECTIONS_PER_ADAPTER = 3
+
+# Seconds to wait before connecting again to a device which disconnected. Each consecutive failure to
+# connect doubles the wait, up to `BACKOFF_MAX`.
+BACKOFF_INITIAL = 5
+BACKOFF_MAX = 300
+
+StatusCallback = Callable[[bytes, str, int], None]
+
+
+def parse_serial_numbers(value: str) -> set[str]:
+    """Parse a comma-separated list of probe serial numbers."""
+    return {serial_number.strip().lower() for serial_number in value.split(',') if serial_number.strip()}
+
+
+def probe_status_payload(product_type: CombustionProductType, serial_number: int, status: bytes) -> bytes | None:
+    """Build the manufacturer data of an advertisement carrying the same reading as a Probe Status.
+
+    Copies of the reading received as advertisements are then recognized as duplicates.
+    """
+    if len(status) < MIN_PROBE_STATUS_LENGTH:
+        return None
+    return bytes((product_type.value,)) + serial_number.to_bytes(4, 'little') + bytes(status[_PROBE_STATUS_READING_SLICE]) + b'\x00'
+
+
+class _Connection:
+    """Connection to a probe or MeatNet node, from the first attempt until it disconnects."""
+
+    __slots__ = ('address', 'source', 'serial_number', 'rssi', 'client', 'reader', 'notifications')
+
+    def __init__(self, address: str, source: str, serial_number: int | None, rssi: int) -> None:
+        self.address = address
+        self.source = source
+        # Serial number of the probe, or None for a MeatNet node.
+        self.serial_number = serial_number
+        # Signal strength of the latest advertisement of the device. Notifications do not carry one.
+        self.rssi = rssi
+        self.client: BleakClient | None = None
+        self.reader: UartMessageReader | None = None
+        self.notifications = 0
+
+
+class ConnectionManager:
+    """Hold GATT connections to selected probes, or to a single MeatNet node.
+
+    Valid advertisements are offered to `discovered`, which connects to the devices matching the mode,
+    at most `MAX_CONNECTIONS_PER_ADAPTER` through each adapter or proxy. Status notifications are turned
+    into the manufacturer data of the equivalent advertisement and passed to `handle_status`, so they go
+    through the same duplicate filter, statistics and probe manager as advertisements. A device which
+    fails to connect, or disconnects, is connected again on a later advertisement, after a backoff.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        mode: str,
+        serial_numbers: set[str],
+        handle_status: StatusCallback,
+        backfill: LogBackfill | None = None,
+    ) -> None:
+        """Initialize."""
+        self.hass = hass
+        self.config_entry = config_entry
+        self.mode = mode
+        # Probes to connect to in probes mode. Every probe when empty.
+        self.serial_numbers = serial_numbers
+        self.handle_status = handle_status
+        # Downloads the records logged by connected probes while their readings were not received.
+        self.backfill = backfill
+        self.connects = 0
+        self.failures = 0
+        self._connections: dict[str, _Connection] = {}
+        # Consecutive failures to connect, and monotonic time of the next attempt, keyed by address.
+        self._backoff: dict[str, tuple[int, float]] = {}
+
+    @callback
+    def discovered(self, service_info: BluetoothServiceInfoBleak, probe_data: DecodedProbeData) -> None:
+        """Connect to the device which sent an advertisement, when it is selected and not connected yet."""
+        address = service_info.address
+        connection = self._connections.get(address)
+        if connection is not None:
+            connection.rssi = service_info.rssi
+            return
+        if not service_info.connectable:
+            return
+
+        advertising_data = probe_data.advertising_data
+        if self.mode == CONNECTION_MODE_NODE:
+            if advertising_data.type is not CombustionProductType.MEAT_NET_NODE or self._connections:
+                return
+            serial_number = None
+        else:
+            if advertising_data.type is not CombustionProductType.PROBE:
+                return
+            if self.serial_numbers and probe_data.serial_number not in self.serial_numbers:
+                return
+            serial_number = advertising_data.serial_number
+
+        backoff = self._backoff.get(address)
+        if backoff is not None and MONOTONIC_TIME() < backoff[1]:
+            return
+        source = service_info.source
+        if sum(1 for connection in self._connections.values() if connection.source == source) >= MAX_CONNECTIONS_PER_ADAPTER:
+            return
+
+        connection = self._connections[address] = _Connection(address, source, serial_number, service_info.rssi)
+        self.config_entry.async_create_background_task(
+            self.hass, self._async_connect(connection), f'combustion connect {address}'
+        )
+
+    async def _async_connect(self, connection: _Connection) -> None:
+        """Connect to a device and subscribe to its status notifications."""
+        address = connection.address
+        device = bluetooth.async_ble_device_from_address(self.hass, address, connectable=True)
+        if device is None:
+            self._async_failed(connection, 'no connectable path')
+            return
+
+        client = None
+        try:
+            client = await establish_connection(
+                BleakClientWithServiceCache,
+                device,
+                address,
+                disconnected_callback=lambda _client: self._async_disconnected(connection),
+                ble_device_callback=lambda: bluetooth.async_ble_device_from_address(self.hass, address, connectable=True) or device,
+            )
+            if connection.serial_number is None:
+                connection.reader = UartMessageReader(NODE_HEADER_LENGTHS)
+                await client.start_notify(UART_TX_CHARACTERISTIC_UUID, partial(self._async_node_notification, connection))
+            else:
+                if self.backfill is not None:
+                    await client.start_notify(UART_TX_CHARACTERISTIC_UUID, partial(self._async_probe_uart_notification, connection))
+                await client.start_notify(PROBE_STATUS_CHARACTERISTIC_UUID, partial(self._async_probe_notification, connection))
+        except (BleakError, asyncio.TimeoutError) as err:
+            if client is not None:
+                await client.disconnect()
+            self._async_failed(connection, err)
+            return
+
+        if self._connections.get(address) is not connection:
+            # Unloaded, or disconnected while subscribing.
+            await client.disconnect()
+            return
+        connection.client = client
+        self._backoff.pop(address, None)
+        self.connects += 1
+        _LOGGER.debug("Connected to [%s]", address)
+
+    @callback
+    def _async_failed(self, connection: _Connection, reason: Any) -> None:
+        """Forget a connection which could not be established, and back off before the next attempt."""
+        address = connection.address
+        if self._connections.get(address) is not connection:
+            return
+        del self._connections[address]
+        self.failures += 1
+        failures = self._backoff.get(address, (0, 0))[0] + 1
+        delay = min(BACKOFF_MAX, BACKOFF_INITIAL * 2 ** (failures - 1))
+        self._backoff[address] = (failures, MONOTONIC_TIME() + delay)
+        _LOGGER.debug("Failed to connect to [%s] (%s), retrying in %s seconds", address, reason, delay)
+
+    @callback
+    def _async_disconnected(self, connection: _Connection) -> None:
+        """Forget a connection which was lost, and wait before connecting again."""
+        address = connection.address
+        if self._connections.get(address) is not connection:
+            return
+        del self._connections[address]
+        self._backoff[address] = (0, MONOTONIC_TIME() + BACKOFF_INITIAL)
+        _LOGGER.debug("Disconnected from [%s]", address)
+
+    @callback
+    def _async_probe_notification(self, connection: _Connection, _characteristic: Any, data: bytearray) -> None:
+        """Handle a Probe Status notification of a probe."""
+        connection.notifications += 1
+        payload = probe_status_payload(CombustionProductType.PROBE, connection.serial_number, data)
+        if payload is None:
+            return
+        self.handle_status(payload, connection.address, connection.rssi)
+        if self.backfill is not None and connection.client is not None:
+            self.backfill.observe(connection.client, f'{connection.serial_number:x}', data)
+
+    @callback
+    def _async_probe_uart_notification(self, connection: _Connection, _characteristic: Any, data: bytearray) -> None:
+        """Handle a UART notification of a probe, carrying the response to a log download."""
+        self.backfill.handle_uart(f'{connection.serial_number:x}', data)
+
+    @callback
+    def _async_node_notification(self, connection: _Connection, _characteristic: Any, data: bytearray) -> None:
+        """Handle a UART notification of a MeatNet node, forwarding the status of each probe it carries."""
+        connection.notifications += 1
+        for (message_type, message) in connection.reader.feed(data):
+            # Probe Status messages carry the serial number of the probe, followed by its Probe Status.
+            if message_type != MESSAGE_PROBE_STATUS or len(message) < 4:
+                continue
+            serial_number = int.from_bytes(message[:4], 'little')
+            payload = probe_status_payload(CombustionProductType.MEAT_NET_NODE, serial_number, message[4:])
+            if payload is not None:
+                self.handle_status(payload, connection.address, connection.rssi)
+
+    async def async_load(self) -> None:
+        """Load the state stored before the last restart."""
+        if self.backfill is not None:
+            await self.backfill.async_load()
+
+    async def async_unload(self) -> None:
+        """Disconnect from every device."""
+        connections = list(self._connections.values())
+        self._connections.clear()
+        await asyncio.gather(
+            *(connection.client.disconnect() for connection in connections if connection.client is not None),
+            return_exceptions=True,
+        )
+
+    def as_dict(self, now: float) -> dict[str, Any]:
+        """Convert to a dictionary."""
+        return {
+            'mode': self.mode,
+            'serial_numbers': sorted(self.serial_numbers),
+            'connects': self.connects,
+            'failures': self.failures,
+            'connections': {
+                address: {
+                    'source': connection.source,
+                    'serial_number': None if connection.serial_number is None else f'{connection.serial_number:x}',
+                    'connected': connection.client is not None,
+                    'notifications': connection.notifications,
+                    'crc_errors': None if connection.reader is None else connection.reader.crc_errors,
+                }
+                for (address, connection) in self._connections.items()
+            },
+            'backoff': {
+                address: {'failures': failures, 'retry_in_s': round(max(0, retry_at - now), 1)}
+                for (address, (failures, retry_at)) in self._backoff.items()
+            },
+            'backfill': self.backfill.as_dict() if self.backfill is not None else None,
+        }
@@ -7,6 +7,7 @@ NAME = "Combustion"
 DOMAIN = "combustion"
 MANUFACTURER = "Combustion, Inc."
 DEVICE_NAME = "Predictive Thermometer"
+MEATNET_DEVICE_NAME = "Combustion Meatnet"
 VERSION = "0.0.0"
 ATTRIBUTION = ""
 
@@ -16,3 +17,49 @@ CONF_DEVICES = "devices"
 
 PRODUCT_TYPE_PROBE = 1
 PRODUCT_TYPE_REPEATER_NODE = 2
+
+# Services
+SERVICE_SET_PACKET_TRACING = "set_packet_tracing"
+ATTR_ENABLED = "enabled"
+ATTR_SAMPLE_RATE = "sample_rate"
+
+# Options
+CONF_TEMPERATURE_DEADBAND = "temperature_deadband"
+CONF_RSSI_DEADBAND = "rssi_deadband"
+CONF_RAW_ADVERTISEMENT_ATTRIBUTE = "raw_advertisement_attribute"
+CONF_VIRTUAL_SENSOR_INTERVAL = "virtual_sensor_interval"
+CONF_THERMISTOR_INTERVAL = "thermistor_interval"
+CONF_RSSI_INTERVAL = "rssi_interval"
+CONF_SCANNING_MODE = "scanning_mode"
+CONF_AVAILABILITY_TIMEOUT = "availability_timeout"
+CONF_LATENCY_HISTOGRAMS = "latency_histograms"
+CONF_CONNECTION_MODE = "connection_mode"
+CONF_CONNECTED_PROBES = "connected_probes"
+CONF_BACKFILL = "backfill"
+CONF_FLUSH_INTERVAL = "flush_interval"
+CONF_STATISTICS_MODE = "statistics_mode"
+
+DEFAULT_TEMPERATURE_DEADBAND = 0.1
+DEFAULT_RSSI_DEADBAND = 3
+# Minimum seconds between published states
+DEFAULT_VIRTUAL_SENSOR_INTERVAL = 1
+DEFAULT_THERMISTOR_INTERVAL = 10
+DEFAULT_RSSI_INTERVAL = 60
+# Seconds without packets before a probe is unavailable
+DEFAULT_AVAILABILITY_TIMEOUT = 120
+# Seconds between writes of the entities updated in the meantime. 0 writes them on the next iteration of the event loop.
+DEFAULT_FLUSH_INTERVAL = 0
+
+# Scanning modes
+SCANNING_MODE_ADAPTIVE = "adaptive"
+SCANNING_MODE_PASSIVE = "passive"
+SCANNING_MODE_ACTIVE = "active"
+SCANNING_MODES = [SCANNING_MODE_ADAPTIVE, SCANNING_MODE_PASSIVE, SCANNING_MODE_ACTIVE]
+DEFAULT_SCANNING_MODE = SCANNING_MODE_ADAPTIVE
+
+# Connection modes
+CONNECTION_MODE_OFF = "off"
+CONNECTION_MODE_PROBES = "probes"
+CONNECTION_MODE_NODE = "node"
+CONNECTION_MODES = [CONNECTION_MODE_OFF, CONNECTION_MODE_PROBES, CONNECTION_MODE_NODE]
+DEFAULT_CONNECTION_MODE = CONNECTION_MODE_OFF
@@ -0,0 +1,48 @@
+"""Diagnostics support for combustion."""
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.util.dt import monotonic_time_coarse
+
+from custom_components.combustion.probe_manager import ProbeManager
+
+from .const import DOMAIN
+
+# Seconds of the history of each probe summarized in the diagnostics.
+HISTORY_WINDOW = 300
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    probe_manager: ProbeManager = hass.data[DOMAIN]
+    listener = probe_manager.bluetooth_listener
+    now = monotonic_time_coarse()
+
+    return {
+        'options': dict(entry.options),
+        'scanning': listener.scanning.as_dict(time.monotonic()),
+        'pipeline': listener.instrumentation.as_dict(),
+        'flush': probe_manager.flusher.as_dict(),
+        'publish': {
+            'total': probe_manager.publish_stats_total().as_dict(),
+            'entities': {unique_id: stats.as_dict() for (unique_id, stats) in probe_manager.publish_stats.items()},
+        },
+        'statistics': {'enabled': probe_manager.statistics_mode, **listener.statistics.as_dict()},
+        'sessions': probe_manager.sessions.as_dict(),
+        'sources': listener.source_arbiter.as_dict(now),
+        'connections': listener.connections.as_dict(now) if listener.connections is not None else None,
+        'probes': {
+            serial_number: {
+                'available': probe_manager.is_available(serial_number),
+                **stats.as_dict(now),
+                'history': history.as_dict(now - HISTORY_WINDOW)
+                if (history := probe_manager.history.get(serial_number)) is not None
+                else None,
+            }
+            for (serial_number, stats) in listener.probe_stats.items()
+        },
+    }
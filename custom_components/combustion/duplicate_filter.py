@@ -0,0 +1,82 @@
+"""Collapse copies of the same probe reading relayed through the Meatnet."""
+from __future__ import annotations
+
+from custom_components.combustion.combustion_ble.decoder import DecodedProbeData
+
+# Copies of a reading arriving within this many seconds of the first copy are duplicates.
+DEFAULT_DUPLICATE_WINDOW = 1.0
+
+# A duplicate over the same number of hops only replaces the forwarded copy when its
+# signal is at least this much stronger, so small RSSI fluctuations do not flap the path.
+DUPLICATE_RSSI_MARGIN = 10
+
+
+class _Reading:
+    """Reading of a probe forwarded within the window."""
+
+    __slots__ = ('first_seen', 'hop_count', 'rssi')
+
+    def __init__(self, first_seen: float, hop_count: int, rssi: int) -> None:
+        self.first_seen = first_seen
+        self.hop_count = hop_count
+        self.rssi = rssi
+
+
+class DuplicateFilter:
+    """Collapse copies of the same probe reading relayed through the Meatnet.
+
+    A probe reading is broadcast by the probe and re-broadcast by every repeater, each copy with
+    its own hop count, RSSI and address. Copies are recognized by the serial number and the
+    temperature/mode/battery portion of the payload. Only the first copy is forwarded, unless a
+    later copy arrives over fewer hops (or over as many hops with a much stronger signal).
+
+    Repeaters relay copies late, so a copy of a reading can arrive after the next reading of the
+    probe. Every reading of the window is kept, so such a late copy does not roll the state back.
+    """
+
+    def __init__(self, window: float = DEFAULT_DUPLICATE_WINDOW) -> None:
+        """Initialize."""
+        self.window = window
+        self.duplicates = 0
+        # Readings forwarded within the window of each probe, by key, in the order they were first seen.
+        self._readings: dict[int, dict[bytes, _Reading]] = {}
+
+    def accept(self, probe_data: DecodedProbeData, now: float) -> bool:
+        """Determine if the probe data should be forwarded."""
+        advertising_data = probe_data.advertising_data
+        key = advertising_data.reading_key
+        hop_count = advertising_data.hop_count.value
+        rssi = probe_data.rssi
+
+        readings = self._readings.get(advertising_data.serial_number)
+        if readings is None:
+            readings = self._readings[advertising_data.serial_number] = {}
+        else:
+            self._prune(readings, now)
+
+        reading = readings.get(key)
+        if reading is None:
+            readings[key] = _Reading(now, hop_count, rssi)
+            return True
+
+        if hop_count < reading.hop_count or (
+            hop_count == reading.hop_count and rssi >= reading.rssi + DUPLICATE_RSSI_MARGIN
+        ):
+            reading.hop_count = hop_count
+            reading.rssi = rssi
+            return True
+
+        self.duplicates += 1
+        return False
+
+    def _prune(self, readings: dict[bytes, _Reading], now: float) -> None:
+        """Drop the readings first seen before the window."""
+        while readings:
+            key = next(iter(readings))
+            if now - readings[key].first_seen <= self.window:
+                break
+            del readings[key]
+
+    def forget(self, serial_number: int) -> None:
+        """Drop the readings of a probe which is no longer received."""
+        self._readings.pop(serial_number, None)
@@ -1,19 +1,174 @@
 """CombustionEntity class."""
 from __future__ import annotations
 
+import time
+from datetime import datetime
+from typing import Any
+
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.core import CALLBACK_TYPE, callback
 from homeassistant.helpers.entity import DeviceInfo, Entity
+from homeassistant.helpers.event import async_call_later
 
 from .const import DEVICE_NAME, DOMAIN, MANUFACTURER
+from .instrumentation import STAGE_ENTITY_UPDATE
+from .probe_manager import ProbeField, ProbeManager, PublishStats
+
+# Allowance for float rounding when comparing a change against the deadband.
+_DEADBAND_TOLERANCE = 1e-9
 
 
 class CombustionEntity(Entity):
     """CombustionEntity class."""
 
-    def __init__(self, serial_number: str) -> None:
+    _attr_should_poll = False
+
+    # Portions of the probe data this entity is rendered from.
+    _update_fields: ProbeField = ProbeField.ALL
+
+    # Minimum change of a numeric value before it is published. 0 publishes every change.
+    _publish_deadband: float = 0
+
+    # Minimum number of seconds between published states. 0 publishes every change immediately.
+    # Updates arriving sooner are coalesced, and the latest value is published once the interval ends.
+    _publish_interval: float = 0
+
+    def __init__(self, probe_manager: ProbeManager, serial_number: str) -> None:
         """Initialize."""
         super().__init__()
+        self.probe_manager = probe_manager
+        self.device_serial_number = serial_number
         self._attr_device_info = DeviceInfo(
             name=f'{DEVICE_NAME} {serial_number}',
             identifiers={(DOMAIN, serial_number)},
             manufacturer=MANUFACTURER,
         )
+        self._last_published: tuple[Any, Any] | None = None
+        # Snapshot of the latest update while a write is scheduled, which the write publishes.
+        self._pending_snapshot: tuple[Any, Any] | None = None
+        self._publish_stats = PublishStats()
+        self._cooldown: CALLBACK_TYPE | None = None
+        self._update_pending = False
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to updates for this entity's probe."""
+        await super().async_added_to_hass()
+        self._publish_stats = self.probe_manager.publish_stats_for(self.unique_id)
+        # The platform writes the initial state right after this method returns.
+        self._last_published = self._publish_snapshot()
+        self.async_on_remove(
+            self.probe_manager.add_update_listener(
+                self.on_update,
+                self.device_serial_number,
+                self._update_fields | ProbeField.AVAILABILITY,
+            )
+        )
+        self.async_on_remove(self._async_cancel_cooldown)
+        self.async_on_remove(lambda: self.probe_manager.flusher.discard(self._async_write_published_state))
+
+    @property
+    def available(self) -> bool:
+        """Return True if the probe was seen within the availability timeout."""
+        return self.probe_manager.is_available(self.device_serial_number)
+
+    def _publish_value(self) -> Any:
+        """Value compared against the last published state."""
+        return self.state
+
+    def _publish_snapshot(self) -> tuple[Any, Any]:
+        """Snapshot of everything written to the state machine."""
+        if not self.available:
+            return (STATE_UNAVAILABLE, None)
+        return (self._publish_value(), self.extra_state_attributes)
+
+    def _has_changed(self, snapshot: tuple[Any, Any]) -> bool:
+        """Determine if a snapshot differs enough from the last published one to be written."""
+        last = self._last_published
+        if last is None or last[1] != snapshot[1]:
+            return True
+
+        (previous, current) = (last[0], snapshot[0])
+        if (
+            self._publish_deadband
+            and isinstance(previous, int | float)
+            and isinstance(current, int | float)
+        ):
+            return abs(current - previous) + _DEADBAND_TOLERANCE >= self._publish_deadband
+        return previous != current
+
+    @callback
+    def on_update(self) -> None:
+        """Process probe updates."""
+        if self._cooldown is not None:
+            self._update_pending = True
+            self._publish_stats.coalesced += 1
+            return
+
+        instrumentation = self.probe_manager.instrumentation
+        if not instrumentation.enabled:
+            self._async_publish_if_changed()
+            return
+
+        start = time.perf_counter_ns()
+        self._async_publish_if_changed()
+        instrumentation.record(STAGE_ENTITY_UPDATE, time.perf_counter_ns() - start)
+
+    @callback
+    def _async_publish_if_changed(self) -> None:
+        """Schedule a state write if the state changed since it was last published."""
+        snapshot = self._publish_snapshot()
+        pending = self._pending_snapshot
+        if pending is not None:
+            # The scheduled write publishes the latest state, so any change is merged into it.
+            if snapshot == pending:
+                self._publish_stats.suppressed += 1
+            else:
+                self._pending_snapshot = snapshot
+                self._publish_stats.coalesced += 1
+                self._async_schedule_write()
+            return
+
+        if not self._has_changed(snapshot):
+            self._publish_stats.suppressed += 1
+            return
+
+        self._pending_snapshot = snapshot
+        self._async_schedule_write()
+
+        # A probe coming back should be shown right away, so becoming unavailable does not start an interval.
+        if self._publish_interval and snapshot[0] != STATE_UNAVAILABLE:
+            self._cooldown = async_call_later(self.hass, self._publish_interval, self._async_end_cooldown)
+
+    @callback
+    def _async_schedule_write(self) -> None:
+        """Write the state with the next flush of the probe manager, along with every other entity updated meanwhile."""
+        self.probe_manager.flusher.mark_dirty(self._async_write_published_state)
+
+    @callback
+    def _async_write_published_state(self) -> None:
+        """Write the state, and compare later updates against it.
+
+        Updates handled between marking the entity dirty and the flush are written too, so the snapshot is taken,
+        and the write counted, here.
+        """
+        self._pending_snapshot = None
+        self._last_published = self._publish_snapshot()
+        self._publish_stats.published += 1
+        self.probe_manager.instrumentation.state_writes += 1
+        self.async_write_ha_state()
+
+    @callback
+    def _async_end_cooldown(self, _now: datetime) -> None:
+        """Publish the latest update received during the publish interval."""
+        self._cooldown = None
+        if self._update_pending:
+            self._update_pending = False
+            self._async_publish_if_changed()
+
+    @callback
+    def _async_cancel_cooldown(self) -> None:
+        """Cancel the publish interval, dropping any pending update."""
+        if self._cooldown is not None:
+            self._cooldown()
+            self._cooldown = None
+        self._update_pending = False
@@ -0,0 +1,76 @@
+"""Write the state of every entity updated during a loop iteration, or a frame, at once."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from custom_components.combustion.const import DEFAULT_FLUSH_INTERVAL
+
+
+class StateFlusher:
+    """Write the state of every dirty entity once per loop iteration, or once per `interval` seconds.
+
+    During a burst of repeater traffic the same entity is updated by several packets handled in the
+    same iteration of the event loop. Entities only mark themselves dirty, and a single scheduled
+    flush writes each of them once, with the latest state.
+    """
+
+    def __init__(self, hass: HomeAssistant, interval: float = DEFAULT_FLUSH_INTERVAL) -> None:
+        """Initialize."""
+        self.hass = hass
+        self.interval = interval
+        self.flushes = 0
+        self.writes = 0
+        self.merged = 0
+        # State writers of the dirty entities, in the order they were marked. Used as an ordered set.
+        self._dirty: dict[Callable[[], None], None] = {}
+        self._handle: asyncio.Handle | None = None
+
+    @callback
+    def mark_dirty(self, write_state: Callable[[], None]) -> None:
+        """Write a state with the next flush, once however many times it is marked before then."""
+        if write_state in self._dirty:
+            self.merged += 1
+            return
+        self._dirty[write_state] = None
+        if self._handle is None:
+            if self.interval:
+                self._handle = self.hass.loop.call_later(self.interval, self._async_flush)
+            else:
+                self._handle = self.hass.loop.call_soon(self._async_flush)
+
+    @callback
+    def discard(self, write_state: Callable[[], None]) -> None:
+        """Drop a pending write, for example when its entity is removed."""
+        self._dirty.pop(write_state, None)
+
+    @callback
+    def _async_flush(self) -> None:
+        """Write every dirty state."""
+        self._handle = None
+        (dirty, self._dirty) = (self._dirty, {})
+        self.flushes += 1
+        self.writes += len(dirty)
+        for write_state in dirty:
+            write_state()
+
+    @callback
+    def async_cancel(self) -> None:
+        """Cancel the scheduled flush, dropping the pending writes."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._dirty.clear()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Convert to a dictionary."""
+        return {
+            'interval': self.interval,
+            'flushes': self.flushes,
+            'writes': self.writes,
+            'merged': self.merged,
+            'pending': len(self._dirty),
+        }
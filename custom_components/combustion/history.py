@@ -0,0 +1,215 @@
+"""Fixed-size history of the readings of a probe."""
+from __future__ import annotations
+
+from array import array
+from typing import Any, NamedTuple
+
+from custom_components.combustion.combustion_ble.decoder import DecodedProbeData
+
+# Samples kept per probe: 30 minutes of readings at 4 packets per second, about 200 KB.
+DEFAULT_HISTORY_SIZE = 7200
+
+THERMISTOR_COUNT = 8
+
+# Temperatures are stored as their 13-bit encoding, which converts back to °C exactly.
+_TEMPERATURE_RESOLUTION = 0.05
+_TEMPERATURE_OFFSET = -20.0
+
+# Layout of the packed status of a sample.
+_CORE_SHIFT = 0
+_SURFACE_SHIFT = 3
+_AMBIENT_SHIFT = 6
+_HOP_COUNT_SHIFT = 9
+_BATTERY_SHIFT = 12
+_INDEX_MASK = 0x7
+_HOP_COUNT_MASK = 0x7
+
+# Values which can be queried besides the thermistors T1-T8.
+CORE = 'core'
+SURFACE = 'surface'
+AMBIENT = 'ambient'
+RSSI = 'rssi'
+_VIRTUAL_SHIFTS = {CORE: _CORE_SHIFT, SURFACE: _SURFACE_SHIFT, AMBIENT: _AMBIENT_SHIFT}
+
+
+def _encode_temperature(temperature: float) -> int:
+    return round((temperature - _TEMPERATURE_OFFSET) / _TEMPERATURE_RESOLUTION)
+
+
+def _decode_temperature(encoded: float) -> float:
+    return encoded * _TEMPERATURE_RESOLUTION + _TEMPERATURE_OFFSET
+
+
+class HistorySample(NamedTuple):
+    """A reading of a probe."""
+
+    timestamp: float
+    temperatures: tuple[float, ...]
+    core_index: int
+    surface_index: int
+    ambient_index: int
+    battery_ok: bool
+    rssi: int
+    # `HopCount` value (0 is `HopCount.HOP1`).
+    hop_count: int
+
+
+class WindowStats(NamedTuple):
+    """Statistics of a value over a time window."""
+
+    count: int
+    min: float
+    max: float
+    mean: float
+
+
+class ProbeHistory:
+    """Fixed-size ring buffer of the readings of a probe.
+
+    Samples are stored column-wise in `array`s, about 27 bytes per sample: a timestamp (`d`),
+    the 8 encoded thermistor values (`H`), the RSSI (`b`), and the virtual sensor indexes, hop
+    count and battery status packed in a single `H`. Once full, the oldest sample is overwritten.
+
+    Timestamps are monotonic seconds, which never decrease, so the start of a time window is found
+    with a binary search, and window queries only visit the samples in the window.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_HISTORY_SIZE) -> None:
+        """Initialize."""
+        self.capacity = capacity
+        self._timestamps = array('d', bytes(8 * capacity))
+        self._temperatures = array('H', bytes(2 * THERMISTOR_COUNT * capacity))
+        self._rssi = array('b', bytes(capacity))
+        self._status = array('H', bytes(2 * capacity))
+        # Index of the oldest sample, and number of samples stored.
+        self._start = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        """Return the number of samples stored."""
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the sample storage."""
+        return sum(
+            column.buffer_info()[1] * column.itemsize
+            for column in (self._timestamps, self._temperatures, self._rssi, self._status)
+        )
+
+    def append(self, timestamp: float, probe_data: DecodedProbeData) -> None:
+        """Store a reading received at `timestamp` (monotonic seconds)."""
+        advertising_data = probe_data.advertising_data
+        capacity = self.capacity
+        if self._count < capacity:
+            slot = (self._start + self._count) % capacity
+            self._count += 1
+        else:
+            slot = self._start
+            self._start = (slot + 1) % capacity
+
+        self._timestamps[slot] = timestamp
+        offset = slot * THERMISTOR_COUNT
+        self._temperatures[offset:offset + THERMISTOR_COUNT] = array(
+            'H', [_encode_temperature(temperature) for temperature in advertising_data.temperatures]
+        )
+        self._rssi[slot] = max(-128, min(127, probe_data.rssi))
+        self._status[slot] = (
+            (advertising_data.core_index << _CORE_SHIFT)
+            | (advertising_data.surface_index << _SURFACE_SHIFT)
+            | (advertising_data.ambient_index << _AMBIENT_SHIFT)
+            | (advertising_data.hop_count.value << _HOP_COUNT_SHIFT)
+            | (advertising_data.battery_ok << _BATTERY_SHIFT)
+        )
+
+    def clear(self) -> None:
+        """Drop all samples."""
+        self._start = 0
+        self._count = 0
+
+    def _slot(self, index: int) -> int:
+        """Storage slot of the `index`th oldest sample."""
+        return (self._start + index) % self.capacity
+
+    def _first_index_since(self, since: float) -> int:
+        """Index of the oldest sample taken at or after `since`."""
+        timestamps = self._timestamps
+        (low, high) = (0, self._count)
+        while low < high:
+            middle = (low + high) // 2
+            if timestamps[self._slot(middle)] < since:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _slots_since(self, since: float) -> range | list[int]:
+        """Storage slots of the samples taken at or after `since`, oldest first."""
+        capacity = self.capacity
+        first = self._start + self._first_index_since(since)
+        end = self._start + self._count
+        if end <= capacity:
+            return range(first, end)
+        if first >= capacity:
+            return range(first - capacity, end - capacity)
+        # The window wraps around the end of the storage.
+        return [*range(first, capacity), *range(end - capacity)]
+
+    def _sample(self, slot: int) -> HistorySample:
+        offset = slot * THERMISTOR_COUNT
+        status = self._status[slot]
+        return HistorySample(
+            timestamp=self._timestamps[slot],
+            temperatures=tuple(_decode_temperature(value) for value in self._temperatures[offset:offset + THERMISTOR_COUNT]),
+            core_index=(status >> _CORE_SHIFT) & _INDEX_MASK,
+            surface_index=(status >> _SURFACE_SHIFT) & _INDEX_MASK,
+            ambient_index=(status >> _AMBIENT_SHIFT) & _INDEX_MASK,
+            battery_ok=bool(status >> _BATTERY_SHIFT),
+            rssi=self._rssi[slot],
+            hop_count=(status >> _HOP_COUNT_SHIFT) & _HOP_COUNT_MASK,
+        )
+
+    def samples_since(self, since: float) -> list[HistorySample]:
+        """Return the samples taken at or after `since`, oldest first."""
+        return [self._sample(slot) for slot in self._slots_since(since)]
+
+    def values_since(self, since: float, value: str | int) -> list[float]:
+        """Return the values taken at or after `since`, oldest first.
+
+        `value` is a thermistor index (0 for T1), `CORE`, `SURFACE`, `AMBIENT` or `RSSI`.
+        """
+        slots = self._slots_since(since)
+        if value == RSSI:
+            rssi = self._rssi
+            return [float(rssi[slot]) for slot in slots]
+
+        temperatures = self._temperatures
+        if isinstance(value, int):
+            return [_decode_temperature(temperatures[slot * THERMISTOR_COUNT + value]) for slot in slots]
+
+        shift = _VIRTUAL_SHIFTS[value]
+        status = self._status
+        return [
+            _decode_temperature(temperatures[slot * THERMISTOR_COUNT + ((status[slot] >> shift) & _INDEX_MASK)])
+            for slot in slots
+        ]
+
+    def window_stats(self, since: float, value: str | int) -> WindowStats | None:
+        """Return the minimum, maximum and mean of a value over the samples taken at or after `since`."""
+        values = self.values_since(since, value)
+        if not values:
+            return None
+        return WindowStats(count=len(values), min=min(values), max=max(values), mean=sum(values) / len(values))
+
+    def as_dict(self, since: float) -> dict[str, Any]:
+        """Convert to a dictionary, with the statistics of the virtual sensors and RSSI since `since`."""
+        window = {}
+        for value in (CORE, SURFACE, AMBIENT, RSSI):
+            stats = self.window_stats(since, value)
+            window[value] = None if stats is None else {
+                'count': stats.count,
+                'min': round(stats.min, 2),
+                'max': round(stats.max, 2),
+                'mean': round(stats.mean, 2),
+            }
+        return {'samples': self._count, 'window': window}
@@ -0,0 +1,136 @@
+"""Measure where time goes between an advertisement arriving and a state being written."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any
+
+# Upper bounds of the latency histogram buckets, in nanoseconds. A last bucket holds anything slower.
+LATENCY_BUCKETS_NS = (
+    1_000,
+    2_000,
+    5_000,
+    10_000,
+    20_000,
+    50_000,
+    100_000,
+    200_000,
+    500_000,
+    1_000_000,
+    2_000_000,
+    5_000_000,
+    10_000_000,
+)
+
+# Stages of the pipeline. The Bluetooth callback includes all other stages, and the probe manager
+# includes the entity updates it dispatches.
+STAGE_BT_CALLBACK = 'bt_callback'
+STAGE_DECODE = 'decode'
+STAGE_PROBE_MANAGER = 'probe_manager'
+STAGE_ENTITY_UPDATE = 'entity_update'
+STAGES = (STAGE_BT_CALLBACK, STAGE_DECODE, STAGE_PROBE_MANAGER, STAGE_ENTITY_UPDATE)
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of durations, in nanoseconds."""
+
+    __slots__ = ('counts', 'count', 'total_ns', 'max_ns')
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.counts = [0] * (len(LATENCY_BUCKETS_NS) + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, duration_ns: int) -> None:
+        """Record a duration."""
+        self.counts[bisect_left(LATENCY_BUCKETS_NS, duration_ns)] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+    def percentile(self, percentile: float) -> int | None:
+        """Upper bound of the bucket holding the given percentile, in nanoseconds.
+
+        The slowest bucket is unbounded, so the maximum is returned instead.
+        """
+        if not self.count:
+            return None
+        rank = percentile / 100 * self.count
+        seen = 0
+        for (index, bucket_count) in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return LATENCY_BUCKETS_NS[index] if index < len(LATENCY_BUCKETS_NS) else self.max_ns
+        return self.max_ns
+
+    def clear(self) -> None:
+        """Forget all durations."""
+        self.counts = [0] * (len(LATENCY_BUCKETS_NS) + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Convert to a dictionary, in microseconds."""
+        buckets = {f'le_{bound // 1000}us': count for (bound, count) in zip(LATENCY_BUCKETS_NS, self.counts, strict=False)}
+        buckets[f'gt_{LATENCY_BUCKETS_NS[-1] // 1000}us'] = self.counts[-1]
+        return {
+            'count': self.count,
+            'mean_us': round(self.total_ns / self.count / 1000, 2) if self.count else None,
+            'p50_us': _microseconds(self.percentile(50)),
+            'p95_us': _microseconds(self.percentile(95)),
+            'p99_us': _microseconds(self.percentile(99)),
+            'max_us': round(self.max_ns / 1000, 2) if self.count else None,
+            'buckets': buckets,
+        }
+
+
+def _microseconds(duration_ns: int | None) -> float | None:
+    return None if duration_ns is None else round(duration_ns / 1000, 2)
+
+
+class PipelineInstrumentation:
+    """Counters of the advertisements handled, and latency histograms of each stage of the pipeline.
+
+    Counters are always kept. Histograms are only fed when `enabled`, since timing a stage takes two
+    clock reads: callers check `enabled` before reading the clock, and record the elapsed
+    `time.perf_counter_ns()` with `record`.
+    """
+
+    __slots__ = ('enabled', 'histograms', 'packets', 'invalid', 'instant_reads', 'secondary_sources', 'duplicates', 'state_writes')
+
+    def __init__(self, enabled: bool = False) -> None:
+        """Initialize."""
+        self.enabled = enabled
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+        self.packets = 0
+        self.invalid = 0
+        self.instant_reads = 0
+        self.secondary_sources = 0
+        self.duplicates = 0
+        self.state_writes = 0
+
+    def record(self, stage: str, duration_ns: int) -> None:
+        """Record the time spent in a stage."""
+        self.histograms[stage].record(duration_ns)
+
+    def counters(self) -> dict[str, int]:
+        """Advertisements and state writes counted so far."""
+        return {
+            'packets': self.packets,
+            'invalid': self.invalid,
+            'instant_reads': self.instant_reads,
+            'secondary_sources': self.secondary_sources,
+            'duplicates': self.duplicates,
+            'state_writes': self.state_writes,
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Convert to a dictionary."""
+        return {
+            'enabled': self.enabled,
+            'counters': self.counters(),
+            'latency': {stage: histogram.as_dict() for (stage, histogram) in self.histograms.items()},
+        }
@@ -0,0 +1,86 @@
+"""Number platform for combustion."""
+from __future__ import annotations
+
+from homeassistant.components.number import (
+    NumberDeviceClass,
+    NumberEntityDescription,
+    NumberMode,
+    RestoreNumber,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import UnitOfTemperature
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_platform
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from custom_components.combustion.combustion_ble.decoder import DecodedProbeData
+from custom_components.combustion.probe_manager import ProbeField, ProbeManager
+
+from .const import DOMAIN, LOGGER
+from .entity import CombustionEntity
+
+_LOGGER = LOGGER.getChild('number')
+
+
+TARGET_TEMPERATURE_DESCRIPTION = NumberEntityDescription(
+    key="target_temperature",
+    device_class=NumberDeviceClass.TEMPERATURE,
+    native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+    native_min_value=0,
+    native_max_value=100,
+    native_step=0.5,
+    mode=NumberMode.BOX,
+)
+
+def _create_numbers(probe_manager: ProbeManager, probe_data: DecodedProbeData):
+    numbers: list[CombustionEntity] = [
+        CombustionTargetTemperatureNumber(probe_manager, probe_data)
+    ]
+
+    return numbers
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
+    """Set up the number platform."""
+    _LOGGER.debug("Starting async_setup_entry")
+
+    platform = entity_platform.async_get_current_platform()
+
+    async def _async_create_numbers(pm: ProbeManager, batch: list[DecodedProbeData]):
+        numbers = [number for probe_data in batch for number in _create_numbers(pm, probe_data)]
+        await platform.async_add_entities(numbers)
+
+    probe_manager: ProbeManager = hass.data[DOMAIN]
+    probe_manager.init_number_platform(_async_create_numbers)
+
+class CombustionTargetTemperatureNumber(CombustionEntity, RestoreNumber):
+    """Core temperature a probe is cooking to, used to predict when it is done."""
+
+    _update_fields = ProbeField.PREDICTION
+
+    def __init__(self, probe_manager: ProbeManager, probe_data: DecodedProbeData) -> None:
+        """Initialize."""
+        super().__init__(probe_manager, probe_data.serial_number)
+        self._attr_has_entity_name = True
+        self._attr_unique_id = f'{probe_data.serial_number}--target_temperature'
+        self.entity_description = TARGET_TEMPERATURE_DESCRIPTION
+
+    @property
+    def name(self):
+        """Number name."""
+        return 'Target Temperature'
+
+    async def async_added_to_hass(self) -> None:
+        """Restore the target temperature."""
+        if (last_number_data := await self.async_get_last_number_data()) is not None:
+            self.probe_manager.predictor(self.device_serial_number).target = last_number_data.native_value
+        await super().async_added_to_hass()
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the target temperature."""
+        return self.probe_manager.predictor(self.device_serial_number).target
+
+    async def async_set_native_value(self, value: float) -> None:
+        """Set the target temperature."""
+        self.probe_manager.set_target_temperature(self.device_serial_number, value)
@@ -0,0 +1,113 @@
+"""Predict when the core of a probe reaches a target temperature."""
+from __future__ import annotations
+
+import math
+
+# Readings weigh less than 1/e of the latest reading after this many seconds.
+PREDICTION_TIME_CONSTANT = 300.0
+
+# Seconds of readings needed before the rate of change is reported.
+MIN_PREDICTION_SPAN = 60.0
+
+# The core must rise at least this fast (°C per second) to predict when it reaches the target.
+MIN_PREDICTION_RATE = 0.05 / 60
+
+
+class CorePredictor:
+    """Exponentially weighted linear regression of the core temperature over time.
+
+    Every reading updates five decayed sums in O(1), whatever the length of the cook. Times are
+    kept relative to the latest reading, so the sums stay small over a long cook: when a reading
+    arrives, the sums are shifted to the new origin, decayed, and the reading is added at t=0.
+    """
+
+    __slots__ = (
+        'time_constant',
+        'target',
+        '_first_time',
+        '_last_time',
+        '_sum_w',
+        '_sum_t',
+        '_sum_y',
+        '_sum_tt',
+        '_sum_ty',
+    )
+
+    def __init__(self, time_constant: float = PREDICTION_TIME_CONSTANT, target: float | None = None) -> None:
+        """Initialize."""
+        self.time_constant = time_constant
+        self.target = target
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all readings."""
+        self._first_time: float | None = None
+        self._last_time: float | None = None
+        self._sum_w = 0.0
+        self._sum_t = 0.0
+        self._sum_y = 0.0
+        self._sum_tt = 0.0
+        self._sum_ty = 0.0
+
+    def add(self, timestamp: float, temperature: float) -> None:
+        """Add a core temperature reading."""
+        last_time = self._last_time
+        if last_time is None:
+            self._first_time = timestamp
+        else:
+            elapsed = timestamp - last_time
+            if elapsed < 0:
+                return
+            decay = math.exp(-elapsed / self.time_constant)
+            (sum_w, sum_t, sum_y) = (self._sum_w, self._sum_t, self._sum_y)
+            self._sum_tt = decay * (self._sum_tt - 2 * elapsed * sum_t + elapsed * elapsed * sum_w)
+            self._sum_ty = decay * (self._sum_ty - elapsed * sum_y)
+            self._sum_t = decay * (sum_t - elapsed * sum_w)
+            self._sum_w = decay * sum_w
+            self._sum_y = decay * sum_y
+
+        self._last_time = timestamp
+        self._sum_w += 1.0
+        self._sum_y += temperature
+
+    @property
+    def last_time(self) -> float | None:
+        """Time of the latest reading."""
+        return self._last_time
+
+    def _slope(self) -> float | None:
+        """Fitted rate of change, in °C per second."""
+        if self._last_time is None or self._last_time - self._first_time < MIN_PREDICTION_SPAN:
+            return None
+        denominator = self._sum_w * self._sum_tt - self._sum_t * self._sum_t
+        if denominator <= 0:
+            return None
+        return (self._sum_w * self._sum_ty - self._sum_t * self._sum_y) / denominator
+
+    @property
+    def rate(self) -> float | None:
+        """Fitted rate of change, in °C per minute."""
+        slope = self._slope()
+        return None if slope is None else slope * 60
+
+    @property
+    def temperature(self) -> float | None:
+        """Fitted core temperature at the time of the latest reading."""
+        slope = self._slope()
+        if slope is None:
+            return None
+        return (self._sum_y - slope * self._sum_t) / self._sum_w
+
+    def seconds_to_target(self) -> float | None:
+        """Predicted seconds from the latest reading until the core reaches the target."""
+        if self.target is None:
+            return None
+        slope = self._slope()
+        if slope is None:
+            return None
+        temperature = (self._sum_y - slope * self._sum_t) / self._sum_w
+        if temperature >= self.target:
+            return 0.0
+        if slope < MIN_PREDICTION_RATE:
+            return None
+        return (self.target - temperature) / slope
@@ -1,59 +1,514 @@
 """Manage discovered predictive probes."""
 
-from homeassistant.core import callback
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Mapping
+from datetime import datetime, timedelta
+from enum import IntFlag
+from typing import Any, NamedTuple
 
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.util.dt import monotonic_time_coarse
+
+from custom_components.combustion.availability import AvailabilityTracker
 from custom_components.combustion.bluetooth_listener import BluetoothListener
-from custom_components.combustion.combustion_ble.combustion_probe_data import (
-    CombustionProbeData,
+from custom_components.combustion.combustion_ble.decoder import DecodedProbeData
+from custom_components.combustion.const import (
+    CONF_AVAILABILITY_TIMEOUT,
+    CONF_FLUSH_INTERVAL,
+    CONF_STATISTICS_MODE,
+    DEFAULT_AVAILABILITY_TIMEOUT,
+    DEFAULT_FLUSH_INTERVAL,
+    LOGGER,
 )
-from custom_components.combustion.const import LOGGER
+from custom_components.combustion.flush import StateFlusher
+from custom_components.combustion.history import ProbeHistory
+from custom_components.combustion.instrumentation import STAGE_PROBE_MANAGER
+from custom_components.combustion.prediction import CorePredictor
+from custom_components.combustion.sessions import CookSessions
+from custom_components.combustion.statistics import STATISTICS_IMPORT_INTERVAL
 
 _LOGGER = LOGGER.getChild('probe_manager')
 
+# Seconds to wait for more probes to show up before adding entities for newly discovered probes.
+# A Meatnet powering up announces all of its probes within about a second.
+DISCOVERY_BATCH_DELAY = 0.5
+
+# Seconds between checks for cook sessions of probes which stopped advertising.
+SESSION_EXPIRY_INTERVAL = 60
+
+# Seconds without instant read packets before the instant read of a probe is cleared.
+INSTANT_READ_TIMEOUT = 5
+
+MONOTONIC_TIME = monotonic_time_coarse
+
+CreateEntitiesCallback = Callable[['ProbeManager', list[DecodedProbeData]], Awaitable[None]]
+
+
+class ProbeField(IntFlag):
+    """Portions of probe data which listeners can subscribe to."""
+
+    TEMPERATURES = 0x1
+    BATTERY = 0x2
+    RSSI = 0x4
+    MODE = 0x8
+    AVAILABILITY = 0x10
+    PREDICTION = 0x20
+    INSTANT_READ = 0x40
+    SESSION = 0x80
+
+    ALL = TEMPERATURES | BATTERY | RSSI | MODE | AVAILABILITY | PREDICTION | INSTANT_READ | SESSION
+
+
+def changed_fields(previous: DecodedProbeData | None, current: DecodedProbeData) -> ProbeField:
+    """Determine which fields differ between two readings of the same probe."""
+    if previous is None:
+        return ProbeField.ALL
+
+    changed = ProbeField(0)
+    previous_adv = previous.advertising_data
+    current_adv = current.advertising_data
+    if previous_adv is not current_adv:
+        if (
+            previous_adv.temperatures != current_adv.temperatures
+            or previous_adv.core_index != current_adv.core_index
+            or previous_adv.surface_index != current_adv.surface_index
+            or previous_adv.ambient_index != current_adv.ambient_index
+        ):
+            changed |= ProbeField.TEMPERATURES
+        if previous_adv.battery_ok != current_adv.battery_ok:
+            changed |= ProbeField.BATTERY
+        if previous_adv.mode != current_adv.mode:
+            changed |= ProbeField.MODE
+    if previous.rssi != current.rssi:
+        changed |= ProbeField.RSSI
+    return changed
+
+
+class InstantRead(NamedTuple):
+    """Latest instant read of a probe."""
+
+    temperature: float
+    # Monotonic time the reading was received.
+    time: float
+
+
+class PublishStats:
+    """Counters of state writes published, suppressed by change detection, or coalesced into a pending write or by rate limiting."""
+
+    __slots__ = ('published', 'suppressed', 'coalesced')
+
+    def __init__(self, published: int = 0, suppressed: int = 0, coalesced: int = 0) -> None:
+        """Initialize."""
+        self.published = published
+        self.suppressed = suppressed
+        self.coalesced = coalesced
+
+    def as_dict(self) -> dict[str, int]:
+        """Convert to a dictionary."""
+        return {
+            'published': self.published,
+            'suppressed': self.suppressed,
+            'coalesced': self.coalesced,
+        }
+
+
 class ProbeManager:
     """Manage discovered predictive probes."""
 
-    def __init__(self, bt_listener: BluetoothListener) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        bt_listener: BluetoothListener,
+        options: Mapping[str, Any] | None = None,
+    ) -> None:
         """Initialize."""
+        self.hass = hass
         self.bluetooth_listener = bt_listener
-        self.create_sensors_callback = None
-        self.data: dict[str, CombustionProbeData] = {}
-        self._listeners = []
+        self.instrumentation = bt_listener.instrumentation
+        self.options: Mapping[str, Any] = options or {}
+        self.create_sensors_callback: CreateEntitiesCallback | None = None
+        self.create_binary_sensors_callback: CreateEntitiesCallback | None = None
+        self.create_numbers_callback: CreateEntitiesCallback | None = None
+        self.data: dict[str, DecodedProbeData] = {}
+        # Recent readings of each probe, for analytics which need more than the latest reading.
+        self.history: dict[str, ProbeHistory] = {}
+        # Core temperature trend of each probe, and when it reaches its target.
+        self.predictors: dict[str, CorePredictor] = {}
+        # Latest instant read of each probe in instant read mode, cleared once it leaves the mode.
+        self.instant_reads: dict[str, InstantRead] = {}
+        self._instant_read_timers: dict[str, CALLBACK_TYPE] = {}
+        # Readings of newly discovered probes, buffered until their entities have been added.
+        self._pending: dict[str, list[DecodedProbeData]] = {}
+        # Readings of the batch of probes whose entities are being added.
+        self._adding: dict[str, list[DecodedProbeData]] = {}
+        self._discovery_task: asyncio.Task | None = None
+        # Probes whose entities have been added. They are kept while the probe is unavailable.
+        self._known_serial_numbers: set[str] = set()
+        self.availability = AvailabilityTracker(
+            self.options.get(CONF_AVAILABILITY_TIMEOUT, DEFAULT_AVAILABILITY_TIMEOUT)
+        )
+        self._expiry_timer: CALLBACK_TYPE | None = None
+        # Listeners keyed by serial number. Listeners for all probes are stored under `None`.
+        self._listeners: dict[str | None, list[tuple[Callable[[], None], ProbeField]]] = {}
+        # Change detection counters, keyed by entity unique id.
+        self.publish_stats: dict[str, PublishStats] = {}
+        # Entities mark their state dirty, and are written together once per loop iteration or frame.
+        self.flusher = StateFlusher(hass, self.options.get(CONF_FLUSH_INTERVAL, DEFAULT_FLUSH_INTERVAL))
+        # In statistics mode, core, surface and ambient temperatures are aggregated per hour, and
+        # imported into long-term statistics every `STATISTICS_IMPORT_INTERVAL` seconds.
+        self.statistics_mode: bool = self.options.get(CONF_STATISTICS_MODE, False)
+        self.statistics = bt_listener.statistics
+        self._statistics_timer: CALLBACK_TYPE | None = None
+        # Cook session of each probe, detected from its thermistors, and the summaries of past sessions.
+        self.sessions = CookSessions(hass)
+        self._session_timer: CALLBACK_TYPE | None = None
 
-    def init_sensor_platform(self, create_sensors_callback):
+    def init_sensor_platform(self, create_sensors_callback: CreateEntitiesCallback):
         """Initialize sensor platform."""
         self.create_sensors_callback = create_sensors_callback
 
-    def init_binary_sensor_platform(self, create_sensors_callback):
+    def init_binary_sensor_platform(self, create_sensors_callback: CreateEntitiesCallback):
         """Initialize binary sensor platform."""
         self.create_binary_sensors_callback = create_sensors_callback
 
+    def init_number_platform(self, create_numbers_callback: CreateEntitiesCallback):
+        """Initialize number platform."""
+        self.create_numbers_callback = create_numbers_callback
+
+    async def async_load(self) -> None:
+        """Load the cook sessions stored before the last restart."""
+        await self.sessions.async_load()
+
     def async_init(self):
         """Async initialization."""
         self.bluetooth_listener.add_update_listener(self.create_update_callback())
+        self.bluetooth_listener.add_instant_read_listener(self.create_instant_read_callback())
+        if self.statistics_mode:
+            self._statistics_timer = async_track_time_interval(
+                self.hass, self._async_import_statistics, timedelta(seconds=STATISTICS_IMPORT_INTERVAL)
+            )
+        self._session_timer = async_track_time_interval(
+            self.hass, self._async_expire_sessions, timedelta(seconds=SESSION_EXPIRY_INTERVAL)
+        )
+
+    @callback
+    def async_unload(self) -> None:
+        """Async unload."""
+        if self._discovery_task is not None:
+            self._discovery_task.cancel()
+            self._discovery_task = None
+        self._pending.clear()
+        self._adding.clear()
+        if self._expiry_timer is not None:
+            self._expiry_timer()
+            self._expiry_timer = None
+        self.availability.clear()
+        for cancel in self._instant_read_timers.values():
+            cancel()
+        self._instant_read_timers.clear()
+        self.flusher.async_cancel()
+        if self._session_timer is not None:
+            self._session_timer()
+            self._session_timer = None
+        if self._statistics_timer is not None:
+            self._statistics_timer()
+            self._statistics_timer = None
+            # Readings of the running period would be lost otherwise.
+            self.statistics.async_import()
+
+    @callback
+    def _async_import_statistics(self, _now: datetime) -> None:
+        """Import the hours changed since the last import into long-term statistics."""
+        self.statistics.async_import()
+
+    @callback
+    def _async_expire_sessions(self, _now: datetime) -> None:
+        """End the cook sessions of probes which stopped advertising, for example in their charger."""
+        for serial_number in self.sessions.expire(time.time()):
+            self._dispatch(serial_number, ProbeField.SESSION)
 
     def create_update_callback(self):
         """Create callback for handling updates."""
         @callback
-        def update(probe_data: CombustionProbeData):
+        def update(probe_data: DecodedProbeData):
             """Handle updated data from predictive probe."""
-            if probe_data.serial_number not in self.data:
-                _LOGGER.debug("Adding sensors for new device [%s]", probe_data.serial_number)
-                self.create_sensors_callback(self, probe_data)
-                self.create_binary_sensors_callback(self, probe_data)
+            instrumentation = self.instrumentation
+            if not instrumentation.enabled:
+                self._handle_probe_data(probe_data)
+                return
+
+            start = time.perf_counter_ns()
+            self._handle_probe_data(probe_data)
+            instrumentation.record(STAGE_PROBE_MANAGER, time.perf_counter_ns() - start)
+
+        return update
+
+    def _handle_probe_data(self, probe_data: DecodedProbeData) -> None:
+        """Track the availability of the probe, and store or buffer the reading."""
+        serial_number = probe_data.serial_number
+        if self.availability.seen(serial_number, MONOTONIC_TIME()) and self._expiry_timer is None:
+            self._schedule_expiry()
+
+        pending = self._pending.get(serial_number) or self._adding.get(serial_number)
+        if pending is not None:
+            pending.append(probe_data)
+            return
+
+        previous = self.data.get(serial_number)
+        if previous is None and serial_number not in self._known_serial_numbers:
+            self._queue_new_probe(probe_data)
+            return
+
+        self._update(previous, probe_data)
 
-            self.data[probe_data.serial_number] = probe_data
+    def create_instant_read_callback(self):
+        """Create callback for handling instant reads."""
+        @callback
+        def update(probe_data: DecodedProbeData):
+            """Handle an instant read from a predictive probe.
+
+            Listeners are notified right away, without any batching, so the instant read is shown as it happens.
+            """
+            serial_number = probe_data.serial_number
+            now = MONOTONIC_TIME()
+            if self.availability.seen(serial_number, now) and self._expiry_timer is None:
+                self._schedule_expiry()
+
+            # Entities are created from normal readings, as an instant read only carries a single temperature,
+            # so instant reads of a probe are dropped until it has been received in normal mode.
+            if serial_number not in self._known_serial_numbers:
+                _LOGGER.debug("Dropping instant read of [%s], which has not been received in normal mode yet", serial_number)
+                return
 
-            _LOGGER.debug("Notifying listeners of new data for [%s]", probe_data.serial_number)
-            for listener in self._listeners:
-                listener()
+            temperature = probe_data.advertising_data.temperatures[0]
+            previous = self.instant_reads.get(serial_number)
+            self.instant_reads[serial_number] = InstantRead(temperature, now)
+            if previous is None:
+                self._schedule_instant_read_expiry(serial_number, INSTANT_READ_TIMEOUT)
+            if previous is None or previous.temperature != temperature:
+                self._dispatch(serial_number, ProbeField.INSTANT_READ)
 
         return update
 
-    def add_update_listener(self, listener):
-        """Add listener to be notified of probe updates."""
-        self._listeners.append(listener)
+    @callback
+    def _schedule_instant_read_expiry(self, serial_number: str, delay: float) -> None:
+        """Schedule the instant read of a probe to be cleared once no longer received."""
+
+        @callback
+        def _async_expire_instant_read(_now: datetime) -> None:
+            instant_read = self.instant_reads[serial_number]
+            remaining = instant_read.time + INSTANT_READ_TIMEOUT - MONOTONIC_TIME()
+            if remaining > 0:
+                self._schedule_instant_read_expiry(serial_number, remaining)
+                return
+
+            del self._instant_read_timers[serial_number]
+            del self.instant_reads[serial_number]
+            self._dispatch(serial_number, ProbeField.INSTANT_READ)
+
+        self._instant_read_timers[serial_number] = async_call_later(self.hass, delay, _async_expire_instant_read)
+
+    def _update(self, previous: DecodedProbeData | None, probe_data: DecodedProbeData) -> None:
+        """Store a reading and notify listeners of the fields which changed."""
+        serial_number = probe_data.serial_number
+        changed = changed_fields(previous, probe_data)
+        if self._store(probe_data):
+            changed |= ProbeField.SESSION
+
+        if changed:
+            self._dispatch(serial_number, changed)
+
+    def _store(self, probe_data: DecodedProbeData) -> bool:
+        """Store a reading as the latest reading of its probe, in its history, its core temperature trend and its cook session.
+
+        Returns True when a cook session started or ended.
+        """
+        serial_number = probe_data.serial_number
+        self.data[serial_number] = probe_data
+        now = time.time()
+        history = self.history.get(serial_number)
+        if history is None:
+            history = self.history[serial_number] = ProbeHistory()
+        # The wall clock can step back, which the binary search of the history does not expect.
+        history.append(MONOTONIC_TIME(), probe_data)
+
+        advertising_data = probe_data.advertising_data
+        temperatures = advertising_data.temperatures
+        self.predictor(serial_number).add(now, temperatures[advertising_data.core_index])
+        if self.statistics_mode:
+            self.statistics.get(serial_number).add(
+                now,
+                temperatures[advertising_data.core_index],
+                temperatures[advertising_data.surface_index],
+                temperatures[advertising_data.ambient_index],
+            )
+        return self.sessions.update(
+            serial_number,
+            now,
+            temperatures,
+            temperatures[advertising_data.core_index],
+            temperatures[advertising_data.ambient_index],
+        )
+
+    def _queue_new_probe(self, probe_data: DecodedProbeData) -> None:
+        """Buffer a reading of a probe without entities, and schedule the creation of its entities.
+
+        Entities are created by a background task rather than in the Bluetooth callback, so a burst
+        of probes showing up at once is added in a single batch per platform.
+        """
+        _LOGGER.debug("Queueing new device [%s]", probe_data.serial_number)
+        self._pending[probe_data.serial_number] = [probe_data]
+        if self._discovery_task is None:
+            self._discovery_task = self.hass.async_create_task(self._async_discovery())
+
+    async def _async_discovery(self) -> None:
+        """Add entities for newly discovered probes, in batches."""
+        try:
+            while self._pending:
+                await asyncio.sleep(DISCOVERY_BATCH_DELAY)
+                await self.async_add_pending_probes()
+        finally:
+            self._discovery_task = None
+
+    async def async_add_pending_probes(self) -> None:
+        """Add entities for every queued probe, then replay the readings buffered in the meantime.
+
+        The batch is taken off the queue first, so a batch whose entities fail to be added is dropped
+        rather than retried.
+        """
+        if not self._pending:
+            return
+
+        self._adding, self._pending = self._pending, {}
+        serial_numbers = list(self._adding)
+        first_readings = [self._adding[serial_number][0] for serial_number in serial_numbers]
+        _LOGGER.debug("Adding sensors for %s new device(s) [%s]", len(serial_numbers), ", ".join(serial_numbers))
+
+        # Entities render their initial state from the first reading as they are added.
+        for probe_data in first_readings:
+            self._store(probe_data)
+            self._known_serial_numbers.add(probe_data.serial_number)
+        try:
+            await asyncio.gather(
+                self.create_sensors_callback(self, first_readings),
+                self.create_binary_sensors_callback(self, first_readings),
+                self.create_numbers_callback(self, first_readings),
+            )
+        except Exception:
+            _LOGGER.exception("Error adding sensors for [%s]", ", ".join(serial_numbers))
+            self._adding = {}
+            return
+
+        # Readings received while the entities were being added are replayed in order.
+        adding, self._adding = self._adding, {}
+        for serial_number in serial_numbers:
+            for probe_data in adding.get(serial_number, ())[1:]:
+                self._update(self.data[serial_number], probe_data)
+
+    @callback
+    def _schedule_expiry(self) -> None:
+        """Schedule the shared timer for the next probe which may expire."""
+        deadline = self.availability.next_deadline()
+        if deadline is None:
+            self._expiry_timer = None
+            return
+        self._expiry_timer = async_call_later(self.hass, max(0, deadline - MONOTONIC_TIME()), self._async_expire)
+
+    @callback
+    def _async_expire(self, _now: datetime) -> None:
+        """Mark probes which have not been seen within the timeout unavailable, and evict their data."""
+        for serial_number in self.availability.pop_expired(MONOTONIC_TIME()):
+            _LOGGER.debug("Device [%s] not seen for %s seconds, marking unavailable", serial_number, self.availability.timeout)
+            self._evict(serial_number)
+            self.bluetooth_listener.forget_probe(serial_number)
+            self._dispatch(serial_number, ProbeField.AVAILABILITY)
+        self._schedule_expiry()
+
+    def _evict(self, serial_number: str) -> None:
+        """Drop the readings kept for a probe which is no longer received.
+
+        The entities of the probe are kept while it is unavailable, so some of its state is kept too:
+        - its predictor, whose target is set by the target number entity, only forgets its readings,
+        - the change detection counters, keyed by entity,
+        - its statistics, so readings of the current hour received once it is back are aggregated
+          with the ones already imported, and at most `MAX_HOURS` hours are kept,
+        - its cook sessions, which end after `SESSION_TIMEOUT` seconds without readings, and at most
+          `SESSION_HISTORY_SIZE` past sessions are kept.
+        """
+        self.data.pop(serial_number, None)
+        self.history.pop(serial_number, None)
+        if (predictor := self.predictors.get(serial_number)) is not None:
+            predictor.reset()
+        self.instant_reads.pop(serial_number, None)
+        if (cancel := self._instant_read_timers.pop(serial_number, None)) is not None:
+            cancel()
+
+    def predictor(self, serial_number: str) -> CorePredictor:
+        """Core temperature trend of the provided probe."""
+        predictor = self.predictors.get(serial_number)
+        if predictor is None:
+            predictor = self.predictors[serial_number] = CorePredictor()
+        return predictor
+
+    @callback
+    def set_target_temperature(self, serial_number: str, target: float | None) -> None:
+        """Set the core temperature the provided probe is cooking to."""
+        self.predictor(serial_number).target = target
+        self._dispatch(serial_number, ProbeField.PREDICTION)
+
+    def is_available(self, serial_number: str) -> bool:
+        """Determine if data was received from the probe within the availability timeout."""
+        return serial_number in self.data
+
+    def _dispatch(self, serial_number: str, changed: ProbeField) -> None:
+        """Notify listeners subscribed to the probe and fields which changed."""
+        for key in (serial_number, None):
+            listeners = self._listeners.get(key)
+            if not listeners:
+                continue
+            for (listener, fields) in tuple(listeners):
+                if fields & changed:
+                    listener()
+
+    def add_update_listener(
+        self,
+        listener: Callable[[], None],
+        serial_number: str | None = None,
+        fields: ProbeField = ProbeField.ALL,
+    ) -> CALLBACK_TYPE:
+        """Add listener to be notified of probe updates.
+
+        When `serial_number` is provided, the listener is only notified of updates for that probe.
+        The listener is only notified when at least one of the requested `fields` changed.
+        Returns a callable which removes the listener.
+        """
+        entry = (listener, fields)
+        listeners = self._listeners.setdefault(serial_number, [])
+        listeners.append(entry)
+
+        @callback
+        def remove_listener() -> None:
+            listeners.remove(entry)
+            if not listeners:
+                self._listeners.pop(serial_number, None)
+
+        return remove_listener
+
+    def publish_stats_for(self, unique_id: str) -> PublishStats:
+        """Change detection counters for the provided entity."""
+        return self.publish_stats.setdefault(unique_id, PublishStats())
+
+    def publish_stats_total(self) -> PublishStats:
+        """Change detection counters summed over all entities."""
+        total = PublishStats()
+        for stats in self.publish_stats.values():
+            total.published += stats.published
+            total.suppressed += stats.suppressed
+            total.coalesced += stats.coalesced
+        return total
 
-    def probe_data(self, serial_number: str) -> CombustionProbeData:
+    def probe_data(self, serial_number: str) -> DecodedProbeData:
         """Probe data for provided serial number."""
         return self.data[serial_number]
@@ -0,0 +1,164 @@
+"""Streaming statistics of the advertisements received for each probe."""
+from __future__ import annotations
+
+import math
+from array import array
+from bisect import bisect_left
+from typing import Any
+
+from custom_components.combustion.combustion_ble.decoder import DecodedProbeData
+from custom_components.combustion.combustion_ble.hop_count import HopCount
+
+# Packet rates are reported over these windows, in seconds. The longest sets the size of the per-second counters.
+RATE_WINDOWS = (10, 60, 300)
+
+# Upper bounds of the inter-arrival histogram buckets, in milliseconds. A last bucket holds anything slower.
+# Probes advertise about 4 times per second, so most packets arrive 250 ms apart, or less through repeaters.
+INTER_ARRIVAL_BUCKETS_MS = (50, 100, 200, 300, 500, 1_000, 2_000, 5_000, 10_000, 30_000)
+
+# Relay addresses counted separately. Packets from any further address are counted together.
+MAX_RELAY_ADDRESSES = 16
+OTHER_ADDRESSES = 'other'
+
+
+class ProbeStats:
+    """Packet rate, inter-arrival jitter and relay paths of a probe, in constant memory.
+
+    Packets are counted in a ring of per-second counters covering the longest rate window.
+    Inter-arrival times feed a fixed-bucket histogram and a running mean and variance (Welford).
+    Packets are counted per relay address, up to `MAX_RELAY_ADDRESSES`, and per hop count.
+    """
+
+    __slots__ = (
+        'packets',
+        'last_probe_data',
+        'first_seen',
+        'last_seen',
+        '_seconds',
+        '_second',
+        '_inter_arrival_counts',
+        '_inter_arrival_mean',
+        '_inter_arrival_m2',
+        '_intervals',
+        'addresses',
+        'hop_counts',
+    )
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.packets = 0
+        self.last_probe_data: DecodedProbeData | None = None
+        self.first_seen: float | None = None
+        self.last_seen: float | None = None
+        self._seconds = array('I', bytes(4 * RATE_WINDOWS[-1]))
+        # Latest second counted in `_seconds`.
+        self._second = 0
+        self._inter_arrival_counts = [0] * (len(INTER_ARRIVAL_BUCKETS_MS) + 1)
+        self._inter_arrival_mean = 0.0
+        self._inter_arrival_m2 = 0.0
+        self._intervals = 0
+        self.addresses: dict[str, int] = {}
+        self.hop_counts: dict[HopCount, int] = {}
+
+    def record(self, probe_data: DecodedProbeData, now: float) -> None:
+        """Record a packet received at `now` (monotonic seconds)."""
+        self.packets += 1
+        self.last_probe_data = probe_data
+
+        last_seen = self.last_seen
+        if last_seen is None:
+            self.first_seen = now
+            self._second = int(now)
+        else:
+            interval = now - last_seen
+            self._inter_arrival_counts[bisect_left(INTER_ARRIVAL_BUCKETS_MS, interval * 1000)] += 1
+            self._intervals += 1
+            delta = interval - self._inter_arrival_mean
+            self._inter_arrival_mean += delta / self._intervals
+            self._inter_arrival_m2 += delta * (interval - self._inter_arrival_mean)
+        self.last_seen = now
+
+        second = int(now)
+        if second != self._second:
+            self._advance(second)
+        self._seconds[self._second % RATE_WINDOWS[-1]] += 1
+
+        address = probe_data.address
+        addresses = self.addresses
+        if address in addresses:
+            addresses[address] += 1
+        elif len(addresses) < MAX_RELAY_ADDRESSES:
+            addresses[address] = 1
+        else:
+            addresses[OTHER_ADDRESSES] = addresses.get(OTHER_ADDRESSES, 0) + 1
+
+        hop_count = probe_data.advertising_data.hop_count
+        self.hop_counts[hop_count] = self.hop_counts.get(hop_count, 0) + 1
+
+    def _advance(self, second: int) -> None:
+        """Move the per-second counters forward to `second`, clearing the seconds skipped."""
+        seconds = self._seconds
+        size = len(seconds)
+        if second <= self._second:
+            return
+        for skipped in range(self._second + 1, min(second, self._second + size) + 1):
+            seconds[skipped % size] = 0
+        self._second = second
+
+    def packet_rate(self, window: int, now: float) -> float | None:
+        """Packets per second over the last `window` complete seconds before `now`."""
+        if self.first_seen is None:
+            return None
+        self._advance(int(now))
+        # Only seconds since the first packet count towards the window.
+        window = min(window, self._second - int(self.first_seen))
+        if window <= 0:
+            return None
+        seconds = self._seconds
+        size = len(seconds)
+        return sum(seconds[second % size] for second in range(self._second - window, self._second)) / window
+
+    @property
+    def inter_arrival_mean(self) -> float | None:
+        """Mean time between packets, in seconds."""
+        return self._inter_arrival_mean if self._intervals else None
+
+    @property
+    def inter_arrival_stdev(self) -> float | None:
+        """Standard deviation of the time between packets (jitter), in seconds."""
+        return math.sqrt(self._inter_arrival_m2 / (self._intervals - 1)) if self._intervals > 1 else None
+
+    def as_dict(self, now: float) -> dict[str, Any]:
+        """Convert to a dictionary."""
+        probe_data = self.last_probe_data
+        inter_arrival_buckets = {
+            f'le_{bound}ms': count for (bound, count) in zip(INTER_ARRIVAL_BUCKETS_MS, self._inter_arrival_counts, strict=False)
+        }
+        inter_arrival_buckets[f'gt_{INTER_ARRIVAL_BUCKETS_MS[-1]}ms'] = self._inter_arrival_counts[-1]
+        mean = self.inter_arrival_mean
+        stdev = self.inter_arrival_stdev
+        return {
+            'packets': self.packets,
+            'seconds_since_last_packet': round(now - self.last_seen, 1) if self.last_seen is not None else None,
+            'packet_rates': {
+                f'{window}s': None if (rate := self.packet_rate(window, now)) is None else round(rate, 2)
+                for window in RATE_WINDOWS
+            },
+            'inter_arrival': {
+                'mean_ms': None if mean is None else round(mean * 1000, 1),
+                'stdev_ms': None if stdev is None else round(stdev * 1000, 1),
+                'buckets': inter_arrival_buckets,
+            },
+            'addresses': _shares(self.addresses, self.packets),
+            'hop_counts': _shares({hop_count.name: count for (hop_count, count) in self.hop_counts.items()}, self.packets),
+            'last_data': None if probe_data is None else {**probe_data.to_dict(), 'mode': probe_data.mode.name},
+            'last_payload': None if probe_data is None else probe_data.advertising_data.payload.hex(),
+        }
+
+
+def _shares(counts: dict[str, int], total: int) -> dict[str, dict[str, float]]:
+    """Packets counted per key, and their share of all packets."""
+    return {
+        key: {'packets': count, 'share': round(count / total, 3)}
+        for (key, count) in sorted(counts.items(), key=lambda item: -item[1])
+    }
@@ -0,0 +1,126 @@
+"""Choose the Bluetooth scanning mode requested for Combustion advertisements."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.bluetooth import BluetoothScanningMode
+
+from custom_components.combustion.const import (
+    LOGGER,
+    SCANNING_MODE_ACTIVE,
+    SCANNING_MODE_PASSIVE,
+)
+
+_LOGGER = LOGGER.getChild('scanning')
+
+# Seconds after setup during which adaptive scanning stays active, so the whole Meatnet is discovered quickly.
+DISCOVERY_DURATION = 120
+
+# Adaptive scanning switches to active while any probe is received less often than this (packets per second).
+MIN_PACKET_RATE = 0.5
+
+# Seconds between evaluations of the scanning mode. Packet rates are measured over this window.
+EVALUATION_INTERVAL = 30
+
+
+class ScanningModeStats:
+    """Packets received, and time spent handling them, while a scanning mode was requested."""
+
+    __slots__ = ('packets', 'callback_time', 'duration')
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.packets = 0
+        self.callback_time = 0.0
+        self.duration = 0.0
+
+    def as_dict(self, duration: float) -> dict[str, Any]:
+        """Convert to a dictionary, using `duration` as the total time spent in the mode."""
+        return {
+            'packets': self.packets,
+            'duration_s': round(duration, 1),
+            'packets_per_second': round(self.packets / duration, 2) if duration else None,
+            'callback_time_ms': round(self.callback_time * 1e3, 1),
+            'callback_time_per_packet_us': round(self.callback_time * 1e6 / self.packets, 1) if self.packets else None,
+            'callback_cpu_share': round(self.callback_time / duration, 6) if duration else None,
+        }
+
+
+class ScanningModeController:
+    """Choose the scanning mode requested for Combustion advertisements.
+
+    The Combustion payload is carried in manufacturer data, which passive scans deliver. Active scanning
+    sends a scan request for every advertisement, so the adaptive setting only requests it while it
+    helps: during discovery right after setup, and while a probe is heard less than `MIN_PACKET_RATE`.
+    A probe which was heard before counts as 0 packets per second while silent, until it is forgotten
+    once it is unavailable.
+    """
+
+    def __init__(self, setting: str, now: float) -> None:
+        """Initialize."""
+        self.setting = setting
+        self.discovery_until = now + DISCOVERY_DURATION
+        self.mode = self._choose_mode(now, {})
+        self.packet_rates: dict[str, float] = {}
+        self.stats = {mode: ScanningModeStats() for mode in BluetoothScanningMode}
+        self._mode_since = now
+        self._window_start = now
+        self._packet_counts: dict[str, int] = {}
+
+    def record_packet(self, serial_number: str | None, callback_time: float) -> None:
+        """Record a received advertisement, and the time spent handling it."""
+        if serial_number is not None:
+            self._packet_counts[serial_number] = self._packet_counts.get(serial_number, 0) + 1
+        stats = self.stats[self.mode]
+        stats.packets += 1
+        stats.callback_time += callback_time
+
+    def evaluate(self, now: float) -> bool:
+        """Measure the packet rate of each probe, and choose the scanning mode. Returns True if the mode changed."""
+        elapsed = now - self._window_start
+        if elapsed > 0:
+            self.packet_rates = {
+                **dict.fromkeys(self.packet_rates, 0.0),
+                **{serial_number: count / elapsed for (serial_number, count) in self._packet_counts.items()},
+            }
+        self._packet_counts = {}
+        self._window_start = now
+
+        mode = self._choose_mode(now, self.packet_rates)
+        if mode is self.mode:
+            return False
+
+        _LOGGER.debug("Switching from %s to %s scanning", self.mode.value, mode.value)
+        self.stats[self.mode].duration += now - self._mode_since
+        self._mode_since = now
+        self.mode = mode
+        return True
+
+    def forget(self, serial_number: str) -> None:
+        """Stop measuring the packet rate of a probe which is no longer received."""
+        self.packet_rates.pop(serial_number, None)
+        self._packet_counts.pop(serial_number, None)
+
+    def _choose_mode(self, now: float, packet_rates: dict[str, float]) -> BluetoothScanningMode:
+        """Choose the scanning mode for the current conditions."""
+        if self.setting == SCANNING_MODE_ACTIVE:
+            return BluetoothScanningMode.ACTIVE
+        if self.setting == SCANNING_MODE_PASSIVE:
+            return BluetoothScanningMode.PASSIVE
+        if now < self.discovery_until:
+            return BluetoothScanningMode.ACTIVE
+        if any(rate < MIN_PACKET_RATE for rate in packet_rates.values()):
+            return BluetoothScanningMode.ACTIVE
+        return BluetoothScanningMode.PASSIVE
+
+    def as_dict(self, now: float) -> dict[str, Any]:
+        """Convert to a dictionary."""
+        return {
+            'setting': self.setting,
+            'mode': self.mode.value,
+            'packet_rates': {serial_number: round(rate, 2) for (serial_number, rate) in self.packet_rates.items()},
+            'modes': {
+                mode.value: stats.as_dict(stats.duration + (now - self._mode_since if mode is self.mode else 0))
+                for (mode, stats) in self.stats.items()
+            },
+        }
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 from collections.abc import Mapping
+from datetime import datetime
 from typing import Any
 
 from homeassistant.components.sensor import (
@@ -11,19 +12,41 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import SIGNAL_STRENGTH_DECIBELS_MILLIWATT, UnitOfTemperature
+from homeassistant.const import (
+    SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
+    UnitOfTemperature,
+    UnitOfTime,
+)
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.entity import EntityPlatformState
+from homeassistant.helpers import entity_platform
+from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util import dt as dt_util
 from sensor_state_data import Units
 
-from custom_components.combustion.combustion_ble.combustion_probe_data import (
-    CombustionProbeData,
-)
+from custom_components.combustion.combustion_ble.decoder import DecodedProbeData
 from custom_components.combustion.entity import CombustionEntity
-from custom_components.combustion.probe_manager import ProbeManager
-
-from .const import DOMAIN, LOGGER
+from custom_components.combustion.instrumentation import STAGE_BT_CALLBACK
+from custom_components.combustion.probe_manager import ProbeField, ProbeManager
+
+from .const import (
+    CONF_RAW_ADVERTISEMENT_ATTRIBUTE,
+    CONF_RSSI_DEADBAND,
+    CONF_RSSI_INTERVAL,
+    CONF_TEMPERATURE_DEADBAND,
+    CONF_THERMISTOR_INTERVAL,
+    CONF_VIRTUAL_SENSOR_INTERVAL,
+    DEFAULT_RSSI_DEADBAND,
+    DEFAULT_RSSI_INTERVAL,
+    DEFAULT_TEMPERATURE_DEADBAND,
+    DEFAULT_THERMISTOR_INTERVAL,
+    DEFAULT_VIRTUAL_SENSOR_INTERVAL,
+    DOMAIN,
+    LOGGER,
+    MANUFACTURER,
+    MEATNET_DEVICE_NAME,
+)
 
 _LOGGER = LOGGER.getChild('sensor')
 
@@ -44,6 +67,67 @@ TEMPERATURE_SENSOR_DESCRIPTION = SensorEntityDescription(
     entity_registry_enabled_default=False,
 )
 
+CORE_RATE_SENSOR_DESCRIPTION = SensorEntityDescription(
+    key="core_rate",
+    icon="mdi:thermometer-chevron-up",
+    native_unit_of_measurement=f"{UnitOfTemperature.CELSIUS}/{UnitOfTime.MINUTES}",
+    state_class=SensorStateClass.MEASUREMENT,
+    suggested_display_precision=2,
+)
+
+TIME_TO_TARGET_SENSOR_DESCRIPTION = SensorEntityDescription(
+    key="time_to_target",
+    device_class=SensorDeviceClass.DURATION,
+    native_unit_of_measurement=UnitOfTime.MINUTES,
+    suggested_display_precision=0,
+)
+
+ESTIMATED_DONE_SENSOR_DESCRIPTION = SensorEntityDescription(
+    key="estimated_done",
+    device_class=SensorDeviceClass.TIMESTAMP,
+)
+
+COOK_SESSION_SENSOR_DESCRIPTION = SensorEntityDescription(
+    key="cook_session",
+    icon="mdi:grill",
+    device_class=SensorDeviceClass.ENUM,
+    options=['idle', 'cooking'],
+)
+
+# Minimum seconds between published predictions, and minimum changes before they are published.
+PREDICTION_INTERVAL = 30
+CORE_RATE_DEADBAND = 0.05
+TIME_TO_TARGET_DEADBAND = 1
+
+PIPELINE_COUNTER_SENSOR_DESCRIPTIONS = tuple(
+    SensorEntityDescription(
+        key=key,
+        name=name,
+        icon='mdi:counter',
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    )
+    for (key, name) in (
+        ('packets', 'Packets received'),
+        ('invalid', 'Invalid packets'),
+        ('instant_reads', 'Instant read packets'),
+        ('secondary_sources', 'Packets from secondary scanners'),
+        ('duplicates', 'Duplicate packets'),
+        ('state_writes', 'State writes'),
+    )
+)
+
+PIPELINE_LATENCY_SENSOR_DESCRIPTION = SensorEntityDescription(
+    key='bt_callback_p95',
+    name='Advertisement handling time (p95)',
+    device_class=SensorDeviceClass.DURATION,
+    native_unit_of_measurement=UnitOfTime.MICROSECONDS,
+    state_class=SensorStateClass.MEASUREMENT,
+    entity_category=EntityCategory.DIAGNOSTIC,
+    entity_registry_enabled_default=False,
+)
+
 RSSI_SENSOR_DESCRIPTION = SensorEntityDescription(
     key=f"{SensorDeviceClass.SIGNAL_STRENGTH}_{Units.SIGNAL_STRENGTH_DECIBELS_MILLIWATT}",
     device_class=SensorDeviceClass.SIGNAL_STRENGTH,
@@ -82,7 +166,7 @@ SENSOR_DESCRIPTIONS = {
     ),
 }
 
-def _create_temperature_sensors(probe_manager: ProbeManager, probe_data: CombustionProbeData):
+def _create_temperature_sensors(probe_manager: ProbeManager, probe_data: DecodedProbeData):
     sensors: list[BaseCombustionTemperatureSensor] = [
         CombustionVirtualCoreSensor(probe_manager, probe_data),
         CombustionVirtualSurfaceSensor(probe_manager, probe_data),
@@ -91,18 +175,44 @@ def _create_temperature_sensors(probe_manager: ProbeManager, probe_data: Combust
     for i in range(len(probe_data.temperature_data)):
         sensors.append(CombustionTemperatureSensor(probe_manager, probe_data, i + 1))
 
-    for sensor in sensors:
-        sensor.async_init()
+    return sensors
+
+def _create_instant_read_sensors(probe_manager: ProbeManager, probe_data: DecodedProbeData):
+    sensors: list[CombustionEntity] = [
+        CombustionInstantReadSensor(probe_manager, probe_data),
+    ]
+
+    return sensors
+
+def _create_prediction_sensors(probe_manager: ProbeManager, probe_data: DecodedProbeData):
+    sensors: list[CombustionEntity] = [
+        CombustionCoreRateSensor(probe_manager, probe_data),
+        CombustionTimeToTargetSensor(probe_manager, probe_data),
+        CombustionEstimatedDoneSensor(probe_manager, probe_data),
+    ]
 
     return sensors
 
-def _create_diagnostic_sensors(probe_manager: ProbeManager, probe_data: CombustionProbeData):
+def _create_session_sensors(probe_manager: ProbeManager, probe_data: DecodedProbeData):
+    sensors: list[CombustionEntity] = [
+        CombustionCookSessionSensor(probe_manager, probe_data),
+    ]
+
+    return sensors
+
+def _create_diagnostic_sensors(probe_manager: ProbeManager, probe_data: DecodedProbeData):
     sensors: list[CombustionEntity] = [
         CombustionRSSISensor(probe_manager, probe_data)
     ]
 
-    for sensor in sensors:
-        sensor.async_init()
+    return sensors
+
+def _create_pipeline_sensors(probe_manager: ProbeManager, entry: ConfigEntry):
+    sensors: list[SensorEntity] = [
+        CombustionPipelineCounterSensor(probe_manager, entry, description)
+        for description in PIPELINE_COUNTER_SENSOR_DESCRIPTIONS
+    ]
+    sensors.append(CombustionPipelineLatencySensor(probe_manager, entry, PIPELINE_LATENCY_SENSOR_DESCRIPTION))
 
     return sensors
 
@@ -110,46 +220,83 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
     """Set up the sensor platform."""
     _LOGGER.debug("Starting async_setup_entry")
 
-    def _create_sensors_callback(pm: ProbeManager, probe_data: CombustionProbeData):
-        sensors = _create_temperature_sensors(pm, probe_data)
-        sensors.extend(_create_diagnostic_sensors(pm, probe_data))
-        async_add_entities(sensors)
+    platform = entity_platform.async_get_current_platform()
+
+    async def _async_create_sensors(pm: ProbeManager, batch: list[DecodedProbeData]):
+        sensors = []
+        for probe_data in batch:
+            sensors.extend(_create_temperature_sensors(pm, probe_data))
+            sensors.extend(_create_instant_read_sensors(pm, probe_data))
+            sensors.extend(_create_prediction_sensors(pm, probe_data))
+            sensors.extend(_create_session_sensors(pm, probe_data))
+            sensors.extend(_create_diagnostic_sensors(pm, probe_data))
+        await platform.async_add_entities(sensors)
 
     probe_manager: ProbeManager = hass.data[DOMAIN]
-    probe_manager.init_sensor_platform(_create_sensors_callback)
+    probe_manager.init_sensor_platform(_async_create_sensors)
+    async_add_entities(_create_pipeline_sensors(probe_manager, entry))
+
+class BaseCombustionPipelineSensor(SensorEntity):
+    """Base class for diagnostic sensors of the advertisement pipeline, shared by all probes.
+
+    These change with every advertisement, so they are polled rather than written on every update.
+    """
+
+    _attr_has_entity_name = True
+    _attr_should_poll = True
+
+    def __init__(self, probe_manager: ProbeManager, entry: ConfigEntry, description: SensorEntityDescription) -> None:
+        """Initialize."""
+        self.probe_manager = probe_manager
+        self.entity_description = description
+        self._attr_unique_id = f'{entry.entry_id}--pipeline--{description.key}'
+        self._attr_device_info = DeviceInfo(
+            name=MEATNET_DEVICE_NAME,
+            identifiers={(DOMAIN, entry.entry_id)},
+            manufacturer=MANUFACTURER,
+            entry_type=DeviceEntryType.SERVICE,
+        )
+
+class CombustionPipelineCounterSensor(BaseCombustionPipelineSensor):
+    """Number of advertisements or state writes counted by the pipeline."""
+
+    @property
+    def native_value(self) -> int:
+        """Return the native value of the sensor."""
+        return getattr(self.probe_manager.instrumentation, self.entity_description.key)
+
+class CombustionPipelineLatencySensor(BaseCombustionPipelineSensor):
+    """95th percentile of the time spent in the Bluetooth callback, when latency histograms are collected."""
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the native value of the sensor."""
+        histogram = self.probe_manager.instrumentation.histograms[STAGE_BT_CALLBACK]
+        percentile = histogram.percentile(95)
+        return None if percentile is None else percentile / 1000
 
 class CombustionRSSISensor(CombustionEntity, SensorEntity):
     """RSSI diagnostic sensor."""
 
-    def __init__(self, probe_manager: ProbeManager, probe_data: CombustionProbeData) -> None:
+    _update_fields = ProbeField.RSSI
+
+    def __init__(self, probe_manager: ProbeManager, probe_data: DecodedProbeData) -> None:
         """Initialize."""
-        super().__init__(probe_data.serial_number)
-        self.device_serial_number = probe_data.serial_number
-        self.probe_manager = probe_manager
+        super().__init__(probe_manager, probe_data.serial_number)
         self._attr_has_entity_name = True
         self._attr_unique_id = f'{probe_data.serial_number}--rssi'
         self.entity_description = RSSI_SENSOR_DESCRIPTION
-
-    def async_init(self):
-        """Async initialization."""
-        self.probe_manager.add_update_listener(self.on_update)
-
-    @property
-    def should_poll(self) -> bool:
-        """Do not poll for updates."""
-        return False
+        self._publish_deadband = probe_manager.options.get(CONF_RSSI_DEADBAND, DEFAULT_RSSI_DEADBAND)
+        self._publish_interval = probe_manager.options.get(CONF_RSSI_INTERVAL, DEFAULT_RSSI_INTERVAL)
 
     @property
     def name(self):
         """Sensor name."""
         return 'RSSI'
 
-    @callback
-    def on_update(self):
-        """Process probe updates."""
-        _LOGGER.debug("Sensor [%s] with state [%s] has been notified of an update", self.unique_id, self._platform_state)
-        if self._platform_state == EntityPlatformState.ADDED:
-            self.async_schedule_update_ha_state()
+    def _publish_value(self):
+        """Value compared against the last published state."""
+        return self.native_value
 
     @property
     def native_value(self) -> str:
@@ -163,32 +310,33 @@ class CombustionRSSISensor(CombustionEntity, SensorEntity):
 class BaseCombustionTemperatureSensor(CombustionEntity, SensorEntity):
     """Base class for temperature sensors."""
 
-    def __init__(self, probe_manager: ProbeManager, probe_data: CombustionProbeData) -> None:
+    _update_fields = ProbeField.TEMPERATURES
+
+    def __init__(self, probe_manager: ProbeManager, probe_data: DecodedProbeData) -> None:
         """Initialize."""
-        super().__init__(probe_data.serial_number)
-        self.device_serial_number = probe_data.serial_number
-        self.probe_manager = probe_manager
+        super().__init__(probe_manager, probe_data.serial_number)
         self._attr_has_entity_name = True
-
-    def async_init(self):
-        """Async initialization."""
-        self.probe_manager.add_update_listener(self.on_update)
-
-    @callback
-    def on_update(self):
-        """Process probe updates."""
-        _LOGGER.debug("Sensor [%s] has been notified of an update", self.unique_id)
-        if self._platform_state == EntityPlatformState.ADDED:
-            self.async_schedule_update_ha_state()
-
-    @property
-    def should_poll(self) -> bool:
-        """Do not poll for updates."""
-        return False
+        self._publish_deadband = probe_manager.options.get(CONF_TEMPERATURE_DEADBAND, DEFAULT_TEMPERATURE_DEADBAND)
+        self._publish_interval = probe_manager.options.get(CONF_VIRTUAL_SENSOR_INTERVAL, DEFAULT_VIRTUAL_SENSOR_INTERVAL)
+        self._raw_advertisement_attribute = probe_manager.options.get(CONF_RAW_ADVERTISEMENT_ATTRIBUTE, False)
+        # In statistics mode the integration imports the long-term statistics itself, so the recorder
+        # does not compile its own from the states, which can then be excluded from the recorder.
+        if probe_manager.statistics_mode:
+            self._attr_state_class = None
+
+    def _publish_value(self):
+        """Value compared against the last published state."""
+        return self.native_value
 
     @property
     def extra_state_attributes(self) -> Mapping[str, Any] | None:
-        """State attributes."""
+        """State attributes.
+
+        The raw advertisement is a diagnostics aid, and is only included when enabled in the options.
+        """
+        if not self._raw_advertisement_attribute:
+            return None
+
         try:
             raw_bytes = self.probe_manager.probe_data(self.device_serial_number).advertising_data.bit_string
         except Exception as ex:
@@ -202,11 +350,12 @@ class BaseCombustionTemperatureSensor(CombustionEntity, SensorEntity):
 class CombustionTemperatureSensor(BaseCombustionTemperatureSensor):
     """Combustion Temperature Sensor class."""
 
-    def __init__(self, probe_manager: ProbeManager, probe_data: CombustionProbeData, thermistor_id: int) -> None:
+    def __init__(self, probe_manager: ProbeManager, probe_data: DecodedProbeData, thermistor_id: int) -> None:
         """Initialize."""
         super().__init__(probe_manager, probe_data)
         self.thermistor_id = thermistor_id
         self._attr_unique_id = f'{probe_data.serial_number}--thermistor--{thermistor_id}'
+        self._publish_interval = probe_manager.options.get(CONF_THERMISTOR_INTERVAL, DEFAULT_THERMISTOR_INTERVAL)
         self.entity_description = TEMPERATURE_SENSOR_DESCRIPTION
 
     @property
@@ -222,7 +371,7 @@ class CombustionTemperatureSensor(BaseCombustionTemperatureSensor):
 class CombustionVirtualCoreSensor(BaseCombustionTemperatureSensor):
     """Combustion virtual core sensor class."""
 
-    def __init__(self, probe_manager: ProbeManager, probe_data: CombustionProbeData) -> None:
+    def __init__(self, probe_manager: ProbeManager, probe_data: DecodedProbeData) -> None:
         """Initialize."""
         super().__init__(probe_manager, probe_data)
         self._attr_unique_id = f'{probe_data.serial_number}--sensor--core'
@@ -259,7 +408,7 @@ class CombustionVirtualCoreSensor(BaseCombustionTemperatureSensor):
 class CombustionVirtualAmbientSensor(BaseCombustionTemperatureSensor):
     """Combustion virtual ambient sensor class."""
 
-    def __init__(self, probe_manager: ProbeManager, probe_data: CombustionProbeData) -> None:
+    def __init__(self, probe_manager: ProbeManager, probe_data: DecodedProbeData) -> None:
         """Initialize."""
         super().__init__(probe_manager, probe_data)
         self._attr_unique_id = f'{probe_data.serial_number}--sensor--ambient'
@@ -297,7 +446,7 @@ class CombustionVirtualAmbientSensor(BaseCombustionTemperatureSensor):
 class CombustionVirtualSurfaceSensor(BaseCombustionTemperatureSensor):
     """Combustion virtual surface sensor class."""
 
-    def __init__(self, probe_manager: ProbeManager, probe_data: CombustionProbeData) -> None:
+    def __init__(self, probe_manager: ProbeManager, probe_data: DecodedProbeData) -> None:
         """Initialize."""
         super().__init__(probe_manager, probe_data)
         self._attr_unique_id = f'{probe_data.serial_number}--sensor--surface'
@@ -331,3 +480,167 @@ class CombustionVirtualSurfaceSensor(BaseCombustionTemperatureSensor):
         return {
             "thermistor_id": thermistor_id
         }
+
+class CombustionInstantReadSensor(CombustionEntity, SensorEntity):
+    """Tip temperature of a probe in instant read mode.
+
+    Every change is written right away, without deadband, interval or waiting for the next flush,
+    so spot checks show up as they happen. Nothing is written while the probe is not in instant
+    read mode.
+    """
+
+    _update_fields = ProbeField.INSTANT_READ
+
+    def __init__(self, probe_manager: ProbeManager, probe_data: DecodedProbeData) -> None:
+        """Initialize."""
+        super().__init__(probe_manager, probe_data.serial_number)
+        self._attr_has_entity_name = True
+        self._attr_unique_id = f'{probe_data.serial_number}--sensor--instant_read'
+        self.entity_description = VIRTUAL_TEMPERATURE_SENSOR_DESCRIPTION
+
+    @property
+    def name(self):
+        """Sensor name."""
+        return 'Instant Read'
+
+    @property
+    def available(self) -> bool:
+        """Return True if the probe is in instant read mode, or was seen within the availability timeout."""
+        return self.device_serial_number in self.probe_manager.instant_reads or super().available
+
+    def _publish_value(self):
+        """Value compared against the last published state."""
+        return self.native_value
+
+    @callback
+    def _async_schedule_write(self) -> None:
+        """Write the state right away."""
+        self._async_write_published_state()
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the native value of the sensor."""
+        instant_read = self.probe_manager.instant_reads.get(self.device_serial_number)
+        return None if instant_read is None else instant_read.temperature
+
+class BaseCombustionPredictionSensor(CombustionEntity, SensorEntity):
+    """Base class for sensors derived from the core temperature trend."""
+
+    _update_fields = ProbeField.TEMPERATURES | ProbeField.PREDICTION
+    _publish_interval = PREDICTION_INTERVAL
+
+    def __init__(self, probe_manager: ProbeManager, probe_data: DecodedProbeData) -> None:
+        """Initialize."""
+        super().__init__(probe_manager, probe_data.serial_number)
+        self._attr_has_entity_name = True
+        self.predictor = probe_manager.predictor(probe_data.serial_number)
+
+    def _publish_value(self):
+        """Value compared against the last published state."""
+        return self.native_value
+
+class CombustionCoreRateSensor(BaseCombustionPredictionSensor):
+    """Rate of change of the core temperature."""
+
+    _publish_deadband = CORE_RATE_DEADBAND
+
+    def __init__(self, probe_manager: ProbeManager, probe_data: DecodedProbeData) -> None:
+        """Initialize."""
+        super().__init__(probe_manager, probe_data)
+        self._attr_unique_id = f'{probe_data.serial_number}--prediction--core_rate'
+        self.entity_description = CORE_RATE_SENSOR_DESCRIPTION
+
+    @property
+    def name(self):
+        """Sensor name."""
+        return 'Core Rate of Change'
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the rate of change of the core temperature, in °C per minute."""
+        return self.predictor.rate
+
+class CombustionTimeToTargetSensor(BaseCombustionPredictionSensor):
+    """Predicted time until the core reaches the target temperature."""
+
+    _publish_deadband = TIME_TO_TARGET_DEADBAND
+
+    def __init__(self, probe_manager: ProbeManager, probe_data: DecodedProbeData) -> None:
+        """Initialize."""
+        super().__init__(probe_manager, probe_data)
+        self._attr_unique_id = f'{probe_data.serial_number}--prediction--time_to_target'
+        self.entity_description = TIME_TO_TARGET_SENSOR_DESCRIPTION
+
+    @property
+    def name(self):
+        """Sensor name."""
+        return 'Time to Target'
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the predicted minutes until the core reaches the target temperature."""
+        seconds = self.predictor.seconds_to_target()
+        return None if seconds is None else seconds / 60
+
+class CombustionEstimatedDoneSensor(BaseCombustionPredictionSensor):
+    """Predicted time at which the core reaches the target temperature."""
+
+    def __init__(self, probe_manager: ProbeManager, probe_data: DecodedProbeData) -> None:
+        """Initialize."""
+        super().__init__(probe_manager, probe_data)
+        self._attr_unique_id = f'{probe_data.serial_number}--prediction--estimated_done'
+        self.entity_description = ESTIMATED_DONE_SENSOR_DESCRIPTION
+
+    @property
+    def name(self):
+        """Sensor name."""
+        return 'Estimated Done'
+
+    @property
+    def native_value(self) -> datetime | None:
+        """Return the predicted time at which the core reaches the target temperature, to the minute."""
+        seconds = self.predictor.seconds_to_target()
+        if seconds is None:
+            return None
+        done = dt_util.utc_from_timestamp(self.predictor.last_time + seconds)
+        return done.replace(second=0, microsecond=0)
+
+class CombustionCookSessionSensor(CombustionEntity, SensorEntity):
+    """Whether a probe is cooking, with the start of its session in progress, or the summary of its latest session.
+
+    The running summary changes with most readings, so it is only written once the session ends.
+    """
+
+    _update_fields = ProbeField.SESSION
+
+    def __init__(self, probe_manager: ProbeManager, probe_data: DecodedProbeData) -> None:
+        """Initialize."""
+        super().__init__(probe_manager, probe_data.serial_number)
+        self._attr_has_entity_name = True
+        self._attr_unique_id = f'{probe_data.serial_number}--session'
+        self.entity_description = COOK_SESSION_SENSOR_DESCRIPTION
+
+    @property
+    def name(self):
+        """Sensor name."""
+        return 'Cook Session'
+
+    @property
+    def available(self) -> bool:
+        """Return True, so the latest session is still shown once the probe is back in its charger."""
+        return True
+
+    @property
+    def native_value(self) -> str:
+        """Return whether the probe is cooking."""
+        return 'idle' if self.probe_manager.sessions.active(self.device_serial_number) is None else 'cooking'
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Start of the session in progress, or summary of the latest session."""
+        sessions = self.probe_manager.sessions
+        active = sessions.active(self.device_serial_number)
+        if active is not None:
+            return {'start': dt_util.utc_from_timestamp(active.start).isoformat()}
+        last = sessions.last(self.device_serial_number)
+        return None if last is None else last.summary()
@@ -0,0 +1,261 @@
+"""Detect cook sessions from the thermistors of each probe, and summarize them."""
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterable
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from custom_components.combustion.const import DOMAIN, LOGGER
+
+_LOGGER = LOGGER.getChild('sessions')
+
+STORAGE_KEY = f'{DOMAIN}.sessions'
+STORAGE_VERSION = 1
+# Seconds to wait before storing the sessions, whose summaries change with every reading.
+SAVE_DELAY = 60
+
+# Events fired when a session starts and ends, with the serial number and the summary of the session.
+EVENT_SESSION_STARTED = f'{DOMAIN}_session_started'
+EVENT_SESSION_ENDED = f'{DOMAIN}_session_ended'
+
+# The thermistors of a probe lying in the air or in its charger read about the same temperature,
+# while the tip of a probe inserted into food reads colder, or warmer, than its handle. A probe is
+# inserted once the spread of its thermistors (°C) stays at or above `INSERTION_GRADIENT` for
+# `INSERTION_DELAY` seconds, and removed once it stays below `REMOVAL_GRADIENT` for `REMOVAL_DELAY`
+# seconds, so a spread hovering around a single threshold does not start and end sessions.
+INSERTION_GRADIENT = 5.0
+INSERTION_DELAY = 30.0
+REMOVAL_GRADIENT = 2.0
+REMOVAL_DELAY = 120.0
+
+# Probes stop advertising in their charger. A session without readings for this many seconds ends
+# at its last reading.
+SESSION_TIMEOUT = 600.0
+
+# Longest gap between readings (seconds) counted in the time spent above the core thresholds.
+MAX_READING_GAP = 60.0
+
+# Core temperatures (°C) the time spent above is summarized for, in increasing order.
+CORE_THRESHOLDS = (54.0, 63.0, 71.0, 74.0)
+
+# Completed sessions kept per probe.
+SESSION_HISTORY_SIZE = 10
+
+END_REMOVED = 'removed'
+END_TIMEOUT = 'timeout'
+
+
+class CookSession:
+    """Summary of a cook, updated in O(1) with every reading."""
+
+    __slots__ = ('start', 'last', 'peak_core', 'peak_ambient', 'time_above', 'end', 'end_reason')
+
+    def __init__(self, start: float) -> None:
+        """Initialize."""
+        self.start = start
+        # Time of the latest reading.
+        self.last = start
+        self.peak_core: float | None = None
+        self.peak_ambient: float | None = None
+        # Seconds spent at or above each of `CORE_THRESHOLDS`.
+        self.time_above = [0.0] * len(CORE_THRESHOLDS)
+        self.end: float | None = None
+        self.end_reason: str | None = None
+
+    def add(self, timestamp: float, core: float, ambient: float) -> None:
+        """Add the core and ambient temperatures of a reading taken at `timestamp` (epoch seconds)."""
+        elapsed = min(timestamp - self.last, MAX_READING_GAP)
+        if elapsed > 0:
+            time_above = self.time_above
+            for (index, threshold) in enumerate(CORE_THRESHOLDS):
+                if core < threshold:
+                    break
+                time_above[index] += elapsed
+        if timestamp > self.last:
+            self.last = timestamp
+        if self.peak_core is None or core > self.peak_core:
+            self.peak_core = core
+        if self.peak_ambient is None or ambient > self.peak_ambient:
+            self.peak_ambient = ambient
+
+    @property
+    def duration(self) -> float:
+        """Seconds between the start and the end, or the latest reading, of the session."""
+        return (self.last if self.end is None else self.end) - self.start
+
+    def summary(self) -> dict[str, Any]:
+        """Summary of the session, as fired with events and shown by the session sensor."""
+        return {
+            'start': dt_util.utc_from_timestamp(self.start).isoformat(),
+            'end': None if self.end is None else dt_util.utc_from_timestamp(self.end).isoformat(),
+            'end_reason': self.end_reason,
+            'duration': round(self.duration / 60),
+            'peak_core': None if self.peak_core is None else round(self.peak_core, 1),
+            'peak_ambient': None if self.peak_ambient is None else round(self.peak_ambient, 1),
+            'minutes_above': {
+                f'{threshold:g}': round(seconds / 60) for (threshold, seconds) in zip(CORE_THRESHOLDS, self.time_above, strict=True)
+            },
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Convert to a compact dictionary, as stored."""
+        return {
+            'start': round(self.start),
+            'last': round(self.last),
+            'peak_core': self.peak_core,
+            'peak_ambient': self.peak_ambient,
+            'above': [round(seconds) for seconds in self.time_above],
+            'end': None if self.end is None else round(self.end),
+            'end_reason': self.end_reason,
+        }
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> CookSession:
+        """Restore a session stored by `as_dict`."""
+        session = CookSession(data['start'])
+        session.last = data['last']
+        session.peak_core = data['peak_core']
+        session.peak_ambient = data['peak_ambient']
+        session.time_above = [float(seconds) for seconds in data['above']]
+        session.end = data['end']
+        session.end_reason = data['end_reason']
+        return session
+
+
+class CookSessions:
+    """Detect when each probe is inserted and removed, and keep a summary of every cook.
+
+    Active sessions and the latest completed sessions of each probe are stored, so a cook spanning
+    a restart is resumed, and summaries can be read without going through the state history.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize."""
+        self.hass = hass
+        self.started = 0
+        self.ended = 0
+        self._active: dict[str, CookSession] = {}
+        self._history: dict[str, deque[CookSession]] = {}
+        # Time the spread of a probe's thermistors crossed the threshold of the next transition.
+        self._crossed: dict[str, float] = {}
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._save_pending = False
+
+    async def async_load(self) -> None:
+        """Load the sessions stored before the last restart."""
+        if (data := await self._store.async_load()) is None:
+            return
+        self._active = {
+            serial_number: CookSession.from_dict(session) for (serial_number, session) in data['active'].items()
+        }
+        self._history = {
+            serial_number: deque((CookSession.from_dict(session) for session in sessions), SESSION_HISTORY_SIZE)
+            for (serial_number, sessions) in data['history'].items()
+        }
+
+    def _data_to_save(self) -> dict[str, Any]:
+        self._save_pending = False
+        return {
+            'active': {serial_number: session.as_dict() for (serial_number, session) in self._active.items()},
+            'history': {
+                serial_number: [session.as_dict() for session in sessions] for (serial_number, sessions) in self._history.items()
+            },
+        }
+
+    @callback
+    def _schedule_save(self) -> None:
+        """Store the sessions within `SAVE_DELAY` seconds, without postponing a save already scheduled."""
+        if not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def active(self, serial_number: str) -> CookSession | None:
+        """Session of a probe in progress."""
+        return self._active.get(serial_number)
+
+    def last(self, serial_number: str) -> CookSession | None:
+        """Latest completed session of a probe."""
+        sessions = self._history.get(serial_number)
+        return sessions[-1] if sessions else None
+
+    @callback
+    def update(self, serial_number: str, timestamp: float, temperatures: Iterable[float], core: float, ambient: float) -> bool:
+        """Add a reading of a probe taken at `timestamp` (epoch seconds).
+
+        Returns True when a session started or ended.
+        """
+        session = self._active.get(serial_number)
+        if session is not None and timestamp - session.last > SESSION_TIMEOUT:
+            self._end(serial_number, session.last, END_TIMEOUT)
+            session = None
+
+        spread = max(temperatures) - min(temperatures)
+        if session is not None:
+            session.add(timestamp, core, ambient)
+            self._schedule_save()
+            crossing = spread < REMOVAL_GRADIENT
+            delay = REMOVAL_DELAY
+        else:
+            crossing = spread >= INSERTION_GRADIENT
+            delay = INSERTION_DELAY
+
+        if not crossing:
+            self._crossed.pop(serial_number, None)
+            return False
+        crossed = self._crossed.setdefault(serial_number, timestamp)
+        if timestamp - crossed < delay:
+            return False
+
+        del self._crossed[serial_number]
+        if session is not None:
+            self._end(serial_number, crossed, END_REMOVED)
+        else:
+            self._start(serial_number, crossed, timestamp, core, ambient)
+        return True
+
+    @callback
+    def _start(self, serial_number: str, start: float, timestamp: float, core: float, ambient: float) -> None:
+        """Start a session from the time the probe was inserted."""
+        session = self._active[serial_number] = CookSession(start)
+        session.add(timestamp, core, ambient)
+        self.started += 1
+        _LOGGER.debug("Cook session of [%s] started", serial_number)
+        self.hass.bus.async_fire(EVENT_SESSION_STARTED, {'serial_number': serial_number, **session.summary()})
+        self._schedule_save()
+
+    @callback
+    def _end(self, serial_number: str, end: float, reason: str) -> None:
+        """End the session of a probe, and keep its summary."""
+        session = self._active.pop(serial_number)
+        session.end = end
+        session.end_reason = reason
+        sessions = self._history.get(serial_number)
+        if sessions is None:
+            sessions = self._history[serial_number] = deque(maxlen=SESSION_HISTORY_SIZE)
+        sessions.append(session)
+        self.ended += 1
+        _LOGGER.debug("Cook session of [%s] ended: %s", serial_number, reason)
+        self.hass.bus.async_fire(EVENT_SESSION_ENDED, {'serial_number': serial_number, **session.summary()})
+        self._schedule_save()
+
+    @callback
+    def expire(self, now: float) -> list[str]:
+        """End the sessions without readings for `SESSION_TIMEOUT` seconds, and return their probes."""
+        expired = [serial_number for (serial_number, session) in self._active.items() if now - session.last > SESSION_TIMEOUT]
+        for serial_number in expired:
+            self._end(serial_number, self._active[serial_number].last, END_TIMEOUT)
+            self._crossed.pop(serial_number, None)
+        return expired
+
+    def as_dict(self) -> dict[str, Any]:
+        """Convert to a dictionary."""
+        return {
+            'started': self.started,
+            'ended': self.ended,
+            'active': {serial_number: session.summary() for (serial_number, session) in self._active.items()},
+            'last': {serial_number: sessions[-1].summary() for (serial_number, sessions) in self._history.items() if sessions},
+        }
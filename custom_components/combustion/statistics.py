@@ -0,0 +1,157 @@
+"""Import probe temperatures into Home Assistant long-term statistics."""
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from typing import Any
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.const import UnitOfTemperature
+from homeassistant.core import HomeAssistant, callback
+
+from custom_components.combustion.const import DEVICE_NAME, DOMAIN
+
+# Long-term statistics are kept per hour.
+STATISTICS_PERIOD = 3600
+
+# Seconds between imports of the live readings in statistics mode. The running hour is imported again
+# every time, so long-term statistics lag the readings by at most this long.
+STATISTICS_IMPORT_INTERVAL = 300
+
+# Hours kept in memory after they are imported, so readings added to them later are merged on the next import.
+MAX_HOURS = 48
+
+VIRTUAL_SENSORS = ('core', 'surface', 'ambient')
+
+
+def statistic_id(serial_number: str, sensor: str) -> str:
+    """Id of the external statistic of a virtual sensor of a probe."""
+    return f'{DOMAIN}:{serial_number}_{sensor}_temperature'
+
+
+class _Aggregate:
+    """Count, sum, minimum and maximum of the readings of a sensor."""
+
+    __slots__ = ('count', 'total', 'min', 'max')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+
+class TemperatureStatistics:
+    """Hourly mean, minimum and maximum of the core, surface and ambient temperatures of a probe.
+
+    Readings are aggregated as they are added, so memory only grows with the number of hours, and
+    at most `MAX_HOURS` are kept.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        # Aggregates of each virtual sensor, keyed by the start of the hour (epoch seconds).
+        self._hours: dict[int, tuple[_Aggregate, ...]] = {}
+        self._changed: set[int] = set()
+
+    def add(self, timestamp: float, core: float, surface: float, ambient: float) -> None:
+        """Add the temperatures of a reading taken at `timestamp` (epoch seconds)."""
+        hour = int(timestamp // STATISTICS_PERIOD) * STATISTICS_PERIOD
+        aggregates = self._hours.get(hour)
+        if aggregates is None:
+            aggregates = self._hours[hour] = tuple(_Aggregate() for _ in VIRTUAL_SENSORS)
+        aggregates[0].add(core)
+        aggregates[1].add(surface)
+        aggregates[2].add(ambient)
+        self._changed.add(hour)
+
+    def pop_changed(self) -> dict[str, list[StatisticData]]:
+        """Statistics of the hours changed since the last call, per virtual sensor."""
+        statistics: dict[str, list[StatisticData]] = {sensor: [] for sensor in VIRTUAL_SENSORS}
+        for hour in sorted(self._changed):
+            start = datetime.fromtimestamp(hour, UTC)
+            for (sensor, aggregate) in zip(VIRTUAL_SENSORS, self._hours[hour], strict=True):
+                statistics[sensor].append(
+                    StatisticData(
+                        start=start,
+                        mean=aggregate.total / aggregate.count,
+                        min=aggregate.min,
+                        max=aggregate.max,
+                    )
+                )
+        self._changed.clear()
+
+        for hour in sorted(self._hours)[:-MAX_HOURS]:
+            del self._hours[hour]
+        return statistics
+
+
+@callback
+def async_import_statistics(hass: HomeAssistant, serial_number: str, statistics: dict[str, list[StatisticData]]) -> None:
+    """Import the statistics of a probe, in one batch per virtual sensor."""
+    for (sensor, rows) in statistics.items():
+        if not rows:
+            continue
+        async_add_external_statistics(
+            hass,
+            StatisticMetaData(
+                has_mean=True,
+                has_sum=False,
+                name=f'{DEVICE_NAME} {serial_number} {sensor.capitalize()} Temperature',
+                source=DOMAIN,
+                statistic_id=statistic_id(serial_number, sensor),
+                unit_of_measurement=UnitOfTemperature.CELSIUS,
+            ),
+            rows,
+        )
+
+
+class ProbeStatistics:
+    """Temperature statistics of every probe, shared by the live readings and the log backfill.
+
+    Readings of the same hour, whether received live or downloaded from the log, are aggregated
+    together, so importing either one never overwrites the other with a partial hour.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize."""
+        self.hass = hass
+        self.imports = 0
+        self._probes: dict[str, TemperatureStatistics] = {}
+
+    def get(self, serial_number: str) -> TemperatureStatistics:
+        """Statistics of the provided probe."""
+        statistics = self._probes.get(serial_number)
+        if statistics is None:
+            statistics = self._probes[serial_number] = TemperatureStatistics()
+        return statistics
+
+    @callback
+    def async_import(self, serial_number: str | None = None) -> None:
+        """Import the hours changed since the last import, of the provided probe or of every probe."""
+        if 'recorder' not in self.hass.config.components:
+            return
+        serial_numbers = list(self._probes) if serial_number is None else [serial_number]
+        for serial_number in serial_numbers:
+            statistics = self._probes.get(serial_number)
+            if statistics is None:
+                continue
+            changed = statistics.pop_changed()
+            if any(changed.values()):
+                async_import_statistics(self.hass, serial_number, changed)
+                self.imports += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Convert to a dictionary."""
+        return {
+            'imports': self.imports,
+            'probes': list(self._probes),
+        }
@@ -0,0 +1,38 @@
+"""Sampled tracing of Bluetooth advertisements."""
+from __future__ import annotations
+
+from custom_components.combustion.const import LOGGER
+
+_LOGGER = LOGGER.getChild('trace')
+
+
+class PacketTracer:
+    """Sampled tracing of Bluetooth advertisements.
+
+    Disabled by default. Callers check `enabled` before doing any work, so the hot path only pays
+    for one attribute lookup. When enabled, one in `sample_rate` packets of each probe is logged
+    as a single structured line.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.enabled = False
+        self.sample_rate = 1
+        self._packet_counts: dict[str | int, int] = {}
+
+    def configure(self, enabled: bool, sample_rate: int = 1) -> None:
+        """Enable or disable tracing."""
+        self.enabled = enabled
+        self.sample_rate = max(1, sample_rate)
+        self._packet_counts.clear()
+        _LOGGER.info("Packet tracing %s (1 in %s packets per probe)", "enabled" if enabled else "disabled", self.sample_rate)
+
+    def sample(self, key: str | int) -> bool:
+        """Determine if the next packet for `key` (e.g. a serial number) should be traced."""
+        count = self._packet_counts.get(key, 0)
+        self._packet_counts[key] = count + 1
+        return count % self.sample_rate == 0
+
+    def trace(self, event: str, **fields) -> None:
+        """Log a trace event as `key=value` pairs."""
+        _LOGGER.info("%s %s", event, " ".join(f"{key}={value}" for (key, value) in fields.items()))
@@ -0,0 +1,81 @@
+"""Test the arbitration between the scanners a probe is received through."""
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.combustion.arbitration import SourceArbiter
+from custom_components.combustion.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from tests.utils.bt_utils import (
+    create_advertisement,
+    create_combustion_bits,
+    create_probe_data,
+    inject_bt_advertisement,
+)
+from tests.utils.integration import async_setup_integration
+
+KITCHEN = 'AA:AA:AA:AA:AA:01'
+PATIO = 'AA:AA:AA:AA:AA:02'
+GARAGE = 'AA:AA:AA:AA:AA:03'
+
+
+def test_preferred_source_is_sticky():
+    """Verify the first scanner is kept until another one is clearly stronger."""
+    arbiter = SourceArbiter(timeout=5.0)
+
+    assert arbiter.accept(create_probe_data(-70), KITCHEN, 0.0)
+    assert not arbiter.accept(create_probe_data(-67), PATIO, 0.1)
+    assert arbiter.accept(create_probe_data(-71), KITCHEN, 0.2)
+    assert not arbiter.accept(create_probe_data(-66), PATIO, 0.3)
+    assert arbiter.dropped == 2
+
+    # A single strong advertisement is smoothed out, a consistently stronger scanner takes over.
+    assert not arbiter.accept(create_probe_data(-55), PATIO, 0.4)
+    for index in range(10):
+        arbiter.accept(create_probe_data(-70), KITCHEN, 0.5 + index * 0.1)
+        arbiter.accept(create_probe_data(-50), PATIO, 0.55 + index * 0.1)
+    assert arbiter.as_dict(1.5)['cc1c0010']['preferred'] == PATIO
+    assert arbiter.as_dict(1.5)['cc1c0010']['switches'] == 1
+    assert not arbiter.accept(create_probe_data(-70), KITCHEN, 1.6)
+
+
+def test_failover_to_another_source():
+    """Verify another scanner is preferred once the preferred one goes quiet."""
+    arbiter = SourceArbiter(timeout=5.0)
+
+    assert arbiter.accept(create_probe_data(-50), KITCHEN, 0.0)
+    assert not arbiter.accept(create_probe_data(-80), GARAGE, 4.0)
+    assert arbiter.accept(create_probe_data(-80), GARAGE, 5.5)
+    assert not arbiter.accept(create_probe_data(-78), KITCHEN, 6.0)
+
+    # Probes are arbitrated independently.
+    assert arbiter.accept(create_probe_data(-90, serial_number='10002ccc'), PATIO, 6.0)
+
+    assert arbiter.as_dict(6.0) == {
+        'cc1c0010': {'preferred': GARAGE, 'switches': 1, 'sources': {KITCHEN: -78.0, GARAGE: -80.0}},
+        'cc2c0010': {'preferred': PATIO, 'switches': 0, 'sources': {PATIO: -90.0}},
+    }
+
+    # The scanner which went quiet is preferred again once it is clearly stronger.
+    assert arbiter.accept(create_probe_data(-50), KITCHEN, 10.0)
+
+    arbiter.forget(0xcc1c0010)
+    assert arbiter.accept(create_probe_data(-80), GARAGE, 10.5)
+
+
+async def test_secondary_sources_are_not_forwarded(hass: HomeAssistant):
+    """Verify copies received through other scanners are counted, and do not update entities."""
+    entry = await async_setup_integration(hass)
+
+    for (index, core) in enumerate((30.0, 31.0, 32.0)):
+        bits = create_combustion_bits(temperature_data=[core] * 8)
+        inject_bt_advertisement(hass, create_advertisement(bits, rssi=-60, source=KITCHEN, time=index))
+        # Repeaters relay the same reading, each heard by another proxy.
+        inject_bt_advertisement(hass, create_advertisement(bits, address='c2:71:05:00:00:01', rssi=-62, source=PATIO, time=index))
+        inject_bt_advertisement(hass, create_advertisement(bits, address='c2:71:05:00:00:02', rssi=-75, source=GARAGE, time=index))
+    await hass.async_block_till_done()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert diagnostics['pipeline']['counters']['secondary_sources'] == 6
+    assert diagnostics['pipeline']['counters']['duplicates'] == 0
+    assert diagnostics['sources']['cc1c0010']['preferred'] == KITCHEN
@@ -0,0 +1,26 @@
+"""Test probe availability tracking."""
+
+from custom_components.combustion.availability import AvailabilityTracker
+
+
+def test_probes_expire_after_timeout():
+    """Verify probes expire once they have not been seen for the timeout."""
+    tracker = AvailabilityTracker(60)
+    assert tracker.seen('cc1c0010', 0) is True
+    assert tracker.seen('dd1c0010', 10) is True
+
+    # Packets only move the last-seen time, they do not add deadlines.
+    for now in range(1, 50):
+        assert tracker.seen('cc1c0010', now) is False
+    assert len(tracker._deadlines) == 2
+    assert tracker.next_deadline() == 60
+
+    assert tracker.pop_expired(60) == []
+    assert tracker.next_deadline() == 70
+    assert tracker.pop_expired(70) == ['dd1c0010']
+    assert tracker.pop_expired(108) == []
+    assert tracker.pop_expired(109) == ['cc1c0010']
+    assert len(tracker) == 0
+    assert tracker.next_deadline() is None
+
+    assert tracker.seen('cc1c0010', 200) is True
@@ -0,0 +1,272 @@
+"""Test backfilling gaps from the log of connected probes."""
+
+import asyncio
+from datetime import UTC, datetime
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from homeassistant.components.recorder import Recorder
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    statistics_during_period,
+)
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.components.recorder.common import (
+    async_wait_recording_done,
+)
+
+from custom_components.combustion.backfill import STORAGE_KEY, missing_range
+from custom_components.combustion.combustion_ble.log_record import LogRecord
+from custom_components.combustion.combustion_ble.uart import (
+    MESSAGE_READ_LOGS,
+    MESSAGE_SESSION_INFO,
+    PROBE_HEADER_LENGTHS,
+    UART_RX_CHARACTERISTIC_UUID,
+    UART_TX_CHARACTERISTIC_UUID,
+    UartMessageReader,
+)
+from custom_components.combustion.connection import PROBE_STATUS_CHARACTERISTIC_UUID
+from custom_components.combustion.const import (
+    CONF_CONNECTION_MODE,
+    CONNECTION_MODE_PROBES,
+)
+from custom_components.combustion.probe_manager import ProbeManager
+from custom_components.combustion.statistics import (
+    TemperatureStatistics,
+    statistic_id,
+)
+from tests.utils.bt_utils import (
+    create_advertisement,
+    create_combustion_bits,
+    inject_bt_advertisement,
+)
+from tests.utils.gatt import (
+    FakeBleakClient,
+    FakeConnector,
+    patch_connections,
+    probe_response,
+)
+from tests.utils.integration import async_setup_probe_manager
+
+SERIAL_NUMBER = 'cc1c0010'
+ADDRESS = 'cc:cc:cc:cc:cc:cc'
+# Core sensor T3, surface sensor T5 and ambient sensor T8.
+VIRTUAL_SENSORS_BYTE = 2 | (1 << 3) | (3 << 5)
+
+
+def _core_temperature(sequence_number: int) -> float:
+    return 20.0 + sequence_number * 0.5
+
+
+def _log_record(sequence_number: int) -> bytes:
+    core = _core_temperature(sequence_number)
+    bits = create_combustion_bits(temperature_data=[core - 1, core - 1, core, core + 1, core + 2, core + 3, core + 4, core + 5])
+    return sequence_number.to_bytes(4, 'little') + bits[5:18] + bytes((VIRTUAL_SENSORS_BYTE,)) + bytes(6)
+
+
+class FakeProbe:
+    """Answer the log requests of the integration, streaming records in small notifications."""
+
+    def __init__(self, hass: HomeAssistant, last_sequence: int | None = None) -> None:
+        """Initialize."""
+        self.hass = hass
+        # Records after this one are never sent, as if the probe went out of range.
+        self.last_sequence = last_sequence
+        self.requests: list[tuple[int, bytes]] = []
+        self.client: FakeBleakClient | None = None
+
+    def connect(self, client: FakeBleakClient) -> None:
+        """Answer the writes of a newly connected client."""
+        self.client = client
+        reader = UartMessageReader(PROBE_HEADER_LENGTHS)
+        client.on_write = lambda uuid, data: self._write(reader, uuid, data)
+
+    def _write(self, reader: UartMessageReader, uuid: str, data: bytes) -> None:
+        assert uuid == UART_RX_CHARACTERISTIC_UUID
+        for (message_type, payload) in reader.feed(data):
+            self.requests.append((message_type, payload))
+            if message_type == MESSAGE_SESSION_INFO:
+                self._send(probe_response(MESSAGE_SESSION_INFO, (1234).to_bytes(4, 'little') + (5000).to_bytes(2, 'little')))
+            elif message_type == MESSAGE_READ_LOGS:
+                first = int.from_bytes(payload[0:4], 'little')
+                last = int.from_bytes(payload[4:8], 'little')
+                if self.last_sequence is not None:
+                    last = min(last, self.last_sequence)
+                self._send(b''.join(probe_response(MESSAGE_READ_LOGS, _log_record(sequence)) for sequence in range(first, last + 1)))
+
+    def _send(self, data: bytes) -> None:
+        for offset in range(0, len(data), 20):
+            self.hass.loop.call_soon(self.client.notify, UART_TX_CHARACTERISTIC_UUID, data[offset:offset + 20])
+
+    def status(self, min_sequence: int, max_sequence: int) -> None:
+        """Notify a Probe Status with the provided log range."""
+        bits = create_combustion_bits()
+        self.client.notify(
+            PROBE_STATUS_CHARACTERISTIC_UUID,
+            min_sequence.to_bytes(4, 'little') + max_sequence.to_bytes(4, 'little') + bits[5:20] + bytes(7),
+        )
+
+
+# The recorder database must be set up before Home Assistant, which the autouse fixtures of conftest.py start.
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(async_setup_recorder_instance, enable_custom_integrations):
+    """Set up the recorder database, then enable custom integrations."""
+
+
+@pytest.fixture(autouse=True)
+def mock_bluetooth(async_setup_recorder_instance, enable_bluetooth):
+    """Set up the recorder database, then mock bluetooth."""
+
+
+@pytest.fixture(name="connector")
+def connector_fixture():
+    """Patch connections to use fake bleak clients."""
+    with patch_connections(FakeConnector()) as connector:
+        yield connector
+
+
+async def _setup_connected_probe(hass: HomeAssistant, connector: FakeConnector, probe: FakeProbe) -> ProbeManager:
+    probe_manager = await async_setup_probe_manager(hass, {CONF_CONNECTION_MODE: CONNECTION_MODE_PROBES})
+    connector.on_connect = probe.connect
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits(), address=ADDRESS))
+    await hass.async_block_till_done()
+    return probe_manager
+
+
+async def _async_downloads_done(hass: HomeAssistant, probe_manager: ProbeManager, downloads: int) -> None:
+    backfill = probe_manager.bluetooth_listener.connections.backfill
+    for _ in range(100):
+        if backfill.downloads >= downloads:
+            break
+        await asyncio.sleep(0.01)
+    assert backfill.downloads == downloads
+    await hass.async_block_till_done()
+
+
+def _statistics(hass: HomeAssistant, sensor: str) -> list[dict[str, Any]]:
+    start = datetime.fromtimestamp(0, UTC)
+    return statistics_during_period(
+        hass, start, None, {statistic_id(SERIAL_NUMBER, sensor)}, "hour", None, {"mean", "min", "max"}
+    ).get(statistic_id(SERIAL_NUMBER, sensor), [])
+
+
+def test_missing_range():
+    """Verify the records missing since the last status are found, within the range held in the log."""
+    assert missing_range(None, 0, 100) is None
+    assert missing_range(99, 0, 100) is None
+    assert missing_range(90, 0, 100) == (91, 99)
+    assert missing_range(10, 50, 100) == (50, 99)
+    # The probe started a new log.
+    assert missing_range(500, 0, 100) == (0, 99)
+    assert missing_range(500, 0, 0) is None
+
+
+def test_log_record():
+    """Verify log records are decoded with the temperature layout of advertisements."""
+    record = LogRecord.from_payload(_log_record(7))
+
+    assert record.sequence_number == 7
+    assert round(record.core, 2) == _core_temperature(7)
+    assert round(record.surface, 2) == _core_temperature(7) + 2
+    assert round(record.ambient, 2) == _core_temperature(7) + 5
+    assert LogRecord.from_payload(bytes(16)) is None
+
+
+def test_temperature_statistics():
+    """Verify readings are aggregated per hour, and hours changed again are merged."""
+    statistics = TemperatureStatistics()
+    for (timestamp, core) in ((3600, 50.0), (5000, 52.0), (7300, 60.0)):
+        statistics.add(timestamp, core, core + 10, core + 100)
+
+    core = statistics.pop_changed()['core']
+    assert [row['start'] for row in core] == [datetime.fromtimestamp(3600, UTC), datetime.fromtimestamp(7200, UTC)]
+    assert [(row['mean'], row['min'], row['max']) for row in core] == [(51.0, 50.0, 52.0), (60.0, 60.0, 60.0)]
+    assert statistics.pop_changed()['core'] == []
+
+    statistics.add(3700, 57.0, 0.0, 0.0)
+    assert [(row['mean'], row['min'], row['max']) for row in statistics.pop_changed()['core']] == [(53.0, 50.0, 57.0)]
+
+
+async def test_backfill(recorder_mock: Recorder, hass: HomeAssistant, connector: FakeConnector):
+    """Verify missing records are downloaded in one request and imported in one batch per sensor."""
+    probe = FakeProbe(hass)
+    probe_manager = await _setup_connected_probe(hass, connector, probe)
+
+    probe.status(0, 10)
+    probe.status(0, 11)
+    await hass.async_block_till_done()
+    assert probe.requests == []
+
+    with patch(
+        "custom_components.combustion.statistics.async_add_external_statistics", wraps=async_add_external_statistics
+    ) as add_statistics:
+        probe.status(0, 100)
+        await _async_downloads_done(hass, probe_manager, 1)
+    assert [message_type for (message_type, _) in probe.requests] == [MESSAGE_SESSION_INFO, MESSAGE_READ_LOGS]
+    assert probe.requests[1][1] == (12).to_bytes(4, 'little') + (99).to_bytes(4, 'little')
+    assert add_statistics.call_count == 3
+
+    await async_wait_recording_done(hass)
+    core = await recorder_mock.async_add_executor_job(_statistics, hass, 'core')
+    assert 1 <= len(core) <= 2
+    assert round(min(row['min'] for row in core), 2) == _core_temperature(12)
+    assert round(max(row['max'] for row in core), 2) == _core_temperature(99)
+    ambient = await recorder_mock.async_add_executor_job(_statistics, hass, 'ambient')
+    assert round(max(row['max'] for row in ambient), 2) == _core_temperature(99) + 5
+
+    diagnostics = probe_manager.bluetooth_listener.connections.as_dict(0)['backfill']
+    assert diagnostics['records'] == 88
+    assert diagnostics['sequences'] == {SERIAL_NUMBER: 100}
+
+
+async def test_backfill_after_restart(
+    recorder_mock: Recorder, hass: HomeAssistant, hass_storage: dict[str, Any], connector: FakeConnector
+):
+    """Verify records logged while Home Assistant was not running are downloaded."""
+    hass_storage[STORAGE_KEY] = {'version': 1, 'key': STORAGE_KEY, 'data': {'sequences': {SERIAL_NUMBER: 40}}}
+    probe = FakeProbe(hass)
+    probe_manager = await _setup_connected_probe(hass, connector, probe)
+
+    probe.status(0, 50)
+    await _async_downloads_done(hass, probe_manager, 1)
+
+    assert probe.requests[1][1] == (41).to_bytes(4, 'little') + (49).to_bytes(4, 'little')
+    assert probe_manager.bluetooth_listener.connections.backfill.records == 9
+
+
+async def test_interrupted_backfill(recorder_mock: Recorder, hass: HomeAssistant, connector: FakeConnector):
+    """Verify an interrupted download is resumed from the last record received."""
+    probe = FakeProbe(hass, last_sequence=20)
+    probe_manager = await _setup_connected_probe(hass, connector, probe)
+
+    with patch("custom_components.combustion.backfill.RESPONSE_TIMEOUT", 0.05):
+        probe.status(0, 10)
+        probe.status(0, 100)
+        await _async_downloads_done(hass, probe_manager, 1)
+
+        probe.last_sequence = None
+        probe.status(0, 101)
+        await _async_downloads_done(hass, probe_manager, 2)
+
+    assert probe.requests[3][1] == (21).to_bytes(4, 'little') + (100).to_bytes(4, 'little')
+    assert probe_manager.bluetooth_listener.connections.backfill.records == 10 + 80
+
+
+async def test_empty_backfill_is_retried(recorder_mock: Recorder, hass: HomeAssistant, connector: FakeConnector):
+    """Verify a download which received no records is requested again with the next status."""
+    probe = FakeProbe(hass, last_sequence=10)
+    probe_manager = await _setup_connected_probe(hass, connector, probe)
+
+    with patch("custom_components.combustion.backfill.RESPONSE_TIMEOUT", 0.05):
+        probe.status(0, 10)
+        probe.status(0, 100)
+        await _async_downloads_done(hass, probe_manager, 1)
+        assert probe_manager.bluetooth_listener.connections.backfill.records == 0
+
+        probe.last_sequence = None
+        probe.status(0, 101)
+        await _async_downloads_done(hass, probe_manager, 2)
+
+    assert probe.requests[3][1] == (11).to_bytes(4, 'little') + (100).to_bytes(4, 'little')
+    assert probe_manager.bluetooth_listener.connections.backfill.records == 90
@@ -0,0 +1,109 @@
+"""Test the batch decoder against the scalar decoders."""
+
+import random
+import time
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.combustion.combustion_ble import batch_decoder
+from custom_components.combustion.combustion_ble.advertising_data import AdvertisingData
+from custom_components.combustion.combustion_ble.batch_decoder import decode_batch
+from custom_components.combustion.combustion_ble.decoder import (
+    VENDOR_ID_BYTES,
+    DecodedAdvertisement,
+)
+from tests.test_decoder import GOLDEN_CORPUS
+from tests.utils.bt_utils import create_combustion_bits
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request):
+    """Decode with NumPy, and with the pure Python fallback."""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+        yield request.param
+    else:
+        with patch.object(batch_decoder, 'np', None):
+            yield request.param
+
+
+def _random_payloads(count: int) -> list[bytes]:
+    rng = random.Random(2503)
+    payloads = []
+    for _ in range(count):
+        payload = bytearray(rng.randbytes(22))
+        payload[0] = rng.choice((1, 2))
+        payloads.append(bytes(payload))
+    return payloads
+
+
+def test_batch_matches_scalar_decoder(backend):
+    """Verify every payload of a batch decodes exactly as it does alone, for every payload length."""
+    for length in sorted({len(payload) for payload in GOLDEN_CORPUS}):
+        payloads = [payload for payload in GOLDEN_CORPUS if len(payload) == length]
+        batch = decode_batch(b''.join(payloads), length)
+
+        assert len(batch) == len(payloads)
+        for (index, payload) in enumerate(payloads):
+            decoded = batch[index]
+            expected = DecodedAdvertisement.from_payload(payload)
+            assert decoded == expected, payload.hex()
+            assert [value.hex() for value in decoded.temperatures] == [value.hex() for value in expected.temperatures]
+
+
+def test_batch_columns(backend):
+    """Verify columns hold the raw values of every payload."""
+    payloads = [
+        create_combustion_bits(serial_number='10001ccc', probe_id=3, temperature_data=[30.0] * 8),
+        create_combustion_bits(serial_number='10002ccc', probe_id=5, hop_count=2, battery_ok=False),
+    ]
+    batch = decode_batch(memoryview(b''.join(payloads)), len(payloads[0]))
+
+    assert list(batch.column('serial_number')) == [0xcc1c0010, 0xcc2c0010]
+    assert list(batch.column('probe_id')) == [3, 5]
+    assert list(batch.column('hop_count')) == [0, 2]
+    assert [bool(value) for value in batch.column('battery_ok')] == [
+        DecodedAdvertisement.from_payload(payload).battery_ok for payload in payloads
+    ]
+    assert [round(float(value), 2) for value in batch.column('temperatures')[0]] == [30.0] * 8
+    assert batch[-1].payload == payloads[-1]
+
+
+def test_batch_rejects_invalid_buffers(backend):
+    """Verify partial payloads and unknown product types are rejected, like the scalar decoder."""
+    payload = create_combustion_bits()
+    with pytest.raises(ValueError):
+        decode_batch(payload * 2 + payload[:5], len(payload))
+    with pytest.raises(ValueError):
+        decode_batch(payload[:17] * 2, 17)
+    with pytest.raises(ValueError):
+        decode_batch(payload + b'\x07' + payload[1:], len(payload))
+
+    assert len(decode_batch(b'')) == 0
+
+
+@pytest.mark.benchmark
+def test_benchmark_batch_decoder():
+    """Benchmark decoding 10k payloads in a batch, against `AdvertisingData.from_data` and the table-driven decoder."""
+    pytest.importorskip('numpy')
+    payloads = _random_payloads(10_000)
+    buffer = b''.join(payloads)
+
+    def _best_of(function, repeat: int = 3) -> float:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    batch = _best_of(lambda: decode_batch(buffer))
+    table = _best_of(lambda: [DecodedAdvertisement.from_payload(payload) for payload in payloads])
+    reference = _best_of(lambda: [AdvertisingData.from_data(VENDOR_ID_BYTES + payload) for payload in payloads], repeat=1)
+    print(
+        f'\nbatch decoder (µs/payload): {batch / len(payloads) * 1e6:.3f}, '
+        f'{reference / batch:,.0f}x AdvertisingData.from_data, {table / batch:,.1f}x DecodedAdvertisement.from_payload'
+    )
+
+    assert reference / batch >= 20
@@ -6,7 +6,23 @@ from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResultType
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.combustion.const import DOMAIN
+from custom_components.combustion.const import (
+    CONF_AVAILABILITY_TIMEOUT,
+    CONF_BACKFILL,
+    CONF_CONNECTED_PROBES,
+    CONF_CONNECTION_MODE,
+    CONF_FLUSH_INTERVAL,
+    CONF_LATENCY_HISTOGRAMS,
+    CONF_RAW_ADVERTISEMENT_ATTRIBUTE,
+    CONF_RSSI_DEADBAND,
+    CONF_RSSI_INTERVAL,
+    CONF_SCANNING_MODE,
+    CONF_STATISTICS_MODE,
+    CONF_TEMPERATURE_DEADBAND,
+    CONF_THERMISTOR_INTERVAL,
+    CONF_VIRTUAL_SENSOR_INTERVAL,
+    DOMAIN,
+)
 from tests.utils.bt_utils import (
     COMBUSTION_SERVICE_INFO,
 )
@@ -50,3 +66,37 @@ async def test_bluetooth_discovery_already_setup(hass: HomeAssistant) -> None:
     )
     assert result["type"] == FlowResultType.ABORT
     assert result["reason"] == "already_configured"
+
+async def test_options_flow(hass: HomeAssistant) -> None:
+    """Test configuring the change detection deadbands."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id="combustion_meatnet",
+    )
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] == FlowResultType.FORM
+    assert result["step_id"] == "init"
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={CONF_TEMPERATURE_DEADBAND: 0.5, CONF_RSSI_DEADBAND: 5},
+    )
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert entry.options == {
+        CONF_TEMPERATURE_DEADBAND: 0.5,
+        CONF_RSSI_DEADBAND: 5,
+        CONF_VIRTUAL_SENSOR_INTERVAL: 1,
+        CONF_THERMISTOR_INTERVAL: 10,
+        CONF_RSSI_INTERVAL: 60,
+        CONF_FLUSH_INTERVAL: 0,
+        CONF_AVAILABILITY_TIMEOUT: 120,
+        CONF_SCANNING_MODE: "adaptive",
+        CONF_CONNECTION_MODE: "off",
+        CONF_CONNECTED_PROBES: "",
+        CONF_BACKFILL: True,
+        CONF_STATISTICS_MODE: False,
+        CONF_RAW_ADVERTISEMENT_ATTRIBUTE: False,
+        CONF_LATENCY_HISTOGRAMS: False,
+    }
@@ -0,0 +1,219 @@
+"""Test GATT connections to probes and MeatNet nodes."""
+
+from unittest.mock import patch
+
+import pytest
+from bleak.exc import BleakError
+from combustion.combustion_ble.advertising_data import CombustionProductType
+from homeassistant.core import HomeAssistant
+
+from custom_components.combustion.combustion_ble.uart import (
+    MESSAGE_PROBE_STATUS,
+    NODE_HEADER_LENGTHS,
+    UART_TX_CHARACTERISTIC_UUID,
+    UartMessageReader,
+)
+from custom_components.combustion.connection import (
+    BACKOFF_INITIAL,
+    MAX_CONNECTIONS_PER_ADAPTER,
+    PROBE_STATUS_CHARACTERISTIC_UUID,
+    probe_status_payload,
+)
+from custom_components.combustion.const import (
+    CONF_CONNECTED_PROBES,
+    CONF_CONNECTION_MODE,
+    CONNECTION_MODE_NODE,
+    CONNECTION_MODE_PROBES,
+    DOMAIN,
+)
+from tests.utils.bt_utils import (
+    create_advertisement,
+    create_combustion_bits,
+    inject_bt_advertisement,
+)
+from tests.utils.gatt import FakeConnector, node_message, patch_connections
+from tests.utils.integration import async_setup_probe_manager
+
+SERIAL_NUMBER = 'cc1c0010'
+
+
+@pytest.fixture(name="connector")
+def connector_fixture():
+    """Patch connections to use fake bleak clients."""
+    with patch_connections(FakeConnector()) as connector:
+        yield connector
+
+
+def _probe_status(bits: bytes) -> bytes:
+    """Probe Status carrying the same reading as the advertisement bits."""
+    return bytes(8) + bits[5:20] + bytes(7)
+
+
+def test_probe_status_payload():
+    """Verify a Probe Status is turned into the manufacturer data of the same reading."""
+    bits = create_combustion_bits(temperature_data=[30.0] * 8, hop_count=2)
+
+    payload = probe_status_payload(CombustionProductType.PROBE, int(SERIAL_NUMBER, 16), _probe_status(bits))
+
+    assert payload == bits[:20] + b'\x00'
+    assert probe_status_payload(CombustionProductType.PROBE, int(SERIAL_NUMBER, 16), bytes(20)) is None
+
+
+def test_uart_message_reader():
+    """Verify messages split across notifications are reassembled, and corrupted messages dropped."""
+    first = node_message(MESSAGE_PROBE_STATUS, b'first')
+    corrupted = bytearray(node_message(MESSAGE_PROBE_STATUS, b'corrupted'))
+    corrupted[-1] ^= 0xFF
+    second = node_message(MESSAGE_PROBE_STATUS, b'second')
+    stream = b'\x00\x01' + first + bytes(corrupted) + second
+
+    reader = UartMessageReader(NODE_HEADER_LENGTHS)
+    messages = []
+    for offset in range(0, len(stream), 7):
+        messages.extend(reader.feed(stream[offset:offset + 7]))
+
+    assert messages == [(MESSAGE_PROBE_STATUS, b'first'), (MESSAGE_PROBE_STATUS, b'second')]
+    assert reader.crc_errors == 1
+
+
+async def test_connected_probe(hass: HomeAssistant, connector: FakeConnector):
+    """Verify probe status notifications feed the probe manager, and advertised copies are duplicates."""
+    probe_manager = await async_setup_probe_manager(hass, {CONF_CONNECTION_MODE: CONNECTION_MODE_PROBES})
+    listener = probe_manager.bluetooth_listener
+
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits()))
+    await hass.async_block_till_done()
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits(temperature_data=[21.0] * 8)))
+    await hass.async_block_till_done()
+    assert connector.attempts == ['cc:cc:cc:cc:cc:cc']
+
+    bits = create_combustion_bits(temperature_data=[30.0] * 8)
+    connector.clients['cc:cc:cc:cc:cc:cc'].notify(PROBE_STATUS_CHARACTERISTIC_UUID, _probe_status(bits))
+    await hass.async_block_till_done()
+    assert round(probe_manager.data[SERIAL_NUMBER].temperature_data[0], 1) == 30.0
+    assert probe_manager.data[SERIAL_NUMBER].rssi == -61
+
+    duplicates = listener.duplicate_filter.duplicates
+    inject_bt_advertisement(hass, create_advertisement(bits))
+    await hass.async_block_till_done()
+    assert listener.duplicate_filter.duplicates == duplicates + 1
+
+    connections = listener.connections.as_dict(0)
+    assert connections['connects'] == 1
+    assert connections['connections']['cc:cc:cc:cc:cc:cc']['connected'] is True
+    assert connections['connections']['cc:cc:cc:cc:cc:cc']['notifications'] == 1
+
+
+async def test_selected_probes(hass: HomeAssistant, connector: FakeConnector):
+    """Verify only the selected probes are connected to, and never repeaters in probes mode."""
+    await async_setup_probe_manager(hass, {CONF_CONNECTION_MODE: CONNECTION_MODE_PROBES, CONF_CONNECTED_PROBES: 'DD1C0010, '})
+
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits()))
+    inject_bt_advertisement(
+        hass,
+        create_advertisement(
+            create_combustion_bits(serial_number='10001cdd', device_type=CombustionProductType.MEAT_NET_NODE.name),
+            address='ee:ee:ee:ee:ee:ee',
+        ),
+    )
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits(serial_number='10001cdd'), address='dd:dd:dd:dd:dd:dd'))
+    await hass.async_block_till_done()
+
+    assert connector.attempts == ['dd:dd:dd:dd:dd:dd']
+
+
+async def test_backoff(hass: HomeAssistant, connector: FakeConnector):
+    """Verify failed connections are retried after an exponential backoff, and lost connections after the initial one."""
+    probe_manager = await async_setup_probe_manager(hass, {CONF_CONNECTION_MODE: CONNECTION_MODE_PROBES})
+    connector.error = BleakError('out of range')
+    monotonic = 1000.0
+
+    async def _advertise(at: float) -> None:
+        nonlocal monotonic
+        monotonic = at
+        # Home Assistant does not call back for an advertisement identical to the previous one.
+        inject_bt_advertisement(hass, create_advertisement(create_combustion_bits(temperature_data=[at - 980] * 8)))
+        await hass.async_block_till_done()
+
+    with patch("custom_components.combustion.connection.MONOTONIC_TIME", side_effect=lambda: monotonic):
+        await _advertise(1000)
+        await _advertise(1000 + BACKOFF_INITIAL - 1)
+        assert len(connector.attempts) == 1
+
+        await _advertise(1000 + BACKOFF_INITIAL)
+        assert len(connector.attempts) == 2
+        await _advertise(1000 + 3 * BACKOFF_INITIAL - 1)
+        assert len(connector.attempts) == 2
+        connector.error = None
+        await _advertise(1000 + 3 * BACKOFF_INITIAL)
+        assert len(connector.attempts) == 3
+
+        connector.clients['cc:cc:cc:cc:cc:cc'].drop()
+        backoff = probe_manager.bluetooth_listener.connections.as_dict(monotonic)['backoff']
+        assert backoff == {'cc:cc:cc:cc:cc:cc': {'failures': 0, 'retry_in_s': BACKOFF_INITIAL}}
+        await _advertise(monotonic + BACKOFF_INITIAL - 1)
+        assert len(connector.attempts) == 3
+        await _advertise(monotonic + 1)
+        assert len(connector.attempts) == 4
+
+
+async def test_connections_per_adapter(hass: HomeAssistant, connector: FakeConnector):
+    """Verify the connections held through each adapter are capped."""
+    await async_setup_probe_manager(hass, {CONF_CONNECTION_MODE: CONNECTION_MODE_PROBES})
+
+    for probe in range(MAX_CONNECTIONS_PER_ADAPTER + 1):
+        inject_bt_advertisement(
+            hass,
+            create_advertisement(create_combustion_bits(serial_number=f'1000{probe:04x}'), address=f'cc:cc:cc:cc:cc:{probe:02x}'),
+        )
+    inject_bt_advertisement(
+        hass,
+        create_advertisement(create_combustion_bits(serial_number='10001000'), address='cc:cc:cc:cc:cc:ff', source='proxy'),
+    )
+    await hass.async_block_till_done()
+
+    assert connector.attempts == [
+        *(f'cc:cc:cc:cc:cc:{probe:02x}' for probe in range(MAX_CONNECTIONS_PER_ADAPTER)),
+        'cc:cc:cc:cc:cc:ff',
+    ]
+
+
+async def test_connected_node(hass: HomeAssistant, connector: FakeConnector):
+    """Verify a single MeatNet node is connected to, and the probe status it forwards feeds the probe manager."""
+    probe_manager = await async_setup_probe_manager(hass, {CONF_CONNECTION_MODE: CONNECTION_MODE_NODE})
+
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits()))
+    for address in ('dd:dd:dd:dd:dd:dd', 'ee:ee:ee:ee:ee:ee'):
+        inject_bt_advertisement(
+            hass,
+            create_advertisement(
+                create_combustion_bits(device_type=CombustionProductType.MEAT_NET_NODE.name, hop_count=1), address=address
+            ),
+        )
+    await hass.async_block_till_done()
+    assert connector.attempts == ['dd:dd:dd:dd:dd:dd']
+
+    bits = create_combustion_bits(temperature_data=[30.0] * 8)
+    message = node_message(MESSAGE_PROBE_STATUS, bits[1:5] + _probe_status(bits))
+    client = connector.clients['dd:dd:dd:dd:dd:dd']
+    client.notify(UART_TX_CHARACTERISTIC_UUID, message[:12])
+    client.notify(UART_TX_CHARACTERISTIC_UUID, message[12:])
+    await hass.async_block_till_done()
+
+    probe_data = probe_manager.data[SERIAL_NUMBER]
+    assert round(probe_data.temperature_data[0], 1) == 30.0
+    assert probe_data.address == 'dd:dd:dd:dd:dd:dd'
+    assert probe_data.device_type == CombustionProductType.MEAT_NET_NODE.name
+
+
+async def test_unload_disconnects(hass: HomeAssistant, connector: FakeConnector):
+    """Verify every connection is closed when the entry is unloaded."""
+    await async_setup_probe_manager(hass, {CONF_CONNECTION_MODE: CONNECTION_MODE_PROBES})
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits()))
+    await hass.async_block_till_done()
+
+    entry = hass.config_entries.async_entries(DOMAIN)[0]
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert connector.clients['cc:cc:cc:cc:cc:cc'].is_connected is False
@@ -0,0 +1,134 @@
+"""Test the table-driven advertisement decoder against the reference parser."""
+
+import random
+
+import pytest
+
+from custom_components.combustion.combustion_ble.advertising_data import AdvertisingData
+from custom_components.combustion.combustion_ble.combustion_probe_data import (
+    CombustionProbeData,
+)
+from custom_components.combustion.combustion_ble.decoder import (
+    VENDOR_ID_BYTES,
+    DecodeCache,
+    DecodedAdvertisement,
+    DecodedProbeData,
+)
+from tests.utils.bt_utils import COMBUSTION_SERVICE_INFO, create_combustion_bits
+
+PROBE_FIELDS = [
+    'valid',
+    'address',
+    'device_type',
+    'rssi',
+    'serial_number',
+    'probe_id',
+    'mode',
+    'battery_ok',
+    'core_sensor',
+    'ambient_sensor',
+    'surface_sensor',
+]
+
+
+def _golden_corpus() -> list[bytes]:
+    """Manufacturer data payloads covering every value of the mode, battery and network bytes."""
+    rng = random.Random(2503)
+    corpus = [
+        COMBUSTION_SERVICE_INFO.manufacturer_data[2503],
+        create_combustion_bits(),
+        create_combustion_bits(temperature_data=[-20.0] * 8),
+        create_combustion_bits(temperature_data=[389.55] * 8),
+        create_combustion_bits(probe_id=8, core_sensor_id=6, surface_sensor_id=7, ambient_sensor_id=8, battery_ok=False),
+    ]
+
+    base = bytearray(create_combustion_bits())
+    for offset in (18, 19, 20):
+        for value in range(256):
+            payload = bytearray(base)
+            payload[offset] = value
+            corpus.append(bytes(payload))
+
+    for _ in range(500):
+        payload = bytearray(rng.randbytes(22))
+        payload[0] = rng.choice((1, 2))
+        corpus.append(bytes(payload))
+
+    # Truncated payloads fall back to default mode, battery and network values.
+    corpus.extend(bytes(base[:length]) for length in (18, 19, 20))
+    return corpus
+
+
+GOLDEN_CORPUS = _golden_corpus()
+
+
+def _float_bits(values: list[float]) -> list[str]:
+    return [value.hex() for value in values]
+
+
+def test_decoder_matches_reference_parser():
+    """Verify the decoder is bit-for-bit identical to `AdvertisingData.from_data`."""
+    for payload in GOLDEN_CORPUS:
+        reference = CombustionProbeData(AdvertisingData.from_data(VENDOR_ID_BYTES + payload), -61, "cc:cc:cc:cc:cc:cc")
+        decoded = DecodedProbeData(DecodedAdvertisement.from_payload(payload), -61, "cc:cc:cc:cc:cc:cc")
+
+        for field in PROBE_FIELDS:
+            assert getattr(decoded, field) == getattr(reference, field), (field, payload.hex())
+
+        assert _float_bits(decoded.temperature_data) == _float_bits(reference.temperature_data), payload.hex()
+        assert decoded.to_dict() == reference.to_dict(), payload.hex()
+        assert decoded.hop_count == reference.advertising_data.hop_count, payload.hex()
+        assert decoded.advertising_data.bit_string == reference.advertising_data.bit_string, payload.hex()
+
+
+def test_decoder_rejects_short_payloads():
+    """Verify payloads without a complete temperature block are not decoded."""
+    assert DecodedAdvertisement.from_payload(create_combustion_bits()[:17]) is None
+    assert DecodedAdvertisement.from_data(b'\x00\x00' + create_combustion_bits()) is None
+
+
+def test_decoder_rejects_unknown_product_type():
+    """Verify unknown product types raise, like the reference parser."""
+    payload = b'\x07' + create_combustion_bits()[1:]
+    with pytest.raises(ValueError):
+        AdvertisingData.from_data(VENDOR_ID_BYTES + payload)
+    with pytest.raises(ValueError):
+        DecodedAdvertisement.from_payload(payload)
+
+
+def test_decode_cache():
+    """Verify identical payloads are decoded once and the cache stays bounded."""
+    cache = DecodeCache(max_entries=2)
+    first = create_combustion_bits()
+    second = create_combustion_bits(temperature_data=[30.0] * 8)
+    third = create_combustion_bits(temperature_data=[40.0] * 8)
+
+    decoded = cache.decode(first)
+    assert decoded == DecodedAdvertisement.from_payload(first)
+    assert cache.decode(first) is decoded
+
+    cache.decode(second)
+    cache.decode(first)
+    cache.decode(third)
+    # `second` was the least recently used payload.
+    cache.decode(second)
+
+    assert cache.as_dict() == {
+        'size': 2,
+        'max_entries': 2,
+        'hits': 2,
+        'misses': 4,
+        'evictions': 2,
+    }
+
+
+def test_cached_temperatures_are_immutable():
+    """Verify a cache hit cannot see changes made by another consumer of the same payload."""
+    cache = DecodeCache()
+    payload = create_combustion_bits()
+
+    temperatures = cache.decode(payload).temperatures
+    assert isinstance(temperatures, tuple)
+    with pytest.raises(TypeError):
+        temperatures[0] = 100.0
+    assert cache.decode(payload).temperatures == DecodedAdvertisement.from_payload(payload).temperatures
@@ -0,0 +1,75 @@
+"""Test diagnostics."""
+
+import json
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.combustion.const import (
+    CONF_TEMPERATURE_DEADBAND,
+    CONF_VIRTUAL_SENSOR_INTERVAL,
+)
+from custom_components.combustion.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from tests.utils.bt_utils import (
+    create_advertisement,
+    create_combustion_bits,
+    inject_bt_advertisement,
+)
+from tests.utils.integration import async_setup_integration
+
+
+async def test_config_entry_diagnostics(hass: HomeAssistant):
+    """Verify the scanning mode and its packet statistics are included in the diagnostics."""
+    entry = await async_setup_integration(hass)
+
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits()))
+    await hass.async_block_till_done()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    scanning = diagnostics['scanning']
+    assert scanning['setting'] == 'adaptive'
+    assert scanning['mode'] == 'active'
+    assert scanning['modes']['active']['packets'] == 1
+    assert scanning['modes']['passive']['packets'] == 0
+
+
+async def test_probe_diagnostics(hass: HomeAssistant):
+    """Verify the packet statistics of each probe are included in the diagnostics."""
+    entry = await async_setup_integration(hass)
+
+    bits = create_combustion_bits()
+    inject_bt_advertisement(hass, create_advertisement(bits))
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits(hop_count=1), address='dd:dd:dd:dd:dd:dd'))
+    await hass.async_block_till_done()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    probe = diagnostics['probes']['cc1c0010']
+    assert probe['available'] is True
+    assert probe['packets'] == 2
+    assert probe['addresses']['cc:cc:cc:cc:cc:cc'] == {'packets': 1, 'share': 0.5}
+    assert probe['hop_counts']['HOP2'] == {'packets': 1, 'share': 0.5}
+    assert probe['last_data']['serial_number'] == 'cc1c0010'
+    assert probe['last_payload'] == create_combustion_bits(hop_count=1).hex()
+    assert set(probe['packet_rates']) == {'10s', '60s', '300s'}
+    # The copy relayed by the repeater is a duplicate, so only the first reading is kept in the history.
+    assert probe['history']['samples'] == 1
+    assert probe['history']['window']['core'] == {'count': 1, 'min': 20.0, 'max': 20.0, 'mean': 20.0}
+    assert probe['history']['window']['rssi']['mean'] == -61.0
+    # Diagnostics are downloaded as JSON.
+    assert json.loads(json.dumps(diagnostics))['probes']['cc1c0010']['last_data']['mode'] == 'normal'
+
+
+async def test_publish_diagnostics(hass: HomeAssistant):
+    """Verify the state writes published and suppressed by the deadbands are included in the diagnostics."""
+    entry = await async_setup_integration(hass, {CONF_TEMPERATURE_DEADBAND: 0.5, CONF_VIRTUAL_SENSOR_INTERVAL: 0})
+
+    for core in (20.0, 20.2, 20.6):
+        inject_bt_advertisement(hass, create_advertisement(create_combustion_bits(temperature_data=[core] * 8)))
+        await hass.async_block_till_done()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    publish = diagnostics['publish']
+    assert publish['entities']['cc1c0010--sensor--core'] == {'published': 1, 'suppressed': 1, 'coalesced': 0}
+    for counter in ('published', 'suppressed', 'coalesced'):
+        assert publish['total'][counter] == sum(stats[counter] for stats in publish['entities'].values())
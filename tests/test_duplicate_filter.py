@@ -0,0 +1,54 @@
+"""Test collapsing of duplicate advertisements."""
+
+from custom_components.combustion.duplicate_filter import DuplicateFilter
+from tests.utils.bt_utils import create_probe_data
+
+
+def test_repeated_copies_are_dropped():
+    """Verify copies of a reading relayed by repeaters are dropped."""
+    duplicate_filter = DuplicateFilter(window=1.0)
+
+    assert duplicate_filter.accept(create_probe_data(), 0.0)
+    assert not duplicate_filter.accept(create_probe_data(hop_count=1, rssi=-50, address='aa:aa:aa:aa:aa:aa'), 0.1)
+    assert not duplicate_filter.accept(create_probe_data(hop_count=2, rssi=-40, address='bb:bb:bb:bb:bb:bb'), 0.2)
+    assert not duplicate_filter.accept(create_probe_data(), 0.3)
+    assert duplicate_filter.duplicates == 3
+
+
+def test_new_readings_are_forwarded():
+    """Verify a changed payload or an expired window is forwarded."""
+    duplicate_filter = DuplicateFilter(window=1.0)
+
+    assert duplicate_filter.accept(create_probe_data(), 0.0)
+    assert duplicate_filter.accept(create_probe_data(temperature_data=[30.0] * 8), 0.1)
+    assert duplicate_filter.accept(create_probe_data(temperature_data=[30.0] * 8), 1.2)
+    assert duplicate_filter.accept(create_probe_data(serial_number='10001ddd', temperature_data=[30.0] * 8), 1.2)
+    assert duplicate_filter.duplicates == 0
+
+
+def test_better_copy_replaces_first_copy():
+    """Verify a copy over fewer hops, or with a much stronger signal, is forwarded."""
+    duplicate_filter = DuplicateFilter(window=1.0)
+
+    assert duplicate_filter.accept(create_probe_data(hop_count=2, rssi=-80), 0.0)
+    assert duplicate_filter.accept(create_probe_data(hop_count=0, rssi=-90), 0.1)
+    assert not duplicate_filter.accept(create_probe_data(hop_count=0, rssi=-85), 0.2)
+    assert duplicate_filter.accept(create_probe_data(hop_count=0, rssi=-70), 0.3)
+    assert duplicate_filter.duplicates == 1
+
+
+def test_late_copy_of_previous_reading_is_dropped():
+    """Verify a copy of a reading relayed after the next reading does not roll the state back."""
+    duplicate_filter = DuplicateFilter(window=1.0)
+    first = {'temperature_data': [20.0] * 8}
+    second = {'temperature_data': [21.0] * 8}
+
+    assert duplicate_filter.accept(create_probe_data(**first), 0.0)
+    assert duplicate_filter.accept(create_probe_data(**second), 0.3)
+    assert not duplicate_filter.accept(create_probe_data(hop_count=1, address='aa:aa:aa:aa:aa:aa', **first), 0.6)
+    assert not duplicate_filter.accept(create_probe_data(hop_count=1, address='aa:aa:aa:aa:aa:aa', **second), 0.9)
+    assert duplicate_filter.duplicates == 2
+
+    # Readings are kept for the window since they were first seen.
+    assert duplicate_filter.accept(create_probe_data(**first), 1.2)
+    assert not duplicate_filter.accept(create_probe_data(**second), 1.2)
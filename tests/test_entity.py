@@ -0,0 +1,164 @@
+"""Test entity change detection."""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.combustion.const import (
+    CONF_AVAILABILITY_TIMEOUT,
+    CONF_RAW_ADVERTISEMENT_ATTRIBUTE,
+    CONF_TEMPERATURE_DEADBAND,
+    CONF_VIRTUAL_SENSOR_INTERVAL,
+    DOMAIN,
+)
+from tests.utils.bt_utils import (
+    create_advertisement,
+    create_combustion_bits,
+    inject_bt_advertisement,
+)
+from tests.utils.integration import async_setup_integration
+
+CORE_SENSOR_UNIQUE_ID = 'cc1c0010--sensor--core'
+THERMISTOR_ENTITY_ID = 'sensor.predictive_thermometer_cc1c0010_temperature_1'
+
+
+def _inject_core_temperature(hass: HomeAssistant, temperature: float) -> None:
+    temperature_data = [temperature, 21.1, 22.2, 23.3, 24.4, 25.5, 26.6, 27.7]
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits(temperature_data=temperature_data)))
+
+
+async def test_state_writes_within_deadband_are_suppressed(hass: HomeAssistant):
+    """Verify temperature changes smaller than the deadband are not written."""
+    await async_setup_integration(hass, {CONF_TEMPERATURE_DEADBAND: 0.5, CONF_VIRTUAL_SENSOR_INTERVAL: 0})
+
+    _inject_core_temperature(hass, 20.0)
+    await hass.async_block_till_done()
+    state = hass.states.get('sensor.predictive_thermometer_cc1c0010_core_temperature')
+    assert float(state.state) == 20.0
+
+    _inject_core_temperature(hass, 20.2)
+    await hass.async_block_till_done()
+    _inject_core_temperature(hass, 20.4)
+    await hass.async_block_till_done()
+    state = hass.states.get('sensor.predictive_thermometer_cc1c0010_core_temperature')
+    assert float(state.state) == 20.0
+
+    _inject_core_temperature(hass, 20.5)
+    await hass.async_block_till_done()
+    state = hass.states.get('sensor.predictive_thermometer_cc1c0010_core_temperature')
+    assert round(float(state.state), 2) == 20.5
+
+    stats = hass.data[DOMAIN].publish_stats[CORE_SENSOR_UNIQUE_ID]
+    assert stats.published == 1
+    assert stats.suppressed == 2
+
+
+async def test_state_writes_are_rate_limited(hass: HomeAssistant):
+    """Verify updates within the publish interval are coalesced, and the latest value is written once it ends."""
+    await async_setup_integration(hass, {CONF_VIRTUAL_SENSOR_INTERVAL: 5})
+    entity_id = 'sensor.predictive_thermometer_cc1c0010_core_temperature'
+
+    _inject_core_temperature(hass, 20.0)
+    await hass.async_block_till_done()
+    _inject_core_temperature(hass, 21.0)
+    await hass.async_block_till_done()
+    assert round(float(hass.states.get(entity_id).state), 2) == 21.0
+
+    for temperature in (22.0, 23.0, 24.0):
+        _inject_core_temperature(hass, temperature)
+        await hass.async_block_till_done()
+    assert round(float(hass.states.get(entity_id).state), 2) == 21.0
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=6))
+    await hass.async_block_till_done()
+    assert round(float(hass.states.get(entity_id).state), 2) == 24.0
+
+    stats = hass.data[DOMAIN].publish_stats[CORE_SENSOR_UNIQUE_ID]
+    assert stats.published == 2
+    assert stats.coalesced == 3
+
+
+async def _enable_thermistor_sensor(hass: HomeAssistant, entry: MockConfigEntry) -> None:
+    er = entity_registry.async_get(hass)
+    er.async_update_entity(THERMISTOR_ENTITY_ID, disabled_by=None)
+    await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_raw_advertisement_attribute_disabled_by_default(hass: HomeAssistant):
+    """Verify the raw advertisement is not added to thermistor sensors by default."""
+    entry = await async_setup_integration(hass)
+    _inject_core_temperature(hass, 20.0)
+    await hass.async_block_till_done()
+    await _enable_thermistor_sensor(hass, entry)
+
+    _inject_core_temperature(hass, 21.0)
+    await hass.async_block_till_done()
+
+    state = hass.states.get(THERMISTOR_ENTITY_ID)
+    assert round(float(state.state), 2) == 21.0
+    assert 'raw_advertisement_bytes' not in state.attributes
+
+
+async def test_raw_advertisement_attribute(hass: HomeAssistant):
+    """Verify the raw advertisement is added to thermistor sensors when enabled."""
+    entry = await async_setup_integration(hass, {CONF_RAW_ADVERTISEMENT_ATTRIBUTE: True})
+    _inject_core_temperature(hass, 20.0)
+    await hass.async_block_till_done()
+    await _enable_thermistor_sensor(hass, entry)
+
+    _inject_core_temperature(hass, 21.0)
+    await hass.async_block_till_done()
+
+    state = hass.states.get(THERMISTOR_ENTITY_ID)
+    bits = state.attributes['raw_advertisement_bytes']
+    assert bits.startswith(f'{0x09C7:016b}')
+
+
+async def test_entities_become_unavailable(hass: HomeAssistant):
+    """Verify entities of a probe which is no longer received become unavailable, and recover without being recreated."""
+    entry = await async_setup_integration(hass, {CONF_AVAILABILITY_TIMEOUT: 60})
+    entity_id = 'sensor.predictive_thermometer_cc1c0010_core_temperature'
+    er = entity_registry.async_get(hass)
+    start = dt_util.utcnow()
+    monotonic = 1000.0
+
+    def _advance(seconds: float) -> None:
+        nonlocal monotonic
+        monotonic += seconds
+        async_fire_time_changed(hass, start + timedelta(seconds=monotonic - 1000.0))
+
+    with patch("custom_components.combustion.probe_manager.MONOTONIC_TIME", side_effect=lambda: monotonic):
+        _inject_core_temperature(hass, 20.0)
+        await hass.async_block_till_done()
+        entity_count = len(entity_registry.async_entries_for_config_entry(er, entry.entry_id))
+
+        _advance(45)
+        _inject_core_temperature(hass, 21.0)
+        await hass.async_block_till_done()
+
+        _advance(45)
+        await hass.async_block_till_done()
+        assert round(float(hass.states.get(entity_id).state), 2) == 21.0
+
+        _advance(20)
+        await hass.async_block_till_done()
+        assert hass.states.get(entity_id).state == STATE_UNAVAILABLE
+        probe_manager = hass.data[DOMAIN]
+        assert probe_manager.data == {}
+        assert probe_manager.history == {}
+        assert probe_manager.predictors['cc1c0010'].last_time is None
+
+        _inject_core_temperature(hass, 22.0)
+        await hass.async_block_till_done()
+        assert round(float(hass.states.get(entity_id).state), 2) == 22.0
+        assert len(probe_manager.history['cc1c0010']) == 1
+        assert len(entity_registry.async_entries_for_config_entry(er, entry.entry_id)) == entity_count
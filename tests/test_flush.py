@@ -0,0 +1,191 @@
+"""Test writing the states of updated entities together, once per loop iteration or frame."""
+
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    async_fire_time_changed,
+)
+
+from custom_components.combustion.const import (
+    CONF_FLUSH_INTERVAL,
+    CONF_RSSI_DEADBAND,
+    CONF_RSSI_INTERVAL,
+    CONF_TEMPERATURE_DEADBAND,
+    CONF_THERMISTOR_INTERVAL,
+    CONF_VIRTUAL_SENSOR_INTERVAL,
+)
+from custom_components.combustion.entity import CombustionEntity
+from custom_components.combustion.probe_manager import ProbeManager
+from tests.utils.bt_utils import (
+    create_advertisement,
+    create_combustion_bits,
+    inject_bt_advertisement,
+)
+from tests.utils.integration import async_setup_probe_manager
+
+CORE_ENTITY_ID = 'sensor.predictive_thermometer_cc1c0010_core_temperature'
+
+# Every change is written right away, so each packet updates every entity of its probe.
+UNTHROTTLED_OPTIONS = {
+    CONF_TEMPERATURE_DEADBAND: 0,
+    CONF_RSSI_DEADBAND: 0,
+    CONF_VIRTUAL_SENSOR_INTERVAL: 0,
+    CONF_THERMISTOR_INTERVAL: 0,
+    CONF_RSSI_INTERVAL: 0,
+}
+
+
+async def _setup_probe(hass: HomeAssistant, options: dict) -> ProbeManager:
+    probe_manager = await async_setup_probe_manager(hass, options)
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits()))
+    await hass.async_block_till_done()
+    await probe_manager.async_add_pending_probes()
+    await hass.async_block_till_done()
+    return probe_manager
+
+
+def _inject_burst(hass: HomeAssistant, first: int, packets: int) -> None:
+    """Inject packets of a warming probe, each with a new reading, in the same loop iteration."""
+    for index in range(first, first + packets):
+        core = 30.0 + index * 0.1
+        inject_bt_advertisement(
+            hass,
+            create_advertisement(
+                create_combustion_bits(temperature_data=[core] * 8),
+                address=f'c2:71:05:00:00:{index % 3:02x}',
+                rssi=-60 - index % 5,
+                time=index,
+            ),
+        )
+
+
+def _count_state_writes(hass: HomeAssistant) -> list[str]:
+    writes = []
+
+    @callback
+    def _state_changed(event: Event) -> None:
+        writes.append(event.data['entity_id'])
+
+    hass.bus.async_listen(EVENT_STATE_CHANGED, _state_changed)
+    return writes
+
+
+async def test_burst_is_written_once(hass: HomeAssistant):
+    """Verify a burst of packets handled in the same iteration writes each entity once, with the latest reading."""
+    probe_manager = await _setup_probe(hass, UNTHROTTLED_OPTIONS)
+    writes = _count_state_writes(hass)
+    flushes = probe_manager.flusher.flushes
+
+    _inject_burst(hass, 1, 5)
+    assert probe_manager.flusher.as_dict()['pending'] > 0
+    await hass.async_block_till_done()
+    # State changed events are delivered on the iteration after the flush.
+    await hass.async_block_till_done()
+
+    assert probe_manager.flusher.flushes == flushes + 1
+    assert writes.count(CORE_ENTITY_ID) == 1
+    assert len(writes) == len(set(writes))
+    assert round(float(hass.states.get(CORE_ENTITY_ID).state), 1) == 30.5
+    assert probe_manager.flusher.merged > 0
+
+
+async def test_flush_interval(hass: HomeAssistant):
+    """Verify entities updated within a frame are written at its end."""
+    probe_manager = await _setup_probe(hass, {**UNTHROTTLED_OPTIONS, CONF_FLUSH_INTERVAL: 0.25})
+    writes = _count_state_writes(hass)
+
+    _inject_burst(hass, 1, 2)
+    await hass.async_block_till_done()
+    _inject_burst(hass, 3, 2)
+    await hass.async_block_till_done()
+    assert writes == []
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+    assert writes.count(CORE_ENTITY_ID) == 1
+    assert round(float(hass.states.get(CORE_ENTITY_ID).state), 1) == 30.4
+
+    # Unloading drops the pending writes.
+    _inject_burst(hass, 5, 1)
+    probe_manager.async_unload()
+    assert probe_manager.flusher.as_dict()['pending'] == 0
+
+
+async def _async_time_per_1000_packets(hass: HomeAssistant, bursts: int, burst: int) -> float:
+    """Event loop time spent handling bursts of packets, and writing the states they update."""
+    elapsed = 0.0
+    for index in range(bursts):
+        start = time.perf_counter()
+        _inject_burst(hass, index * burst, burst)
+        await hass.async_block_till_done()
+        elapsed += time.perf_counter() - start
+    return elapsed / (bursts * burst) * 1000
+
+
+@pytest.mark.benchmark
+async def test_benchmark_state_flush(hass: HomeAssistant):
+    """Benchmark the event loop time spent per 1,000 packets, writing states per packet or once per flush."""
+    probe_manager = await _setup_probe(hass, UNTHROTTLED_OPTIONS)
+    writes = _count_state_writes(hass)
+    (bursts, burst) = (50, 20)
+
+    # Before the flush scheduler, every update wrote the state of its entity right away.
+    with patch.object(CombustionEntity, '_async_schedule_write', CombustionEntity.async_schedule_update_ha_state):
+        per_packet = await _async_time_per_1000_packets(hass, bursts, burst)
+    per_packet_writes = len(writes)
+    writes.clear()
+
+    flushed = await _async_time_per_1000_packets(hass, bursts, burst)
+    await hass.async_block_till_done()
+    print(
+        f'\nevent loop time per 1,000 packets: {per_packet * 1e3:.1f} ms writing every update ({per_packet_writes} writes), '
+        f'{flushed * 1e3:.1f} ms flushing once per burst ({len(writes)} writes, {probe_manager.flusher.merged} merged)'
+    )
+
+    assert len(writes) * 5 < per_packet_writes
+    assert flushed < per_packet
+
+
+async def test_deadband_compares_written_state(hass: HomeAssistant):
+    """Verify the deadband is applied against the state written by the flush, not the one which marked the entity dirty."""
+    await _setup_probe(hass, {**UNTHROTTLED_OPTIONS, CONF_TEMPERATURE_DEADBAND: 0.5})
+    writes = _count_state_writes(hass)
+
+    for (index, core) in enumerate((21.0, 21.25)):
+        inject_bt_advertisement(hass, create_advertisement(create_combustion_bits(temperature_data=[core] * 8), time=index))
+    await hass.async_block_till_done()
+    await hass.async_block_till_done()
+    assert writes.count(CORE_ENTITY_ID) == 1
+    assert float(hass.states.get(CORE_ENTITY_ID).state) == 21.25
+
+    # 0.35 °C above the written state, although 0.6 °C above the reading which marked the entity dirty.
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits(temperature_data=[21.6] * 8), time=2))
+    await hass.async_block_till_done()
+    await hass.async_block_till_done()
+    assert writes.count(CORE_ENTITY_ID) == 1
+
+
+async def test_merged_updates_are_counted_once(hass: HomeAssistant):
+    """Verify updates merged into a pending write count as coalesced, and the write as a single published state."""
+    probe_manager = await _setup_probe(hass, {**UNTHROTTLED_OPTIONS, CONF_TEMPERATURE_DEADBAND: 0.5})
+    instrumentation = probe_manager.instrumentation
+    (state_writes, flushed) = (instrumentation.state_writes, probe_manager.flusher.writes)
+    stats = probe_manager.publish_stats['cc1c0010--sensor--core']
+    (published, coalesced) = (stats.published, stats.coalesced)
+
+    # The second reading is within the deadband of the first one, but is written by the flush.
+    for (index, core) in enumerate((21.0, 21.25)):
+        inject_bt_advertisement(hass, create_advertisement(create_combustion_bits(temperature_data=[core] * 8), time=index))
+    await hass.async_block_till_done()
+
+    assert float(hass.states.get(CORE_ENTITY_ID).state) == 21.25
+    assert stats.published == published + 1
+    assert stats.coalesced == coalesced + 1
+    # Every write counted was made by the flush.
+    assert instrumentation.state_writes - state_writes == probe_manager.flusher.writes - flushed
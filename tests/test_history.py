@@ -0,0 +1,69 @@
+"""Test the probe history ring buffer."""
+
+from custom_components.combustion.combustion_ble.decoder import (
+    DecodedProbeData,
+)
+from custom_components.combustion.history import (
+    CORE,
+    RSSI,
+    ProbeHistory,
+)
+from tests.utils.bt_utils import create_probe_data
+
+
+def _probe_data(core: float, **kwargs) -> DecodedProbeData:
+    return create_probe_data(temperature_data=[core, 21.1, 22.2, 23.3, 24.4, 25.5, 26.6, 27.7], **kwargs)
+
+
+def test_samples_round_trip():
+    """Verify stored samples match the decoded readings."""
+    history = ProbeHistory(capacity=10)
+    probe_data = _probe_data(30.0, rssi=-70)
+    history.append(100.0, probe_data)
+
+    [sample] = history.samples_since(0)
+    advertising_data = probe_data.advertising_data
+    assert sample.timestamp == 100.0
+    assert sample.temperatures == advertising_data.temperatures
+    assert sample.core_index == advertising_data.core_index
+    assert sample.surface_index == advertising_data.surface_index
+    assert sample.ambient_index == advertising_data.ambient_index
+    assert sample.battery_ok == advertising_data.battery_ok
+    assert sample.rssi == -70
+    assert sample.hop_count == advertising_data.hop_count.value
+
+
+def test_ring_buffer_wraps_around():
+    """Verify the oldest samples are overwritten, and windows spanning the end of the storage are returned in order."""
+    history = ProbeHistory(capacity=5)
+    for timestamp in range(12):
+        history.append(float(timestamp), _probe_data(20.0 + timestamp, rssi=-60 - timestamp))
+
+    assert len(history) == 5
+    assert [sample.timestamp for sample in history.samples_since(0)] == [7.0, 8.0, 9.0, 10.0, 11.0]
+    assert [sample.timestamp for sample in history.samples_since(8.5)] == [9.0, 10.0, 11.0]
+    assert history.samples_since(12) == []
+    assert history.values_since(10, RSSI) == [-70.0, -71.0]
+
+    stats = history.window_stats(8, CORE)
+    assert stats.count == 4
+    assert round(stats.min, 2) == 28.0
+    assert round(stats.max, 2) == 31.0
+    assert round(stats.mean, 2) == 29.5
+    assert history.window_stats(12, CORE) is None
+
+
+def test_virtual_sensor_values_follow_the_sensor_index():
+    """Verify virtual sensor queries use the thermistor selected in each sample."""
+    history = ProbeHistory(capacity=5)
+    history.append(0.0, _probe_data(30.0, core_sensor_id=1))
+    history.append(1.0, _probe_data(30.0, core_sensor_id=2))
+
+    assert [round(value, 2) for value in history.values_since(0, CORE)] == [30.0, 21.1]
+    assert [round(value, 2) for value in history.values_since(0, 1)] == [21.1, 21.1]
+
+
+def test_memory_per_sample():
+    """Verify the storage needs well under 40 bytes per sample."""
+    history = ProbeHistory(capacity=1000)
+    assert history.nbytes / 1000 == 27
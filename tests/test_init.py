@@ -1,12 +1,21 @@
 """Test initialization."""
 
+from unittest.mock import patch
+
 import pytest
+from homeassistant.config_entries import SOURCE_BLUETOOTH
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import entity_registry
 from homeassistant.setup import async_setup_component
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.combustion.const import DOMAIN
+from custom_components.combustion.const import (
+    ATTR_ENABLED,
+    ATTR_SAMPLE_RATE,
+    CONF_DEVICES,
+    DOMAIN,
+    SERVICE_SET_PACKET_TRACING,
+)
 from tests.utils.bt_utils import (
     create_advertisement,
     create_combustion_bits,
@@ -42,7 +51,9 @@ async def test_entity_creation(hass: HomeAssistant):
 
     er = entity_registry.async_get(hass)
     entities = entity_registry.async_entries_for_config_entry(er, entry.entry_id)
-    assert len(entities) == 0
+    # The pipeline diagnostic sensors do not belong to a probe, and are disabled by default.
+    assert len(entities) == 7
+    assert all(e.disabled for e in entities)
 
     inject_bt_advertisement(hass, create_advertisement(create_combustion_bits()))
     await hass.async_block_till_done()
@@ -51,9 +62,99 @@ async def test_entity_creation(hass: HomeAssistant):
     sensors = [e for e in entities if e.domain == 'sensor']
     disabled_sensors = [e for e in sensors if e.disabled is True]
     binary_sensors = [e for e in entities if e.domain == 'binary_sensor']
+    numbers = [e for e in entities if e.domain == 'number']
 
-    assert len(entities) == 13
-    assert len(sensors) == 12
-    # 9 disabled by default: 8 temperature sensors, and 1 RSSI sensor
-    assert len(disabled_sensors) == 9
+    assert len(entities) == 26
+    assert len(sensors) == 24
+    # 16 disabled by default: 8 temperature sensors, 1 RSSI sensor, and 7 pipeline sensors
+    assert len(disabled_sensors) == 16
     assert len(binary_sensors) == 1
+    assert len(numbers) == 1
+
+async def test_set_packet_tracing(hass: HomeAssistant, caplog: pytest.LogCaptureFixture):
+    """Verify packet tracing is off by default, and samples packets once enabled."""
+    mock_entry = MockConfigEntry(
+        unique_id="test_set_packet_tracing",
+        domain=DOMAIN,
+        version=1,
+        data={
+        },
+        title="Meatnet",
+    )
+    await _setup_config_entry(hass, mock_entry)
+
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits()))
+    await hass.async_block_till_done()
+    assert "outcome=" not in caplog.text
+
+    await hass.services.async_call(DOMAIN, SERVICE_SET_PACKET_TRACING, {ATTR_ENABLED: True, ATTR_SAMPLE_RATE: 2}, blocking=True)
+    listener = hass.data[DOMAIN].bluetooth_listener
+    assert listener.tracer.enabled
+
+    for temperature in (30.0, 31.0, 32.0, 33.0):
+        inject_bt_advertisement(hass, create_advertisement(create_combustion_bits(temperature_data=[temperature] * 8)))
+        await hass.async_block_till_done()
+    assert caplog.text.count("outcome=forwarded") == 2
+
+    await hass.services.async_call(DOMAIN, SERVICE_SET_PACKET_TRACING, {ATTR_ENABLED: False}, blocking=True)
+    assert not listener.tracer.enabled
+
+async def test_device_discovery_does_not_reload(hass: HomeAssistant):
+    """Verify discovering Meatnet devices once the entry exists aborts, without touching the entry or reloading."""
+    mock_entry = MockConfigEntry(
+        unique_id="combustion_meatnet",
+        domain=DOMAIN,
+        version=1,
+        data={
+            CONF_DEVICES: [],
+        },
+        title="Meatnet",
+    )
+    entry = await _setup_config_entry(hass, mock_entry)
+    probe_manager = hass.data[DOMAIN]
+    addresses = [f"cc:cc:cc:cc:cc:{i:02x}" for i in range(4)]
+
+    reasons = []
+    with patch("custom_components.combustion.async_reload_entry") as reload_entry:
+        for _ in range(2):
+            for address in addresses:
+                service_info = create_advertisement(create_combustion_bits(), address)
+                inject_bt_advertisement(hass, service_info)
+                result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": SOURCE_BLUETOOTH}, data=service_info)
+                reasons.append(result["reason"])
+                await hass.async_block_till_done()
+
+    assert reasons == ["already_configured"] * 8
+    assert reload_entry.call_count == 0
+    assert hass.data[DOMAIN] is probe_manager
+    assert entry.data[CONF_DEVICES] == []
+
+
+async def test_device_discovery_without_unique_id(hass: HomeAssistant):
+    """Verify devices discovered for an entry created without the Meatnet unique id are added once, without reloads."""
+    mock_entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=1,
+        data={
+            CONF_DEVICES: [],
+        },
+        title="Meatnet",
+    )
+    entry = await _setup_config_entry(hass, mock_entry)
+    probe_manager = hass.data[DOMAIN]
+    addresses = [f"cc:cc:cc:cc:cc:{i:02x}" for i in range(4)]
+
+    reasons = []
+    with patch("custom_components.combustion.async_reload_entry") as reload_entry:
+        for _ in range(2):
+            for address in addresses:
+                service_info = create_advertisement(create_combustion_bits(), address)
+                inject_bt_advertisement(hass, service_info)
+                result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": SOURCE_BLUETOOTH}, data=service_info)
+                reasons.append(result["reason"])
+                await hass.async_block_till_done()
+
+    assert reasons == ["updated_entry"] * 4 + ["already_configured"] * 4
+    assert reload_entry.call_count == 0
+    assert hass.data[DOMAIN] is probe_manager
+    assert [device["address"] for device in entry.data[CONF_DEVICES]] == addresses
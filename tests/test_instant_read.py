@@ -0,0 +1,142 @@
+"""Test instant read mode."""
+
+import logging
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from homeassistant.const import (
+    EVENT_STATE_CHANGED,
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
+)
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    async_fire_time_changed,
+)
+
+from custom_components.combustion.combustion_ble.mode_id import ProbeMode
+from custom_components.combustion.const import (
+    CONF_AVAILABILITY_TIMEOUT,
+    DOMAIN,
+    LOGGER,
+)
+from custom_components.combustion.probe_manager import INSTANT_READ_TIMEOUT
+from tests.utils.bt_utils import (
+    create_advertisement,
+    create_combustion_bits,
+    inject_bt_advertisement,
+)
+from tests.utils.integration import async_setup_integration
+
+INSTANT_READ_ENTITY_ID = 'sensor.predictive_thermometer_cc1c0010_instant_read'
+CORE_ENTITY_ID = 'sensor.predictive_thermometer_cc1c0010_core_temperature'
+
+
+def _inject_instant_read(hass: HomeAssistant, temperature: float) -> None:
+    bits = create_combustion_bits(mode=ProbeMode.instantRead.value, temperature_data=[temperature] * 8)
+    inject_bt_advertisement(hass, create_advertisement(bits))
+
+
+async def test_instant_read(hass: HomeAssistant):
+    """Verify instant reads are written right away, without touching the normal temperature sensors."""
+    await async_setup_integration(hass)
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits()))
+    await hass.async_block_till_done()
+    assert hass.states.get(INSTANT_READ_ENTITY_ID).state == STATE_UNKNOWN
+
+    writes: list[tuple[float, str]] = []
+
+    @callback
+    def _state_changed(event: Event) -> None:
+        if event.data['entity_id'] == INSTANT_READ_ENTITY_ID:
+            writes.append((time.perf_counter(), event.data['new_state'].state))
+
+    hass.bus.async_listen(EVENT_STATE_CHANGED, _state_changed)
+
+    with patch("custom_components.combustion.probe_manager.MONOTONIC_TIME", return_value=1000.0):
+        for temperature in (55.3, 55.3, 56.1):
+            started = time.perf_counter()
+            _inject_instant_read(hass, temperature)
+            await hass.async_block_till_done()
+            assert writes[-1][0] - started < 0.05
+
+    # Temperatures are encoded in steps of 0.05 °C.
+    assert [round(float(state)) for (_, state) in writes] == [55, 56]
+    assert float(hass.states.get(CORE_ENTITY_ID).state) == 20.0
+    # The repeated packet is dropped by the duplicate filter.
+    assert hass.data[DOMAIN].bluetooth_listener.instrumentation.instant_reads == 2
+
+
+async def test_instant_read_cleared(hass: HomeAssistant):
+    """Verify the instant read is cleared once the probe leaves instant read mode, and nothing is written while idle."""
+    await async_setup_integration(hass)
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits()))
+    await hass.async_block_till_done()
+    start = dt_util.utcnow()
+    monotonic = 1000.0
+
+    def _advance(seconds: float) -> None:
+        nonlocal monotonic
+        monotonic += seconds
+        async_fire_time_changed(hass, start + timedelta(seconds=monotonic - 1000.0))
+
+    with patch("custom_components.combustion.probe_manager.MONOTONIC_TIME", side_effect=lambda: monotonic):
+        _inject_instant_read(hass, 55.3)
+        await hass.async_block_till_done()
+
+        # Instant reads keep arriving, so the first deadline is pushed back.
+        _advance(INSTANT_READ_TIMEOUT - 1)
+        _inject_instant_read(hass, 55.4)
+        await hass.async_block_till_done()
+        _advance(2)
+        await hass.async_block_till_done()
+        assert round(float(hass.states.get(INSTANT_READ_ENTITY_ID).state)) == 55
+
+        _advance(INSTANT_READ_TIMEOUT)
+        await hass.async_block_till_done()
+        state = hass.states.get(INSTANT_READ_ENTITY_ID)
+        assert state.state == STATE_UNKNOWN
+        assert hass.data[DOMAIN].instant_reads == {}
+
+        _advance(INSTANT_READ_TIMEOUT * 10)
+        await hass.async_block_till_done()
+        assert hass.states.get(INSTANT_READ_ENTITY_ID).last_updated == state.last_updated
+
+
+async def test_instant_read_evicted_when_unavailable(hass: HomeAssistant):
+    """Verify the instant read of a probe which is no longer received is dropped with its timer."""
+    await async_setup_integration(hass, {CONF_AVAILABILITY_TIMEOUT: 2})
+    probe_manager = hass.data[DOMAIN]
+    start = dt_util.utcnow()
+    monotonic = 1000.0
+
+    with patch("custom_components.combustion.probe_manager.MONOTONIC_TIME", side_effect=lambda: monotonic):
+        inject_bt_advertisement(hass, create_advertisement(create_combustion_bits()))
+        await hass.async_block_till_done()
+        _inject_instant_read(hass, 55.3)
+        await hass.async_block_till_done()
+        assert probe_manager.instant_reads
+
+        monotonic += 3
+        async_fire_time_changed(hass, start + timedelta(seconds=3))
+        await hass.async_block_till_done()
+        assert probe_manager.instant_reads == {}
+        assert probe_manager._instant_read_timers == {}
+        assert probe_manager.history == {}
+        assert hass.states.get(INSTANT_READ_ENTITY_ID).state == STATE_UNAVAILABLE
+
+
+async def test_instant_read_of_unknown_probe(hass: HomeAssistant, caplog: pytest.LogCaptureFixture):
+    """Verify instant reads of a probe not received in normal mode yet are dropped, and logged."""
+    caplog.set_level(logging.DEBUG, logger=LOGGER.name)
+    await async_setup_integration(hass)
+
+    _inject_instant_read(hass, 55.3)
+    await hass.async_block_till_done()
+
+    assert hass.states.get(INSTANT_READ_ENTITY_ID) is None
+    assert hass.data[DOMAIN].instant_reads == {}
+    assert "Dropping instant read of [cc1c0010]" in caplog.text
@@ -0,0 +1,135 @@
+"""Test hot path instrumentation."""
+
+import sys
+import time
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry
+from homeassistant.helpers.entity_component import async_update_entity
+
+from custom_components.combustion.combustion_ble.mode_id import ProbeMode
+from custom_components.combustion.const import CONF_LATENCY_HISTOGRAMS
+from custom_components.combustion.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from custom_components.combustion.instrumentation import (
+    LatencyHistogram,
+    PipelineInstrumentation,
+)
+from tests.utils.bt_utils import (
+    create_advertisement,
+    create_combustion_bits,
+    inject_bt_advertisement,
+)
+from tests.utils.integration import async_setup_integration
+
+PACKETS_ENTITY_ID = 'sensor.combustion_meatnet_packets_received'
+
+
+def _inject_packets(hass: HomeAssistant) -> None:
+    """Inject a reading, a relayed copy of it, an instant read and an invalid packet."""
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits()))
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits(), address='dd:dd:dd:dd:dd:dd'))
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits(mode=ProbeMode.instantRead.value)))
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits(serial_number='00000000')))
+
+
+def test_latency_histogram():
+    """Verify durations are counted in fixed buckets, and percentiles are reported as bucket bounds."""
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) is None
+
+    for duration_ns in (500, 1_000, 1_500, 3_000, 40_000_000):
+        histogram.record(duration_ns)
+
+    assert histogram.percentile(20) == 1_000
+    assert histogram.percentile(50) == 2_000
+    assert histogram.percentile(80) == 5_000
+    assert histogram.percentile(100) == 40_000_000
+
+    data = histogram.as_dict()
+    assert data['count'] == 5
+    assert data['max_us'] == 40_000
+    assert data['buckets']['le_1us'] == 2
+    assert data['buckets']['le_2us'] == 1
+    assert data['buckets']['gt_10000us'] == 1
+
+
+@pytest.mark.benchmark
+def test_record_overhead():
+    """Verify timing a stage, including both clock reads, costs under a microsecond."""
+    instrumentation = PipelineInstrumentation(enabled=True)
+    iterations = 100_000
+
+    # Coverage tracing would dominate the measurement.
+    trace = sys.gettrace()
+    sys.settrace(None)
+    try:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            start = time.perf_counter_ns()
+            instrumentation.record('decode', time.perf_counter_ns() - start)
+        per_stage = (time.perf_counter() - started) / iterations
+    finally:
+        sys.settrace(trace)
+
+    assert per_stage < 1e-6
+
+
+async def test_counters(hass: HomeAssistant):
+    """Verify packets are counted by outcome, and histograms are only fed when enabled."""
+    entry = await async_setup_integration(hass)
+
+    _inject_packets(hass)
+    await hass.async_block_till_done()
+
+    pipeline = (await async_get_config_entry_diagnostics(hass, entry))['pipeline']
+    assert pipeline['enabled'] is False
+    assert pipeline['counters'] == {
+        'packets': 4,
+        'invalid': 1,
+        'instant_reads': 1,
+        'secondary_sources': 0,
+        'duplicates': 1,
+        'state_writes': 0,
+    }
+    assert pipeline['latency']['bt_callback']['count'] == 0
+
+
+async def test_latency_histograms(hass: HomeAssistant):
+    """Verify every stage is timed when latency histograms are enabled."""
+    entry = await async_setup_integration(hass, {CONF_LATENCY_HISTOGRAMS: True})
+
+    _inject_packets(hass)
+    await hass.async_block_till_done()
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits(temperature_data=[30.0] * 8)))
+    await hass.async_block_till_done()
+
+    pipeline = (await async_get_config_entry_diagnostics(hass, entry))['pipeline']
+    latency = pipeline['latency']
+    assert pipeline['enabled'] is True
+    assert latency['bt_callback']['count'] == 5
+    assert latency['decode']['count'] == 5
+    # The relayed copy, the instant read and the invalid packet do not reach the probe manager.
+    assert latency['probe_manager']['count'] == 2
+    assert latency['entity_update']['count'] > 0
+    assert pipeline['counters']['state_writes'] > 0
+    assert latency['bt_callback']['p95_us'] is not None
+
+
+async def test_pipeline_sensors(hass: HomeAssistant):
+    """Verify the pipeline counters can be enabled as diagnostic sensors."""
+    entry = await async_setup_integration(hass)
+    er = entity_registry.async_get(hass)
+    assert er.async_get(PACKETS_ENTITY_ID).disabled
+
+    er.async_update_entity(PACKETS_ENTITY_ID, disabled_by=None)
+    await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    _inject_packets(hass)
+    await hass.async_block_till_done()
+    await async_update_entity(hass, PACKETS_ENTITY_ID)
+
+    assert hass.states.get(PACKETS_ENTITY_ID).state == '4'
@@ -0,0 +1,106 @@
+"""Test core temperature prediction."""
+
+import math
+import time
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.combustion.const import DOMAIN
+from custom_components.combustion.prediction import CorePredictor
+from tests.utils.bt_utils import (
+    create_advertisement,
+    create_combustion_bits,
+    inject_bt_advertisement,
+)
+from tests.utils.integration import async_setup_integration
+
+TARGET_ENTITY_ID = 'number.predictive_thermometer_cc1c0010_target_temperature'
+
+
+def _quantize(temperature: float) -> float:
+    """Round a temperature to the resolution of the probe."""
+    return round((temperature + 20.0) / 0.05) * 0.05 - 20.0
+
+
+def test_linear_rise():
+    """Verify the rate and time to target of a steadily rising core."""
+    predictor = CorePredictor(target=50.0)
+    for second in range(0, 600):
+        predictor.add(1000.0 + second, 20.0 + second / 60)
+
+    assert round(predictor.rate, 3) == 1.0
+    assert round(predictor.temperature, 2) == round(20.0 + 599 / 60, 2)
+    assert round(predictor.seconds_to_target()) == 1800 - 599
+
+
+def test_prediction_requirements():
+    """Verify no prediction is made without a target, without enough data, or without a rising core."""
+    predictor = CorePredictor()
+    for second in range(0, 30):
+        predictor.add(float(second), 20.0 + second / 60)
+    assert predictor.rate is None
+
+    for second in range(30, 120):
+        predictor.add(float(second), 20.0 + second / 60)
+    assert predictor.rate is not None
+    assert predictor.seconds_to_target() is None
+
+    predictor.target = 10.0
+    assert predictor.seconds_to_target() == 0.0
+
+    predictor = CorePredictor(target=50.0)
+    for second in range(0, 600):
+        predictor.add(float(second), 20.0)
+    assert predictor.seconds_to_target() is None
+
+
+def test_replay_cook():
+    """Benchmark the predictor on a two hour cook at 4 packets per second.
+
+    The core follows Newton's law of heating in a 120 °C oven, from 5 °C to the 55 °C target.
+    A linear trend underestimates the remaining time of such a curve: by under 15% from 30 to 5 minutes
+    before the target, and by under a minute in the last 5 minutes.
+    """
+    (oven, start, target, duration) = (120.0, 5.0, 55.0, 7200)
+    k = -math.log((oven - target) / (oven - start)) / duration
+    predictor = CorePredictor(target=target)
+    readings = [
+        (sample / 4, _quantize(oven - (oven - start) * math.exp(-k * sample / 4)))
+        for sample in range(duration * 4)
+    ]
+
+    started = time.perf_counter()
+    errors = []
+    last_errors = []
+    for (timestamp, temperature) in readings:
+        predictor.add(timestamp, temperature)
+        remaining = duration - timestamp
+        if remaining <= 1800 and timestamp % 60 == 0:
+            error = abs(predictor.seconds_to_target() - remaining)
+            if remaining >= 300:
+                errors.append(error / remaining)
+            else:
+                last_errors.append(error)
+    per_sample = (time.perf_counter() - started) / len(readings)
+
+    assert max(errors) < 0.15
+    assert max(last_errors) < 60
+    assert per_sample < 50e-6
+
+
+async def test_target_temperature(hass: HomeAssistant):
+    """Verify the target temperature number sets the target of the prediction."""
+    await async_setup_integration(hass)
+
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits()))
+    await hass.async_block_till_done()
+    assert hass.states.get(TARGET_ENTITY_ID).state == 'unknown'
+    assert hass.states.get('sensor.predictive_thermometer_cc1c0010_time_to_target').state == 'unknown'
+
+    await hass.services.async_call(
+        'number', 'set_value', {'entity_id': TARGET_ENTITY_ID, 'value': 54.5}, blocking=True
+    )
+    await hass.async_block_till_done()
+
+    assert float(hass.states.get(TARGET_ENTITY_ID).state) == 54.5
+    assert hass.data[DOMAIN].predictor('cc1c0010').target == 54.5
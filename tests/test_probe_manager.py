@@ -0,0 +1,174 @@
+"""Test the probe manager."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.combustion.probe_manager import ProbeField, ProbeManager
+from tests.utils.bt_utils import create_probe_data
+
+ENTITIES_PER_PROBE = 13
+
+_probe_managers: list[ProbeManager] = []
+
+
+@pytest.fixture(autouse=True)
+def unload_probe_managers(hass: HomeAssistant):
+    """Cancel the timers of the probe managers created by a test."""
+    yield
+    while _probe_managers:
+        _probe_managers.pop().async_unload()
+
+
+def _serial_number(serial_number: str) -> str:
+    """Return the serial number the decoder reports for a payload created with `serial_number`."""
+    return create_probe_data(serial_number=serial_number).serial_number
+
+
+def _probe_manager(hass: HomeAssistant) -> tuple[ProbeManager, callable]:
+    probe_manager = ProbeManager(hass, MagicMock())
+    _probe_managers.append(probe_manager)
+    probe_manager.init_sensor_platform(AsyncMock())
+    probe_manager.init_binary_sensor_platform(AsyncMock())
+    probe_manager.init_number_platform(AsyncMock())
+    return (probe_manager, probe_manager.create_update_callback())
+
+
+async def _discover(probe_manager: ProbeManager, update: callable, *serial_numbers: str) -> None:
+    """Send a first reading of each probe, and add their entities."""
+    for serial_number in serial_numbers:
+        update(create_probe_data(serial_number=serial_number))
+    await probe_manager.async_add_pending_probes()
+
+
+async def test_new_probes_are_added_in_batches(hass: HomeAssistant):
+    """Verify probes discovered together are added with a single call per platform, outside the BT callback."""
+    (probe_manager, update) = _probe_manager(hass)
+    serial_numbers = ('10001ccc', '10001ddd', '10001eee')
+
+    for serial_number in serial_numbers:
+        update(create_probe_data(serial_number=serial_number))
+    probe_manager.create_sensors_callback.assert_not_called()
+    probe_manager.create_binary_sensors_callback.assert_not_called()
+
+    await hass.async_block_till_done()
+
+    for create_callback in (probe_manager.create_sensors_callback, probe_manager.create_binary_sensors_callback):
+        assert create_callback.await_count == 1
+        (_pm, batch) = create_callback.await_args.args
+        assert [probe_data.serial_number for probe_data in batch] == [_serial_number(s) for s in serial_numbers]
+
+
+async def test_readings_are_buffered_until_entities_are_added(hass: HomeAssistant):
+    """Verify readings received before the entities of a new probe exist are replayed once they are added."""
+    (probe_manager, update) = _probe_manager(hass)
+    serial_number = _serial_number('10001ccc')
+    listener = MagicMock()
+    probe_manager.init_sensor_platform(
+        AsyncMock(side_effect=lambda pm, batch: pm.add_update_listener(listener, serial_number))
+    )
+
+    update(create_probe_data())
+    update(create_probe_data(rssi=-70))
+    update(create_probe_data(rssi=-80))
+    assert serial_number not in probe_manager.data
+
+    await probe_manager.async_add_pending_probes()
+
+    assert listener.call_count == 2
+    assert probe_manager.probe_data(serial_number).rssi == -80
+
+
+async def test_failed_batch_is_dropped(hass: HomeAssistant):
+    """Verify a batch whose entities fail to be added is not retried, and the discovery task ends."""
+    (probe_manager, update) = _probe_manager(hass)
+    probe_manager.init_sensor_platform(AsyncMock(side_effect=Exception("boom")))
+
+    update(create_probe_data())
+    await hass.async_block_till_done()
+
+    assert probe_manager.create_sensors_callback.await_count == 1
+    assert probe_manager._discovery_task is None
+    assert not probe_manager._pending
+    assert not probe_manager._adding
+
+
+async def test_listeners_are_notified_for_their_probe_only(hass: HomeAssistant):
+    """Verify listeners registered for a serial number ignore other probes."""
+    (probe_manager, update) = _probe_manager(hass)
+    await _discover(probe_manager, update, '10001ccc', '10001ddd')
+    first = MagicMock()
+    second = MagicMock()
+    probe_manager.add_update_listener(first, _serial_number('10001ccc'))
+    probe_manager.add_update_listener(second, _serial_number('10001ddd'))
+
+    update(create_probe_data(serial_number='10001ccc', rssi=-70))
+
+    assert first.call_count == 1
+    assert second.call_count == 0
+
+
+async def test_listeners_are_notified_for_changed_fields_only(hass: HomeAssistant):
+    """Verify field-scoped listeners are only notified when their field changes."""
+    (probe_manager, update) = _probe_manager(hass)
+    await _discover(probe_manager, update, '10001ccc')
+    temperatures = MagicMock()
+    rssi = MagicMock()
+    battery = MagicMock()
+    probe_manager.add_update_listener(temperatures, _serial_number('10001ccc'), ProbeField.TEMPERATURES)
+    probe_manager.add_update_listener(rssi, _serial_number('10001ccc'), ProbeField.RSSI)
+    probe_manager.add_update_listener(battery, _serial_number('10001ccc'), ProbeField.BATTERY)
+
+    update(create_probe_data(rssi=-70))
+    update(create_probe_data(rssi=-70))
+    update(create_probe_data(rssi=-70, temperature_data=[30.0] * 8))
+    update(create_probe_data(rssi=-70, temperature_data=[30.0] * 8, battery_ok=False))
+
+    assert temperatures.call_count == 1
+    assert rssi.call_count == 1
+    assert battery.call_count == 1
+
+
+async def test_remove_listener(hass: HomeAssistant):
+    """Verify the handle returned by add_update_listener removes the listener."""
+    (probe_manager, update) = _probe_manager(hass)
+    await _discover(probe_manager, update, '10001ccc')
+    listener = MagicMock()
+    remove = probe_manager.add_update_listener(listener, _serial_number('10001ccc'))
+
+    update(create_probe_data(rssi=-70))
+    remove()
+    update(create_probe_data(rssi=-80))
+
+    assert listener.call_count == 1
+    assert probe_manager._listeners == {}
+
+
+async def _dispatch_count(hass: HomeAssistant, probe_count: int, per_probe: bool) -> int:
+    """Count listener invocations caused by one packet from each of `probe_count` probes."""
+    (probe_manager, update) = _probe_manager(hass)
+    listener = MagicMock()
+    serial_numbers = [f'1000{i:04x}' for i in range(probe_count)]
+    await _discover(probe_manager, update, *serial_numbers)
+    for serial_number in serial_numbers:
+        for _ in range(ENTITIES_PER_PROBE):
+            probe_manager.add_update_listener(listener, _serial_number(serial_number) if per_probe else None)
+
+    for serial_number in serial_numbers:
+        update(create_probe_data(serial_number=serial_number, rssi=-70))
+    return listener.call_count
+
+
+async def test_dispatch_cost_by_probe_count(hass: HomeAssistant):
+    """Benchmark listener invocations per packet as the number of probes grows.
+
+    A global fan-out wakes every entity of every probe (O(probes) per packet), while
+    per-probe dispatch only wakes the entities of the probe which sent the packet (O(1)).
+    """
+    for probe_count in (1, 2, 4, 8):
+        global_fan_out = await _dispatch_count(hass, probe_count, per_probe=False) / probe_count
+        per_probe = await _dispatch_count(hass, probe_count, per_probe=True) / probe_count
+
+        assert global_fan_out == ENTITIES_PER_PROBE * probe_count
+        assert per_probe == ENTITIES_PER_PROBE
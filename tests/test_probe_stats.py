@@ -0,0 +1,73 @@
+"""Test per-probe packet statistics."""
+
+from custom_components.combustion.probe_stats import (
+    MAX_RELAY_ADDRESSES,
+    OTHER_ADDRESSES,
+    ProbeStats,
+)
+from tests.utils.bt_utils import create_combustion_bits, create_probe_data
+
+PROBE_ADDRESS = 'c2:71:04:90:1c:3b'
+REPEATER_ADDRESS = 'c2:71:05:00:00:01'
+
+
+def test_packet_rates():
+    """Verify packet rates are measured over complete seconds of each window, since the first packet."""
+    stats = ProbeStats()
+    assert stats.packet_rate(10, 1000.0) is None
+
+    # 4 packets per second for 2 minutes, then 1 packet per second for 10 seconds.
+    for sample in range(4 * 120):
+        stats.record(create_probe_data(address=PROBE_ADDRESS), 1000.0 + sample / 4)
+    for second in range(10):
+        stats.record(create_probe_data(address=PROBE_ADDRESS), 1120.0 + second)
+
+    now = 1130.0
+    assert stats.packet_rate(10, now) == 1.0
+    assert stats.packet_rate(60, now) == (50 * 4 + 10) / 60
+    # Only 130 seconds elapsed since the first packet.
+    assert stats.packet_rate(300, now) == (4 * 120 + 10) / 130
+
+    # Seconds without packets count towards the rate.
+    assert stats.packet_rate(10, now + 5) == 0.5
+    assert stats.packet_rate(10, now + 1000) == 0.0
+
+
+def test_inter_arrival():
+    """Verify the inter-arrival times are summarized by their mean, deviation and histogram."""
+    stats = ProbeStats()
+    for timestamp in (0.0, 0.25, 0.5, 0.75, 1.0, 3.0):
+        stats.record(create_probe_data(address=PROBE_ADDRESS), 100.0 + timestamp)
+
+    assert round(stats.inter_arrival_mean, 3) == 0.6
+    assert round(stats.inter_arrival_stdev, 3) == round(((4 * 0.35 ** 2 + 1.4 ** 2) / 4) ** 0.5, 3)
+    buckets = stats.as_dict(103.0)['inter_arrival']['buckets']
+    assert buckets['le_300ms'] == 4
+    assert buckets['le_1000ms'] == 0
+    assert buckets['le_2000ms'] == 1
+
+
+def test_relay_shares():
+    """Verify packets are counted per relay address and hop count, with a bounded number of addresses."""
+    stats = ProbeStats()
+    for _ in range(3):
+        stats.record(create_probe_data(address=PROBE_ADDRESS), 0.0)
+    stats.record(create_probe_data(address=REPEATER_ADDRESS, hop_count=1), 0.0)
+
+    data = stats.as_dict(0.0)
+    assert data['addresses'] == {
+        PROBE_ADDRESS: {'packets': 3, 'share': 0.75},
+        REPEATER_ADDRESS: {'packets': 1, 'share': 0.25},
+    }
+    assert data['hop_counts'] == {
+        'HOP1': {'packets': 3, 'share': 0.75},
+        'HOP2': {'packets': 1, 'share': 0.25},
+    }
+    assert data['last_data']['address'] == REPEATER_ADDRESS
+    assert data['last_data']['mode'] == 'normal'
+    assert data['last_payload'] == create_combustion_bits(hop_count=1).hex()
+
+    for index in range(MAX_RELAY_ADDRESSES + 5):
+        stats.record(create_probe_data(address=f'c2:71:06:00:00:{index:02x}'), 0.0)
+    assert len(stats.addresses) == MAX_RELAY_ADDRESSES + 1
+    assert stats.addresses[OTHER_ADDRESSES] == 7
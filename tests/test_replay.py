@@ -0,0 +1,89 @@
+"""Replay recorded and synthetic Meatnet traffic, and benchmark the advertisement pipeline."""
+
+from pathlib import Path
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from tests.utils.integration import async_setup_probe_manager
+from tests.utils.replay import (
+    async_replay,
+    generate_meatnet,
+    read_capture,
+    write_capture,
+)
+
+
+def test_capture_round_trip(tmp_path: Path):
+    """Verify captures are read back as written, ordered by timestamp."""
+    advertisements = generate_meatnet(probes=2, repeaters=1, duration=2)
+    path = tmp_path / 'capture.jsonl'
+    write_capture(path, reversed(advertisements))
+
+    assert read_capture(path) == advertisements
+
+
+def test_generate_meatnet():
+    """Verify every reading of every probe is relayed by every repeater."""
+    advertisements = generate_meatnet(probes=3, repeaters=2, duration=10, rate=4)
+
+    assert len(advertisements) == 3 * 3 * 40
+    assert len({advertisement.address for advertisement in advertisements}) == 3 + 2
+    assert all(a.timestamp <= b.timestamp for (a, b) in zip(advertisements, advertisements[1:], strict=False))
+
+
+async def test_replay(hass: HomeAssistant, tmp_path: Path):
+    """Verify a replayed capture adds the probes, and relayed copies of a reading are not forwarded twice."""
+    probe_manager = await async_setup_probe_manager(hass)
+    path = tmp_path / 'capture.jsonl'
+    write_capture(path, generate_meatnet(probes=2, repeaters=2, duration=10))
+
+    result = await async_replay(hass, probe_manager.bluetooth_listener, read_capture(path), warmup=1)
+    await hass.async_block_till_done()
+
+    assert len(probe_manager.data) == 2
+    assert result.packets == 2 * 3 * 36
+    assert probe_manager.bluetooth_listener.duplicate_filter.duplicates >= 2 * 2 * 36
+    # The core of the first probe rises by 1 °C per minute, from 5 °C to 5.15 °C, within the default 0.1 °C deadband.
+    core = hass.states.get('sensor.predictive_thermometer_10000000_core_temperature')
+    assert round(float(core.state), 2) == 5.1
+    assert result.state_writes > 0
+
+
+async def test_replay_real_time(hass: HomeAssistant):
+    """Verify a capture replayed in real time takes as long as it lasted."""
+    probe_manager = await async_setup_probe_manager(hass)
+
+    result = await async_replay(
+        hass, probe_manager.bluetooth_listener, generate_meatnet(probes=1, repeaters=0, duration=1, rate=10), speed=1
+    )
+
+    assert result.packets == 10
+    assert 0.85 <= result.elapsed < 2
+
+
+@pytest.mark.benchmark
+async def test_benchmark_throughput(hass: HomeAssistant):
+    """Benchmark 8 probes relayed by 2 repeaters for 2 minutes, at maximum speed."""
+    probe_manager = await async_setup_probe_manager(hass)
+    advertisements = generate_meatnet(probes=8, repeaters=2, duration=120)
+
+    result = await async_replay(hass, probe_manager.bluetooth_listener, advertisements, warmup=1)
+    print(f'\n{result.report()}')
+
+    assert result.packets == sum(1 for advertisement in advertisements if advertisement.timestamp >= 1)
+    assert result.latency_percentile(50) < 1e-3
+    assert result.state_writes < result.packets
+
+
+@pytest.mark.benchmark
+async def test_benchmark_memory(hass: HomeAssistant):
+    """Measure the memory retained after replaying 8 probes relayed by 2 repeaters for 2 minutes."""
+    probe_manager = await async_setup_probe_manager(hass)
+    advertisements = generate_meatnet(probes=8, repeaters=2, duration=120)
+
+    result = await async_replay(hass, probe_manager.bluetooth_listener, advertisements, warmup=1, trace_memory=True)
+    print(f'\n{result.report()}')
+
+    # The history of each probe is allocated as soon as the probe is discovered, so little is added during the cook.
+    assert result.memory < 256 * 1024
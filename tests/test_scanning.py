@@ -0,0 +1,115 @@
+"""Test the scanning mode controller."""
+
+from unittest.mock import patch
+
+from homeassistant.components.bluetooth import BluetoothScanningMode
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from homeassistant.util.dt import monotonic_time_coarse
+
+from custom_components.combustion.const import (
+    SCANNING_MODE_ACTIVE,
+    SCANNING_MODE_ADAPTIVE,
+    SCANNING_MODE_PASSIVE,
+)
+from custom_components.combustion.scanning import (
+    DISCOVERY_DURATION,
+    EVALUATION_INTERVAL,
+    ScanningModeController,
+)
+from tests.utils.bt_utils import (
+    create_advertisement,
+    create_combustion_bits,
+    inject_bt_advertisement,
+)
+from tests.utils.integration import async_setup_probe_manager
+
+
+def _receive(controller: ScanningModeController, serial_number: str, packets: int) -> None:
+    for _ in range(packets):
+        controller.record_packet(serial_number, 0.0001)
+
+
+def test_adaptive_scanning():
+    """Verify adaptive scanning is active during discovery and while a probe is received rarely."""
+    controller = ScanningModeController(SCANNING_MODE_ADAPTIVE, 0)
+    assert controller.mode == BluetoothScanningMode.ACTIVE
+
+    now = DISCOVERY_DURATION
+    _receive(controller, 'cc1c0010', 4 * EVALUATION_INTERVAL)
+    assert controller.evaluate(now) is True
+    assert controller.mode == BluetoothScanningMode.PASSIVE
+
+    now += EVALUATION_INTERVAL
+    _receive(controller, 'cc1c0010', 4 * EVALUATION_INTERVAL)
+    _receive(controller, 'dd1c0010', 2)
+    assert controller.evaluate(now) is True
+    assert controller.mode == BluetoothScanningMode.ACTIVE
+
+    now += EVALUATION_INTERVAL
+    _receive(controller, 'cc1c0010', 4 * EVALUATION_INTERVAL)
+    _receive(controller, 'dd1c0010', 4 * EVALUATION_INTERVAL)
+    assert controller.evaluate(now) is True
+    assert controller.mode == BluetoothScanningMode.PASSIVE
+
+    diagnostics = controller.as_dict(now + EVALUATION_INTERVAL)
+    assert diagnostics['packet_rates'] == {'cc1c0010': 4.0, 'dd1c0010': 4.0}
+    assert diagnostics['modes']['passive']['packets'] == 4 * EVALUATION_INTERVAL + 2
+    assert diagnostics['modes']['passive']['duration_s'] == 2 * EVALUATION_INTERVAL
+    assert diagnostics['modes']['active']['packets'] == 3 * 4 * EVALUATION_INTERVAL
+    assert diagnostics['modes']['active']['duration_s'] == DISCOVERY_DURATION + EVALUATION_INTERVAL
+
+
+def test_fixed_scanning_modes():
+    """Verify the passive and active settings never switch modes."""
+    for (setting, mode) in (
+        (SCANNING_MODE_PASSIVE, BluetoothScanningMode.PASSIVE),
+        (SCANNING_MODE_ACTIVE, BluetoothScanningMode.ACTIVE),
+    ):
+        controller = ScanningModeController(setting, 0)
+        assert controller.mode == mode
+        _receive(controller, 'cc1c0010', 1)
+        assert controller.evaluate(DISCOVERY_DURATION) is False
+        assert controller.mode == mode
+
+
+def test_silent_probe_switches_to_active():
+    """Verify a probe which stopped advertising counts as received rarely, until it is forgotten."""
+    controller = ScanningModeController(SCANNING_MODE_ADAPTIVE, 0)
+
+    now = DISCOVERY_DURATION
+    _receive(controller, 'cc1c0010', 4 * EVALUATION_INTERVAL)
+    _receive(controller, 'dd1c0010', 4 * EVALUATION_INTERVAL)
+    assert controller.evaluate(now) is True
+    assert controller.mode == BluetoothScanningMode.PASSIVE
+
+    now += EVALUATION_INTERVAL
+    _receive(controller, 'cc1c0010', 4 * EVALUATION_INTERVAL)
+    assert controller.evaluate(now) is True
+    assert controller.mode == BluetoothScanningMode.ACTIVE
+    assert controller.packet_rates == {'cc1c0010': 4.0, 'dd1c0010': 0.0}
+
+    controller.forget('dd1c0010')
+    now += EVALUATION_INTERVAL
+    _receive(controller, 'cc1c0010', 4 * EVALUATION_INTERVAL)
+    assert controller.evaluate(now) is True
+    assert controller.mode == BluetoothScanningMode.PASSIVE
+    assert controller.packet_rates == {'cc1c0010': 4.0}
+
+
+async def test_replayed_advertisements_are_dropped(hass: HomeAssistant):
+    """Verify the advertisements replayed when registering again to switch modes are not handled twice."""
+    probe_manager = await async_setup_probe_manager(hass)
+    listener = probe_manager.bluetooth_listener
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits()))
+    await hass.async_block_till_done()
+    assert listener.instrumentation.packets == 1
+
+    with patch.object(listener.scanning, 'evaluate', return_value=True):
+        listener._async_evaluate_scanning_mode(dt_util.utcnow())
+    await hass.async_block_till_done()
+    assert listener.instrumentation.packets == 1
+
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits(temperature_data=[30.0] * 8), time=monotonic_time_coarse() + 1))
+    await hass.async_block_till_done()
+    assert listener.instrumentation.packets == 2
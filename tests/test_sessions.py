@@ -0,0 +1,199 @@
+"""Test detecting cook sessions, and summarizing them."""
+
+import time
+from datetime import timedelta
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    async_capture_events,
+    async_fire_time_changed,
+)
+
+from custom_components.combustion.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from custom_components.combustion.sessions import (
+    END_REMOVED,
+    END_TIMEOUT,
+    EVENT_SESSION_ENDED,
+    EVENT_SESSION_STARTED,
+    INSERTION_DELAY,
+    MAX_READING_GAP,
+    REMOVAL_DELAY,
+    SAVE_DELAY,
+    SESSION_TIMEOUT,
+    STORAGE_KEY,
+    CookSessions,
+)
+from tests.utils.bt_utils import (
+    create_advertisement,
+    create_combustion_bits,
+    inject_bt_advertisement,
+)
+from tests.utils.integration import async_setup_probe_manager
+
+SERIAL_NUMBER = 'cc1c0010'
+SESSION_ENTITY_ID = 'sensor.predictive_thermometer_cc1c0010_cook_session'
+
+IN_CHARGER = [21.0] * 8
+# The tip is in cold meat, the handle in a warm oven.
+INSERTED = [4.0, 4.5, 5.0, 6.0, 8.0, 20.0, 60.0, 110.0]
+
+
+def _update(sessions: CookSessions, timestamp: float, temperatures: list[float], core: float | None = None) -> bool:
+    return sessions.update(SERIAL_NUMBER, timestamp, temperatures, temperatures[0] if core is None else core, temperatures[-1])
+
+
+async def test_insertion_and_removal(hass: HomeAssistant):
+    """Verify sessions start and end once the spread of the thermistors settles past a threshold."""
+    sessions = CookSessions(hass)
+    started = async_capture_events(hass, EVENT_SESSION_STARTED)
+    ended = async_capture_events(hass, EVENT_SESSION_ENDED)
+
+    assert not _update(sessions, 0.0, IN_CHARGER)
+    # Briefly holding the probe does not start a session.
+    assert not _update(sessions, 10.0, INSERTED)
+    assert not _update(sessions, 20.0, IN_CHARGER)
+    assert not _update(sessions, 100.0, INSERTED)
+    assert not _update(sessions, 100.0 + INSERTION_DELAY / 2, INSERTED)
+    assert _update(sessions, 100.0 + INSERTION_DELAY, INSERTED)
+    await hass.async_block_till_done()
+    assert len(started) == 1
+    assert sessions.active(SERIAL_NUMBER).start == 100.0
+
+    # The core rises to 75°C over an hour, with a spread between the thresholds on the way.
+    for minute in range(1, 61):
+        core = 4.0 + minute * 71 / 60
+        assert not _update(sessions, 100.0 + minute * 60, [core, 40.0, 41.0, 41.5, 42.0, 42.5, 43.0, 43.0 + minute / 60], core)
+    session = sessions.active(SERIAL_NUMBER)
+    assert round(session.peak_core, 1) == 75.0
+    assert session.peak_ambient == 110.0
+
+    # Resting on the counter, the spread collapses and the probe is removed from when it did.
+    removed = 100.0 + 3700.0
+    assert not _update(sessions, removed, [60.0] * 8)
+    assert _update(sessions, removed + REMOVAL_DELAY, [59.0] * 8)
+    await hass.async_block_till_done()
+    assert sessions.active(SERIAL_NUMBER) is None
+
+    summary = ended[0].data
+    assert summary['serial_number'] == SERIAL_NUMBER
+    assert summary['end_reason'] == END_REMOVED
+    assert summary['duration'] == 62
+    assert summary['peak_core'] == 75.0
+    # The core is at or above each threshold from the minute it crosses it, and 54°C while resting.
+    assert summary['minutes_above'] == {'54': 20, '63': 11, '71': 4, '74': 1}
+    assert sessions.last(SERIAL_NUMBER).end == removed
+    assert sessions.as_dict()['started'] == sessions.as_dict()['ended'] == 1
+
+
+async def test_session_timeout(hass: HomeAssistant):
+    """Verify a session ends at its last reading once the probe stopped advertising, for example in its charger."""
+    sessions = CookSessions(hass)
+    ended = async_capture_events(hass, EVENT_SESSION_ENDED)
+    _update(sessions, 0.0, INSERTED)
+    _update(sessions, INSERTION_DELAY, INSERTED)
+    _update(sessions, 600.0, INSERTED, core=80.0)
+
+    assert sessions.expire(600.0 + SESSION_TIMEOUT) == []
+    assert sessions.expire(601.0 + SESSION_TIMEOUT) == [SERIAL_NUMBER]
+    await hass.async_block_till_done()
+    assert ended[0].data['end_reason'] == END_TIMEOUT
+    assert sessions.last(SERIAL_NUMBER).end == 600.0
+
+    # Gaps are not counted in the time above the thresholds.
+    _update(sessions, 5000.0, INSERTED, core=80.0)
+    assert _update(sessions, 5000.0 + INSERTION_DELAY, INSERTED, core=80.0)
+    _update(sessions, 5500.0, INSERTED, core=80.0)
+    assert sessions.active(SERIAL_NUMBER).start == 5000.0
+    assert sessions.active(SERIAL_NUMBER).time_above[0] == INSERTION_DELAY + MAX_READING_GAP
+    assert sessions.last(SERIAL_NUMBER).end_reason == END_TIMEOUT
+    assert sessions.last(SERIAL_NUMBER).start == 0.0
+
+
+def _inject(hass: HomeAssistant, temperatures: list[float], time: float) -> None:
+    inject_bt_advertisement(hass, create_advertisement(create_combustion_bits(temperature_data=temperatures, ambient_sensor_id=8), time=time))
+
+
+async def test_session_sensor_and_storage(hass: HomeAssistant, hass_storage: dict[str, Any]):
+    """Verify the session sensor follows the probe, and summaries are stored."""
+    started = async_capture_events(hass, EVENT_SESSION_STARTED)
+    with patch('custom_components.combustion.sessions.INSERTION_DELAY', 0), patch(
+        'custom_components.combustion.sessions.REMOVAL_DELAY', 0
+    ):
+        probe_manager = await async_setup_probe_manager(hass)
+        _inject(hass, INSERTED, 1)
+        await hass.async_block_till_done()
+        await probe_manager.async_add_pending_probes()
+        await hass.async_block_till_done()
+
+        state = hass.states.get(SESSION_ENTITY_ID)
+        assert state.state == 'cooking'
+        assert state.attributes['start'] == started[0].data['start']
+
+        _inject(hass, IN_CHARGER, 2)
+        await hass.async_block_till_done()
+
+    state = hass.states.get(SESSION_ENTITY_ID)
+    assert state.state == 'idle'
+    assert state.attributes['end_reason'] == END_REMOVED
+    assert state.attributes['peak_ambient'] == 110.0
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=SAVE_DELAY))
+    await hass.async_block_till_done()
+    stored = hass_storage[STORAGE_KEY]['data']
+    assert stored['active'] == {}
+    assert stored['history'][SERIAL_NUMBER][0]['end_reason'] == END_REMOVED
+
+
+async def test_session_is_resumed(hass: HomeAssistant, hass_storage: dict[str, Any]):
+    """Verify a session in progress before a restart is resumed."""
+    start = round(dt_util.utcnow().timestamp()) - 3600
+    session = {
+        'start': start,
+        'last': start + 3500,
+        'peak_core': 52.5,
+        'peak_ambient': 120.0,
+        'above': [0, 0, 0, 0],
+        'end': None,
+        'end_reason': None,
+    }
+    hass_storage[STORAGE_KEY] = {'version': 1, 'key': STORAGE_KEY, 'data': {'active': {SERIAL_NUMBER: session}, 'history': {}}}
+    probe_manager = await async_setup_probe_manager(hass)
+
+    _inject(hass, INSERTED, 1)
+    await hass.async_block_till_done()
+    await probe_manager.async_add_pending_probes()
+    await hass.async_block_till_done()
+
+    state = hass.states.get(SESSION_ENTITY_ID)
+    assert state.state == 'cooking'
+    assert state.attributes['start'] == dt_util.utc_from_timestamp(start).isoformat()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, probe_manager.bluetooth_listener.config_entry)
+    assert diagnostics['sessions']['started'] == 0
+    assert diagnostics['sessions']['active'][SERIAL_NUMBER]['duration'] == 60
+    assert diagnostics['sessions']['active'][SERIAL_NUMBER]['peak_ambient'] == 120.0
+
+
+@pytest.mark.benchmark
+async def test_benchmark_session_update(hass: HomeAssistant):
+    """Measure the time spent updating a session per reading, which does not grow with the length of the cook."""
+    sessions = CookSessions(hass)
+    _update(sessions, 0.0, INSERTED)
+    _update(sessions, INSERTION_DELAY, INSERTED)
+    timings = []
+    for hour in range(3):
+        start = time.perf_counter()
+        for index in range(14400):
+            timestamp = INSERTION_DELAY + hour * 3600 + index / 4
+            _update(sessions, timestamp, INSERTED, core=50.0 + index / 1000)
+        timings.append((time.perf_counter() - start) / 14400 * 1e6)
+    print('\nsession update per reading: ' + ', '.join(f'hour {hour + 1} {timing:.2f} µs' for (hour, timing) in enumerate(timings)))
+
+    assert sessions.active(SERIAL_NUMBER) is not None
+    assert timings[-1] < timings[0] * 3
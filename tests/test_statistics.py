@@ -0,0 +1,174 @@
+"""Test importing live readings into long-term statistics in statistics mode."""
+
+from datetime import timedelta
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from homeassistant.components.recorder import Recorder
+from homeassistant.components.recorder.util import session_scope
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    async_fire_time_changed,
+)
+from pytest_homeassistant_custom_component.components.recorder.common import (
+    async_wait_recording_done,
+)
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from custom_components.combustion.const import CONF_STATISTICS_MODE
+from custom_components.combustion.statistics import (
+    STATISTICS_IMPORT_INTERVAL,
+    statistic_id,
+)
+from tests.utils.bt_utils import (
+    create_advertisement,
+    create_combustion_bits,
+    inject_bt_advertisement,
+)
+from tests.utils.integration import async_setup_probe_manager
+from tests.utils.replay import async_replay, generate_meatnet
+
+SERIAL_NUMBER = 'cc1c0010'
+CORE_ENTITY_ID = 'sensor.predictive_thermometer_cc1c0010_core_temperature'
+
+# Temperature sensors which can be excluded from the recorder in statistics mode.
+TEMPERATURE_ENTITY_GLOBS = ['sensor.predictive_thermometer_*_temperature*']
+
+# Seconds of cook replayed by the database benchmark.
+BENCHMARK_DURATION = 3600
+
+
+def _inject(hass: HomeAssistant, core: float) -> None:
+    bits = create_combustion_bits(
+        temperature_data=[core - 1, core - 1, core, core + 1, core + 2, core + 3, core + 4, core + 5],
+        core_sensor_id=3,
+        surface_sensor_id=5,
+        ambient_sensor_id=8,
+    )
+    inject_bt_advertisement(hass, create_advertisement(bits, time=core))
+
+
+@pytest.fixture(name="add_statistics")
+def add_statistics_fixture(hass: HomeAssistant):
+    """Capture the statistics imported, as if the recorder was loaded."""
+    hass.config.components.add('recorder')
+    with patch("custom_components.combustion.statistics.async_add_external_statistics") as add_statistics:
+        yield add_statistics
+
+
+async def test_statistics_mode(hass: HomeAssistant, add_statistics):
+    """Verify readings are aggregated, and imported in one batch per virtual sensor and period."""
+    probe_manager = await async_setup_probe_manager(hass, {CONF_STATISTICS_MODE: True})
+    for core in (50.0, 51.0, 52.0):
+        _inject(hass, core)
+        await hass.async_block_till_done()
+    await probe_manager.async_add_pending_probes()
+    await hass.async_block_till_done()
+    assert add_statistics.call_count == 0
+    # The recorder does not compile statistics of the states.
+    assert 'state_class' not in hass.states.get(CORE_ENTITY_ID).attributes
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=STATISTICS_IMPORT_INTERVAL))
+    await hass.async_block_till_done()
+
+    assert add_statistics.call_count == 3
+    imported = {call.args[1]['statistic_id']: call.args[2] for call in add_statistics.call_args_list}
+    core = imported[statistic_id(SERIAL_NUMBER, 'core')]
+    # Readings may straddle the start of an hour.
+    assert round(min(row['min'] for row in core), 2) == 50.0
+    assert round(max(row['max'] for row in core), 2) == 52.0
+    assert round(max(row['max'] for row in imported[statistic_id(SERIAL_NUMBER, 'ambient')]), 2) == 57.0
+
+    # Nothing changed since the last import.
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=2 * STATISTICS_IMPORT_INTERVAL))
+    await hass.async_block_till_done()
+    assert add_statistics.call_count == 3
+
+    # The running period is imported on unload.
+    _inject(hass, 53.0)
+    await hass.async_block_till_done()
+    probe_manager.async_unload()
+    assert add_statistics.call_count == 6
+
+
+async def test_statistics_mode_disabled(hass: HomeAssistant, add_statistics):
+    """Verify nothing is imported, and the recorder compiles statistics of the states, by default."""
+    probe_manager = await async_setup_probe_manager(hass)
+    _inject(hass, 50.0)
+    await hass.async_block_till_done()
+    await probe_manager.async_add_pending_probes()
+    await hass.async_block_till_done()
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=STATISTICS_IMPORT_INTERVAL))
+    await hass.async_block_till_done()
+
+    assert add_statistics.call_count == 0
+    assert hass.states.get(CORE_ENTITY_ID).attributes['state_class'] == 'measurement'
+
+
+def _database_usage(hass: HomeAssistant) -> dict[str, tuple[int, int | None]]:
+    """Rows and bytes of the tables holding states and statistics."""
+    usage = {}
+    with session_scope(hass=hass, read_only=True) as session:
+        for table in ('states', 'state_attributes', 'statistics', 'statistics_short_term'):
+            rows = session.execute(text(f'SELECT COUNT(*) FROM {table}')).scalar()
+            try:
+                size = session.execute(text(f"SELECT SUM(payload) FROM dbstat WHERE name = '{table}'")).scalar()
+            except OperationalError:
+                # SQLite was built without the dbstat table.
+                size = None
+            usage[table] = (rows, size)
+    return usage
+
+
+# The recorder database must be set up before Home Assistant, which the autouse fixtures of conftest.py start.
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(async_setup_recorder_instance, enable_custom_integrations):
+    """Set up the recorder database, then enable custom integrations."""
+
+
+@pytest.fixture(autouse=True)
+def mock_bluetooth(async_setup_recorder_instance, enable_bluetooth):
+    """Set up the recorder database, then mock bluetooth."""
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    ("options", "recorder_config"),
+    [
+        ({}, None),
+        ({CONF_STATISTICS_MODE: True}, {'exclude': {'entity_globs': TEMPERATURE_ENTITY_GLOBS}}),
+    ],
+    ids=['states', 'statistics_mode'],
+)
+async def test_benchmark_database_growth(
+    recorder_mock: Recorder, hass: HomeAssistant, options: dict[str, Any], recorder_config: dict[str, Any] | None
+):
+    """Measure the database rows and bytes written per hour of cooking, with and without statistics mode."""
+    probe_manager = await async_setup_probe_manager(hass, options)
+    await async_wait_recording_done(hass)
+    before = await recorder_mock.async_add_executor_job(_database_usage, hass)
+
+    await async_replay(
+        hass, probe_manager.bluetooth_listener, generate_meatnet(probes=1, repeaters=0, duration=BENCHMARK_DURATION), warmup=1
+    )
+    probe_manager.async_unload()
+    await async_wait_recording_done(hass)
+    after = await recorder_mock.async_add_executor_job(_database_usage, hass)
+
+    growth = {
+        table: (after[table][0] - before[table][0], None if after[table][1] is None else after[table][1] - before[table][1])
+        for table in after
+    }
+    print(f"\n{'statistics mode' if options else 'states'}, per hour of cooking: " + ', '.join(
+        f'{table} {rows} rows' + ('' if size is None else f' ({size / 1024:,.1f} KiB)') for (table, (rows, size)) in growth.items()
+    ))
+
+    if options:
+        assert growth['states'][0] < 100
+        assert growth['statistics'][0] > 0
+    else:
+        assert growth['states'][0] > 100
@@ -10,6 +10,11 @@ from homeassistant.components.bluetooth import async_get_advertisement_callback
 from homeassistant.components.bluetooth.models import BluetoothServiceInfoBleak
 from homeassistant.core import HomeAssistant
 
+from custom_components.combustion.combustion_ble.decoder import (
+    DecodedAdvertisement,
+    DecodedProbeData,
+)
+
 ADVERTISEMENT_DATA_DEFAULTS = {
     "local_name": "",
     "manufacturer_data": {},
@@ -90,7 +95,13 @@ def inject_bt_advertisement(hass: HomeAssistant, service_info: BluetoothServiceI
     """Inject a BT advertisement into HASS."""
     async_get_advertisement_callback(hass)(service_info)
 
-def create_advertisement(combustion_bits):
+def create_advertisement(
+        combustion_bits,
+        address: str = "cc:cc:cc:cc:cc:cc",
+        rssi: int = -61,
+        source: str = 'B8:27:EB:EA:98:17',
+        time: float = 0,
+    ):
     """Create a BT advertisement."""
     adv = generate_advertisement_data(
         manufacturer_data={2503: combustion_bits},
@@ -98,13 +109,13 @@ def create_advertisement(combustion_bits):
     )
 
     return BluetoothServiceInfoBleak(
-        name="cc:cc:cc:cc:cc:cc",
-        address="cc:cc:cc:cc:cc:cc",
+        name=address,
+        address=address,
         device=generate_ble_device(
-            address="cc:cc:cc:cc:cc:cc",
+            address=address,
             name="Combustion",
         ),
-        rssi=-61,
+        rssi=rssi,
         manufacturer_data=adv.manufacturer_data,
         service_data={
         },
@@ -112,10 +123,10 @@ def create_advertisement(combustion_bits):
             '0000fe59-0000-1000-8000-00805f9b34fb',
             '00000100-caab-3792-3d44-97ae51c1407a'
         ],
-        source='B8:27:EB:EA:98:17',
+        source=source,
         advertisement=adv,
         connectable=True,
-        time=0,
+        time=time,
     )
 
 def create_combustion_bits(
@@ -127,7 +138,8 @@ def create_combustion_bits(
         core_sensor_id: int = 1,
         ambient_sensor_id: int = 7,
         surface_sensor_id: int = 5,
-        battery_ok: bool = True
+        battery_ok: bool = True,
+        hop_count: int = 0,
     ):
     """Create a bit representation for use in a BT advertisement."""
     device_type = CombustionProductType[device_type].value.to_bytes(1)
@@ -180,7 +192,8 @@ def create_combustion_bits(
 
     battery_virtual_byte = Bits(((status_value & 0x1) | (virtual_byte << 1)).to_bytes())
 
-    network_info_byte = Bits(int.to_bytes(0))
+    # Network info: hop count in the upper two bits
+    network_info_byte = Bits(int.to_bytes((hop_count & 0x3) << 6))
 
     return  (device_type + serial_number + temperatures + mode_id + battery_virtual_byte + network_info_byte).tobytes()
 
@@ -196,3 +209,7 @@ def create_combustion_bits(
 
 # actual
 # 00101101110000110110010110111000100011001001011001100001001100110110100010000110110011011100100000011001
+
+def create_probe_data(rssi: int = -61, address: str = "cc:cc:cc:cc:cc:cc", **kwargs) -> DecodedProbeData:
+    """Create decoded probe data, from `create_combustion_bits` keyword arguments."""
+    return DecodedProbeData(DecodedAdvertisement.from_payload(create_combustion_bits(**kwargs)), rssi, address)
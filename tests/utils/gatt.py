@@ -0,0 +1,90 @@
+"""Fake GATT clients, standing in for bleak connections to probes and MeatNet nodes."""
+from binascii import crc_hqx
+from collections.abc import Callable
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from combustion.combustion_ble.uart import RESPONSE_FLAG, UART_SYNC
+
+from tests.utils.bt_utils import (
+    generate_ble_device,
+    patch_async_ble_device_from_address,
+)
+
+
+class FakeBleakClient:
+    """Connected bleak client, whose notifications are sent by the test."""
+
+    def __init__(self, disconnected_callback) -> None:
+        """Initialize."""
+        self.disconnected_callback = disconnected_callback
+        self.handlers = {}
+        self.is_connected = True
+        # Called with the characteristic and data of every write.
+        self.on_write: Callable[[str, bytes], None] | None = None
+
+    async def start_notify(self, uuid: str, handler) -> None:
+        """Subscribe to notifications of a characteristic."""
+        self.handlers[uuid] = handler
+
+    async def write_gatt_char(self, uuid: str, data: bytes, response: bool = False) -> None:
+        """Write a characteristic."""
+        if self.on_write is not None:
+            self.on_write(uuid, bytes(data))
+
+    async def disconnect(self) -> None:
+        """Disconnect."""
+        self.is_connected = False
+
+    def notify(self, uuid: str, data: bytes) -> None:
+        """Send a notification of a characteristic."""
+        self.handlers[uuid](None, bytearray(data))
+
+    def drop(self) -> None:
+        """Lose the connection."""
+        self.is_connected = False
+        self.disconnected_callback(self)
+
+
+class FakeConnector:
+    """Replacement of `establish_connection`, recording every attempt."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.attempts: list[str] = []
+        self.clients: dict[str, FakeBleakClient] = {}
+        self.error: Exception | None = None
+        # Called with every client connected, before it is returned.
+        self.on_connect: Callable[[FakeBleakClient], None] | None = None
+
+    async def __call__(self, _client_class, device, _name, disconnected_callback=None, **_kwargs) -> FakeBleakClient:
+        """Connect to the device, unless `error` is set."""
+        self.attempts.append(device.address)
+        if self.error is not None:
+            raise self.error
+        client = self.clients[device.address] = FakeBleakClient(disconnected_callback)
+        if self.on_connect is not None:
+            self.on_connect(client)
+        return client
+
+
+@contextmanager
+def patch_connections(connector: FakeConnector):
+    """Patch connections to use the fake bleak clients of a connector."""
+    with patch("custom_components.combustion.connection.establish_connection", connector), patch_async_ble_device_from_address(
+        None
+    ) as device_from_address:
+        device_from_address.side_effect = lambda _hass, address, connectable: generate_ble_device(address=address, name="Combustion")
+        yield connector
+
+
+def node_message(message_type: int, payload: bytes) -> bytes:
+    """Encode a request sent by a MeatNet node."""
+    body = bytes((message_type,)) + (1).to_bytes(4, 'little') + bytes((len(payload),)) + payload
+    return UART_SYNC + crc_hqx(body, 0xFFFF).to_bytes(2, 'little') + body
+
+
+def probe_response(message_type: int, payload: bytes) -> bytes:
+    """Encode a successful response sent by a probe."""
+    body = bytes((message_type | RESPONSE_FLAG, 1, len(payload))) + payload
+    return UART_SYNC + crc_hqx(body, 0xFFFF).to_bytes(2, 'little') + body
@@ -0,0 +1,22 @@
+"""Integration setup test utilities."""
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.combustion.const import DOMAIN
+from custom_components.combustion.probe_manager import ProbeManager
+
+
+async def async_setup_integration(hass: HomeAssistant, options: dict | None = None) -> MockConfigEntry:
+    """Set up the integration from a Meatnet config entry with the provided options."""
+    entry = MockConfigEntry(domain=DOMAIN, version=1, data={}, options=options or {}, title="Meatnet")
+    entry.add_to_hass(hass)
+    assert await async_setup_component(hass, DOMAIN, {}) is True
+    await hass.async_block_till_done()
+    return entry
+
+
+async def async_setup_probe_manager(hass: HomeAssistant, options: dict | None = None) -> ProbeManager:
+    """Set up the integration, and return its probe manager."""
+    await async_setup_integration(hass, options)
+    return hass.data[DOMAIN]
@@ -0,0 +1,295 @@
+"""Record, generate and replay Combustion advertisements.
+
+Captures are JSON lines, one advertisement per line:
+
+    {"timestamp": 0.25, "address": "c2:71:04:90:1c:3b", "rssi": -61, "source": "hci0", "manufacturer_data": "01cc1c0010..."}
+
+`timestamp` is in seconds since the start of the capture, and `manufacturer_data` is the hex encoded
+Combustion manufacturer data, without the vendor id prefix.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+from array import array
+from collections.abc import Iterable, Sequence
+from datetime import timedelta
+from pathlib import Path
+from typing import NamedTuple
+
+from homeassistant.components.bluetooth import BluetoothChange
+from homeassistant.components.bluetooth.models import BluetoothServiceInfoBleak
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.combustion.bluetooth_listener import BluetoothListener
+from custom_components.combustion.const import BT_MANUFACTURER_ID
+from tests.utils.bt_utils import create_advertisement, create_combustion_bits
+
+# At maximum speed, Home Assistant's clock follows the capture in steps of this many seconds, so
+# timers such as the rate limits of entities fire as they would have during the capture.
+MAX_SPEED_TIME_STEP = 0.5
+
+# At maximum speed, time is advanced by this much after the replay, so rate limited entities
+# write the latest values they were holding back.
+FLUSH_DELAY = timedelta(minutes=5)
+
+# Memory is only attributed to the integration when it is allocated by its own code.
+_INTEGRATION_FILTER = tracemalloc.Filter(True, '*/custom_components/combustion/*')
+
+
+class CapturedAdvertisement(NamedTuple):
+    """An advertisement received from a probe or a repeater."""
+
+    timestamp: float
+    address: str
+    rssi: int
+    manufacturer_data: bytes
+    source: str = 'hci0'
+
+    def as_dict(self) -> dict:
+        """Convert to the capture format."""
+        return {
+            'timestamp': self.timestamp,
+            'address': self.address,
+            'rssi': self.rssi,
+            'source': self.source,
+            'manufacturer_data': self.manufacturer_data.hex(),
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> CapturedAdvertisement:
+        """Create instance from the capture format."""
+        return CapturedAdvertisement(
+            timestamp=float(data['timestamp']),
+            address=data['address'],
+            rssi=int(data['rssi']),
+            manufacturer_data=bytes.fromhex(data['manufacturer_data']),
+            source=data.get('source', 'hci0'),
+        )
+
+    @staticmethod
+    def from_service_info(service_info: BluetoothServiceInfoBleak, start: float = 0) -> CapturedAdvertisement:
+        """Capture an advertisement received at `service_info.time`, relative to `start`."""
+        return CapturedAdvertisement(
+            timestamp=service_info.time - start,
+            address=service_info.address,
+            rssi=service_info.rssi,
+            manufacturer_data=service_info.manufacturer_data[BT_MANUFACTURER_ID],
+            source=service_info.source,
+        )
+
+    def to_service_info(self, start: float = 0) -> BluetoothServiceInfoBleak:
+        """Create the advertisement received at `start` + `timestamp`."""
+        return create_advertisement(
+            self.manufacturer_data,
+            address=self.address,
+            rssi=self.rssi,
+            source=self.source,
+            time=start + self.timestamp,
+        )
+
+
+def write_capture(path: Path, advertisements: Iterable[CapturedAdvertisement]) -> None:
+    """Write advertisements to a capture file."""
+    with open(path, 'w', encoding='utf-8') as file:
+        for advertisement in advertisements:
+            file.write(json.dumps(advertisement.as_dict()))
+            file.write('\n')
+
+
+def read_capture(path: Path) -> list[CapturedAdvertisement]:
+    """Read the advertisements of a capture file, ordered by timestamp."""
+    with open(path, encoding='utf-8') as file:
+        advertisements = [CapturedAdvertisement.from_dict(json.loads(line)) for line in file if line.strip()]
+    advertisements.sort(key=lambda advertisement: advertisement.timestamp)
+    return advertisements
+
+
+def probe_serial_number(probe: int) -> str:
+    """Return the serial number of the `probe`th synthetic probe."""
+    return f'{0x10000000 + probe:08x}'
+
+
+def generate_meatnet(
+    probes: int,
+    repeaters: int,
+    duration: float,
+    rate: float = 4.0,
+    relay_delay: float = 0.05,
+) -> list[CapturedAdvertisement]:
+    """Generate the advertisements of `probes` probes cooking next to `repeaters` repeaters.
+
+    Each probe advertises `rate` times per second, and every repeater relays each of its readings
+    one hop later, `relay_delay` seconds apart. The core of each probe rises by 1 °C per minute,
+    so most consecutive readings are identical at the 0.05 °C resolution of the probe.
+    """
+    advertisements = []
+    payloads: dict[tuple[int, float, int], bytes] = {}
+    interval = 1 / rate
+    for probe in range(probes):
+        # Serial numbers are sent least significant byte first.
+        serial_number = bytes.fromhex(probe_serial_number(probe))[::-1].hex()
+        address = f'c2:71:04:90:{probe >> 8:02x}:{probe & 0xFF:02x}'
+        offset = probe * interval / probes
+        for sample in range(int(duration * rate)):
+            timestamp = offset + sample * interval
+            core = round(5.0 + probe + timestamp / 60, 2)
+            readings = [(timestamp, address, -70 - probe % 20, 0)]
+            readings.extend(
+                (timestamp + (repeater + 1) * relay_delay, f'c2:71:05:00:00:{repeater:02x}', -55 - repeater % 20, 1)
+                for repeater in range(repeaters)
+            )
+            for (received, sender, rssi, hop_count) in readings:
+                key = (probe, core, hop_count)
+                payload = payloads.get(key)
+                if payload is None:
+                    payload = payloads[key] = create_combustion_bits(
+                        probe_id=probe % 8 + 1,
+                        serial_number=serial_number,
+                        temperature_data=[core, core + 1, core + 2, 60.0, 80.0, 100.0, 120.0, 120.0],
+                        hop_count=hop_count,
+                    )
+                advertisements.append(CapturedAdvertisement(received, sender, rssi, payload))
+
+    advertisements.sort(key=lambda advertisement: advertisement.timestamp)
+    return advertisements
+
+
+class ReplayResult(NamedTuple):
+    """Measurements of a replay."""
+
+    packets: int
+    # Seconds of capture replayed, wall clock seconds spent replaying, and seconds spent in the Bluetooth callback.
+    duration: float
+    elapsed: float
+    busy: float
+    latencies: Sequence[float]
+    state_writes: int
+    # Bytes allocated by the integration and still held after the replay, and the peak of all
+    # allocations during the replay, when memory was traced.
+    memory: int | None = None
+    peak_memory: int | None = None
+
+    @property
+    def packets_per_second(self) -> float:
+        """Packets handled per second spent in the Bluetooth callback."""
+        return self.packets / self.busy if self.busy else 0.0
+
+    @property
+    def state_writes_per_second(self) -> float:
+        """State writes per second of capture."""
+        return self.state_writes / self.duration if self.duration else 0.0
+
+    def latency_percentile(self, percentile: int) -> float:
+        """Seconds spent handling a packet, at the given percentile."""
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else 0.0
+        return statistics.quantiles(self.latencies, n=100)[percentile - 1]
+
+    def report(self) -> str:
+        """Summarize the measurements."""
+        lines = [
+            f'packets:        {self.packets} over {self.duration:,.0f} s of capture, replayed in {self.elapsed:,.2f} s',
+            f'packets/s:      {self.packets_per_second:,.0f}',
+            'latency (µs):   ' + ', '.join(
+                f'p{percentile} {self.latency_percentile(percentile) * 1e6:.1f}' for percentile in (50, 95, 99)
+            ) + f', max {max(self.latencies, default=0) * 1e6:.1f}',
+            f'state writes:   {self.state_writes} ({self.state_writes_per_second:,.2f}/s of capture)',
+        ]
+        if self.memory is not None:
+            lines.append(f'memory (KiB):   {self.memory / 1024:,.1f} held by the integration, peak {self.peak_memory / 1024:,.1f}')
+        return '\n'.join(lines)
+
+
+def _integration_memory(snapshot: tracemalloc.Snapshot) -> int:
+    """Bytes allocated by the integration in a snapshot."""
+    return sum(stat.size for stat in snapshot.filter_traces((_INTEGRATION_FILTER,)).statistics('filename'))
+
+
+async def async_replay(
+    hass: HomeAssistant,
+    listener: BluetoothListener,
+    advertisements: list[CapturedAdvertisement],
+    speed: float | None = None,
+    warmup: float = 0.0,
+    trace_memory: bool = False,
+) -> ReplayResult:
+    """Push advertisements through the Bluetooth callback of the integration.
+
+    With `speed` the capture is replayed in real time (1.0) or scaled. Without it, the capture is
+    replayed as fast as possible while the clock of Home Assistant follows the capture, and the
+    writes held back by rate limiting are flushed at the end. Advertisements within the first
+    `warmup` seconds are replayed, then the event loop is drained so entities of the discovered
+    probes are added, before measurements start.
+    """
+    start = time.monotonic()
+    service_infos = [(advertisement.timestamp, advertisement.to_service_info(start)) for advertisement in advertisements]
+    first_measured = next(
+        (index for (index, (timestamp, _)) in enumerate(service_infos) if timestamp >= warmup), len(service_infos)
+    )
+    bt_callback = listener._bt_callback
+    for (_, service_info) in service_infos[:first_measured]:
+        bt_callback(service_info, BluetoothChange.ADVERTISEMENT)
+    await hass.async_block_till_done()
+
+    measured = service_infos[first_measured:]
+    origin = measured[0][0] if measured else 0.0
+    duration = measured[-1][0] - origin if measured else 0.0
+    # Allocated up front, so the measurements do not show up in the memory of the replay.
+    latencies = array('d', bytes(8 * len(measured)))
+    state_writes = 0
+
+    @callback
+    def _count_state_write(_event: Event) -> None:
+        nonlocal state_writes
+        state_writes += 1
+
+    remove_listener = hass.bus.async_listen(EVENT_STATE_CHANGED, _count_state_write)
+    if trace_memory:
+        tracemalloc.start()
+        baseline = tracemalloc.take_snapshot()
+
+    replay_start = time.perf_counter()
+    origin_utc = dt_util.utcnow()
+    clock = origin
+    try:
+        for (index, (timestamp, service_info)) in enumerate(measured):
+            if speed is not None:
+                delay = (timestamp - origin) / speed - (time.perf_counter() - replay_start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif timestamp - clock >= MAX_SPEED_TIME_STEP:
+                clock = timestamp
+                async_fire_time_changed(hass, origin_utc + timedelta(seconds=clock - origin))
+                await asyncio.sleep(0)
+
+            packet_start = time.perf_counter()
+            bt_callback(service_info, BluetoothChange.ADVERTISEMENT)
+            latencies[index] = time.perf_counter() - packet_start
+        if speed is None:
+            async_fire_time_changed(hass, origin_utc + timedelta(seconds=clock - origin) + FLUSH_DELAY)
+        await hass.async_block_till_done()
+        elapsed = time.perf_counter() - replay_start
+    finally:
+        remove_listener()
+        if trace_memory:
+            memory = _integration_memory(tracemalloc.take_snapshot()) - _integration_memory(baseline)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    return ReplayResult(
+        packets=len(latencies),
+        duration=duration,
+        elapsed=elapsed,
+        busy=sum(latencies),
+        latencies=latencies,
+        state_writes=state_writes,
+        memory=memory if trace_memory else None,
+        peak_memory=peak_memory if trace_memory else None,
+    )